@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'restaurant.middleware.MetricsMiddleware',
+    'restaurant.middleware.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,6 +62,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'restaurant.context_processors.booking_counts',
             ],
         },
     },
@@ -67,6 +70,114 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'wsgi.application'
 
+# Prometheus: when set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Slow query log: statements slower than this many milliseconds are written
+# to SLOW_QUERY_LOG_FILE, SELECT and WITH statements with their EXPLAIN
+# output. None (an empty or "off" environment value) disables the log.
+SLOW_QUERY_THRESHOLD_MS = os.getenv('SLOW_QUERY_THRESHOLD_MS', '250').strip()
+SLOW_QUERY_THRESHOLD_MS = (
+    None if SLOW_QUERY_THRESHOLD_MS.lower() in ('', 'off')
+    else float(SLOW_QUERY_THRESHOLD_MS)
+)
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE',
+    os.path.join(BASE_DIR, 'slow_queries.jsonl')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'restaurant.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Cache: local memory by default. Point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (e.g. Redis or the database) so limits and cached data are
+# shared between workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'restaurant'),
+    }
+}
+
+# Token-bucket rate limits per scope: "<requests>/<s|m|h|d>"
+RATE_LIMITS = {
+    'contact': '10/m',
+    'booking': '20/m',
+    'login': '10/m',
+    'signup': '5/m',
+}
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = (
+    os.getenv('RATE_LIMIT_TRUST_X_FORWARDED_FOR', 'False') == 'True'
+)
+
+# Identical contact messages received within this many seconds are merged
+CONTACT_DUPLICATE_WINDOW = 24 * 60 * 60
+
+# How long a table is held for one booking
+BOOKING_DURATION_MINUTES = 120
+
+# Spacing of the start times offered by the availability lookup
+BOOKING_SLOT_MINUTES = 30
+
+# Standing reservations become bookings this many days ahead
+STANDING_RESERVATION_HORIZON_DAYS = 60
+
+# Parties above the single-table limit are seated on joined tables
+LARGE_PARTY_MAX_GUESTS = 30
+MAX_JOINED_TABLES = 6
+
+# Largest number of bookings accepted in one API batch create
+API_MAX_BATCH_SIZE = 100
+
+# Seconds a booking POST's idempotency key is remembered for replays
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Reminder emails go out this many hours before a confirmed booking; the
+# send_reminders command skips reminders overdue by more than the grace
+BOOKING_REMINDER_HOURS = (24, 2)
+BOOKING_REMINDER_GRACE_MINUTES = 60
+
+# The booking change feed holds back entries younger than this, so that
+# a transaction committing late cannot slip in behind a consumer's cursor
+CHANGE_FEED_SETTLE_SECONDS = 2
+# compact_outbox drops entries older than this even if a consumer has not
+# read them
+CHANGE_FEED_RETENTION_DAYS = 7
+
+# Each worker checks the booking outbox for changes to the restaurant-days
+# its availability streams are watching this often, and recomputes every
+# watched day at the longer interval so passing start times drop out
+AVAILABILITY_STREAM_POLL_SECONDS = 1
+AVAILABILITY_STREAM_REFRESH_SECONDS = 60
+
+# archive_bookings moves bookings older than this many days by default
+BOOKING_ARCHIVE_AFTER_DAYS = 365
+
 # Database
 DATABASES = {
     'default': {
@@ -0,0 +1,29 @@
+"""Gunicorn settings, picked up automatically from the working directory."""
+import os
+import shutil
+import tempfile
+
+# Workers share their Prometheus samples through files in this directory.
+# It has to be in the environment before any worker imports
+# prometheus_client, which is why it is set here in the master.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'restaurant-prometheus'),
+)
+
+# Workers run the ASGI application on an event loop, so an open
+# availability stream costs a coroutine rather than a worker thread.
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+
+def on_starting(server):
+    """Start every deploy with empty metric files."""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges of workers that have gone away."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,25 @@
 from django.contrib import admin
-from .models import Restaurant, TimeSlot, Booking, MenuItem, Table
+from .models import (
+    Restaurant, OpeningHours, Closure, TimeSlot, StandingReservation,
+    Booking, BookingEvent, ArchivedBooking, MenuCategory, MenuItem, Table,
+    DailyBookingStats
+)
+from .timeslots import generate_time_slots
+
+
+class OpeningHoursInline(admin.TabularInline):
+    model = OpeningHours
+    extra = 0
+
+
+class ClosureInline(admin.TabularInline):
+    model = Closure
+    extra = 0
+
+
+class MenuCategoryInline(admin.TabularInline):
+    model = MenuCategory
+    extra = 0
 
 
 @admin.register(Restaurant)
@@ -10,6 +30,19 @@ class RestaurantAdmin(admin.ModelAdmin):
     )
     search_fields = ('name', 'address')
     list_filter = ('opening_time', 'closing_time')
+    inlines = [OpeningHoursInline, ClosureInline, MenuCategoryInline]
+    actions = ['generate_slots']
+
+    def generate_slots(self, request, queryset):
+        created = generate_time_slots(queryset)
+        self.message_user(
+            request,
+            f'Created {created} time slot(s) for {queryset.count()} '
+            f'restaurant(s).'
+        )
+    generate_slots.short_description = (
+        "Generate 30-minute time slots from opening hours"
+    )
 
 
 @admin.register(Table)
@@ -17,15 +50,44 @@ class TableAdmin(admin.ModelAdmin):
     list_display = ('restaurant', 'table_number', 'capacity', 'is_active')
     list_filter = ('is_active', 'restaurant')
     search_fields = ('restaurant__name',)
+    filter_horizontal = ('joinable_with',)
 
 
 @admin.register(TimeSlot)
 class TimeSlotAdmin(admin.ModelAdmin):
-    list_display = ('restaurant', 'start_time', 'end_time', 'is_available')
-    list_filter = ('is_available', 'restaurant')
+    list_display = (
+        'restaurant', 'weekday', 'start_time', 'end_time', 'is_available'
+    )
+    list_filter = ('is_available', 'weekday', 'restaurant')
     search_fields = ('restaurant__name',)
 
 
+@admin.register(StandingReservation)
+class StandingReservationAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'restaurant', 'weekday', 'time', 'number_of_guests',
+        'interval_weeks', 'start_date', 'end_date', 'expanded_until',
+        'is_active'
+    )
+    list_filter = ('is_active', 'weekday', 'restaurant')
+    search_fields = ('user__username', 'restaurant__name')
+    readonly_fields = ('expanded_until', 'created_at')
+
+
+class BookingEventInline(admin.TabularInline):
+    model = BookingEvent
+    fields = (
+        'created_at', 'event_type', 'from_status', 'to_status', 'actor',
+        'details'
+    )
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = (
@@ -35,7 +97,9 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ('status', 'date', 'restaurant')
     search_fields = ('user__username', 'restaurant__name')
     readonly_fields = ('created_at', 'updated_at')
-    actions = ['approve_bookings', 'reject_bookings']
+    actions = ['approve_bookings', 'reject_bookings', 'mark_no_show']
+    inlines = [BookingEventInline]
+    filter_horizontal = ('joined_tables',)
     list_per_page = 20
     date_hierarchy = 'date'
     ordering = ('-date', '-time')
@@ -43,8 +107,8 @@ class BookingAdmin(admin.ModelAdmin):
     fieldsets = (
         ('Booking Information', {
             'fields': (
-                'user', 'restaurant', 'table', 'time_slot', 'date',
-                'time', 'number_of_guests'
+                'user', 'restaurant', 'table', 'joined_tables',
+                'time_slot', 'date', 'time', 'number_of_guests'
             )
         }),
         ('Additional Information', {
@@ -56,17 +120,67 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        obj._actor = request.user
+        super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        obj._actor = request.user
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        queryset.delete(actor=request.user)
+
     def approve_bookings(self, request, queryset):
-        queryset.update(status='confirmed')
+        queryset.set_status('confirmed', actor=request.user)
     approve_bookings.short_description = "Approve selected bookings"
 
     def reject_bookings(self, request, queryset):
-        queryset.update(status='cancelled')
+        queryset.set_status('cancelled', actor=request.user)
     reject_bookings.short_description = "Reject selected bookings"
 
+    def mark_no_show(self, request, queryset):
+        queryset.set_status('no_show', actor=request.user)
+    mark_no_show.short_description = "Mark selected bookings as no-shows"
+
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'restaurant', 'price')
+    list_display = ('name', 'restaurant', 'category', 'position', 'price')
     list_filter = ('restaurant',)
+    list_select_related = ('restaurant', 'category')
     search_fields = ('name', 'restaurant__name')
+
+
+@admin.register(DailyBookingStats)
+class DailyBookingStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'restaurant', 'date', 'pending_count', 'confirmed_count',
+        'cancelled_count', 'no_show_count', 'total_covers', 'peak_hour_covers'
+    )
+    list_filter = ('restaurant',)
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'user', 'restaurant', 'date', 'time', 'number_of_guests',
+        'status', 'archived_at'
+    )
+    list_filter = ('status', 'restaurant')
+    search_fields = ('user__username', 'restaurant__name')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,221 @@
+"""Booking analytics computed with NumPy over the whole booking history.
+
+Live and archived bookings are read as integer columns, a chunk at a time,
+into NumPy arrays; every figure is then a few array operations grouped by
+restaurant, so a report over millions of bookings never loops over them in
+Python.
+"""
+from datetime import date
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import ExtractHour, ExtractMinute, TruncDate
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking, Restaurant
+from .schedule import to_time
+
+STATUS_CODES = {
+    status: code for code, (status, _) in enumerate(Booking.STATUS_CHOICES)
+}
+COLUMNS = ('restaurant', 'day', 'minute', 'guests', 'status', 'lead')
+# Lower edges, in days, of the lead-time histogram; the last bin is open.
+LEAD_TIME_BINS = (0, 1, 2, 4, 8, 15, 31, 61, 91)
+CHUNK_SIZE = 10000
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _rows(bookings):
+    return bookings.order_by().annotate(
+        minute=ExtractHour('time') * 60 + ExtractMinute('time'),
+        status_code=Case(
+            *[When(status=status, then=Value(code))
+              for status, code in STATUS_CODES.items()],
+            default=Value(-1),
+            output_field=IntegerField()
+        ),
+        booked_on=TruncDate('created_at'),
+    ).values_list(
+        'restaurant_id', 'date', 'minute', 'number_of_guests', 'status_code',
+        'booked_on'
+    )
+
+
+def _ordinals(days):
+    return np.array(days, dtype='datetime64[D]').astype(np.int64)
+
+
+def load_columns(*sources, chunk_size=CHUNK_SIZE):
+    """Columns of the bookings in ``sources`` as a dict of int64 arrays.
+
+    Each source is a queryset of ``Booking`` or ``ArchivedBooking`` rows.
+    ``day`` is the booking date's ordinal, ``minute`` its start time in
+    minutes after midnight, ``status`` an index into ``STATUS_CODES`` and
+    ``lead`` the number of days between making the booking and its date.
+    """
+    chunks = []
+    for bookings in sources:
+        rows = _rows(bookings).iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            restaurant, day, minute, guests, status, booked_on = zip(*chunk)
+            day = _ordinals(day)
+            chunks.append(np.array([
+                restaurant, day + EPOCH_ORDINAL, minute, guests, status,
+                day - _ordinals(booked_on),
+            ], dtype=np.int64))
+    if not chunks:
+        return {name: np.empty(0, dtype=np.int64) for name in COLUMNS}
+    return dict(zip(COLUMNS, np.concatenate(chunks, axis=1)))
+
+
+def _rate(part, whole):
+    return np.divide(
+        part, whole, out=np.zeros(len(whole)), where=whole > 0
+    )
+
+
+def _quantiles(values, group, counts, *qs):
+    """The ``qs`` quantiles (nearest lower rank) of each group's values.
+
+    ``values`` must be non-negative; one sort on a combined (group, value)
+    key puts every group's values in order next to each other.
+    """
+    width = int(values.max(initial=0)) + 1
+    ordered = np.sort(group * width + values) % width
+    starts = np.cumsum(counts) - counts
+    return [
+        ordered[starts + ((counts - 1) * q).astype(np.int64)] for q in qs
+    ]
+
+
+def analyse(columns, capacities, today):
+    """Per-restaurant figures from ``load_columns`` output.
+
+    ``capacities`` maps restaurant id to seats. Returns a list of dicts
+    with the booking count, cancellation rate (of all bookings), no-show
+    rate (of bookings not cancelled and already past ``today``), the
+    lead-time median, 90th percentile and histogram, and the occupancy
+    curve: average covers seated at each ``BOOKING_SLOT_MINUTES`` step of
+    the day, over the days the restaurant had any covers.
+    """
+    restaurant_ids, group = np.unique(
+        columns['restaurant'], return_inverse=True
+    )
+    n = len(restaurant_ids)
+    if not n:
+        return []
+    status = columns['status']
+    counts = np.bincount(group, minlength=n)
+    cancelled = status == STATUS_CODES['cancelled']
+    seated = ~cancelled
+    due = seated & (columns['day'] < today.toordinal())
+    cancellation_rate = _rate(
+        np.bincount(group, weights=cancelled, minlength=n), counts
+    )
+    no_show_rate = _rate(
+        np.bincount(
+            group, weights=due & (status == STATUS_CODES['no_show']),
+            minlength=n
+        ),
+        np.bincount(group, weights=due, minlength=n)
+    )
+
+    lead = np.maximum(columns['lead'], 0)
+    bins = np.searchsorted(LEAD_TIME_BINS, lead, side='right') - 1
+    histogram = np.bincount(
+        group * len(LEAD_TIME_BINS) + bins,
+        minlength=n * len(LEAD_TIME_BINS)
+    ).reshape(n, len(LEAD_TIME_BINS))
+    median, p90 = _quantiles(lead, group, counts, 0.5, 0.9)
+
+    # Occupancy: add each party's covers at its first slot and take them
+    # off after its last, then a running sum along the day.
+    step = settings.BOOKING_SLOT_MINUTES
+    slots = -(-24 * 60 // step)
+    seated_group = group[seated]
+    minute = columns['minute'][seated]
+    first = minute // step
+    after = np.minimum(
+        -(-(minute + settings.BOOKING_DURATION_MINUTES) // step), slots
+    )
+    width = slots + 1
+    guests = columns['guests'][seated]
+    changes = (
+        np.bincount(seated_group * width + first, weights=guests,
+                    minlength=n * width)
+        - np.bincount(seated_group * width + after, weights=guests,
+                      minlength=n * width)
+    ).reshape(n, width)
+    # Days each restaurant had covers, as unique (restaurant, day) keys.
+    day = columns['day'][seated]
+    if day.size:
+        day = day - day.min()
+    span = int(day.max(initial=0)) + 1
+    seated_days = np.unique(seated_group * span + day) // span
+    curves = np.cumsum(changes, axis=1)[:, :slots] / np.maximum(
+        np.bincount(seated_days, minlength=n), 1
+    )[:, None]
+
+    edges = LEAD_TIME_BINS + (None,)
+    results = []
+    for index, restaurant_id in enumerate(restaurant_ids.tolist()):
+        curve = curves[index]
+        busy = np.flatnonzero(curve)
+        capacity = capacities.get(restaurant_id) or 0
+        results.append({
+            'restaurant_id': restaurant_id,
+            'bookings': int(counts[index]),
+            'cancellation_rate': round(float(cancellation_rate[index]), 4),
+            'no_show_rate': round(float(no_show_rate[index]), 4),
+            'lead_time': {
+                'median_days': int(median[index]),
+                'p90_days': int(p90[index]),
+                'histogram': [
+                    {'from_days': low, 'to_days': high, 'bookings': int(count)}
+                    for low, high, count in zip(
+                        edges, edges[1:], histogram[index]
+                    )
+                ],
+            },
+            'occupancy': [
+                {
+                    'time': to_time(slot * step).strftime('%H:%M'),
+                    'covers': round(float(curve[slot]), 2),
+                    'share': round(float(curve[slot]) / capacity, 4)
+                    if capacity else None,
+                }
+                for slot in range(
+                    busy[0] if busy.size else 0,
+                    busy[-1] + 1 if busy.size else 0
+                )
+            ],
+        })
+    return results
+
+
+def booking_analytics(restaurants=None, start=None, end=None, today=None):
+    """``analyse`` over live and archived bookings, optionally filtered.
+
+    ``restaurants`` is a list of ids; ``start`` and ``end`` bound the
+    booking dates, inclusive.
+    """
+    sources = []
+    for model in (Booking, ArchivedBooking):
+        bookings = model.objects.all()
+        if restaurants:
+            bookings = bookings.filter(restaurant_id__in=restaurants)
+        if start:
+            bookings = bookings.filter(date__gte=start)
+        if end:
+            bookings = bookings.filter(date__lte=end)
+        sources.append(bookings)
+    capacities = Restaurant.objects.all()
+    if restaurants:
+        capacities = capacities.filter(pk__in=restaurants)
+    return analyse(
+        load_columns(*sources),
+        dict(capacities.values_list('pk', 'capacity')),
+        today or timezone.localdate()
+    )
@@ -0,0 +1,285 @@
+"""Versioned JSON API for bookings (``/api/v1/``).
+
+Requests are authenticated with the normal session login. List and detail
+responses carry an ETag, so polling clients that send ``If-None-Match`` get
+an empty 304 after a single aggregate query.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.validators import slug_re
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import (
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition
+
+from . import idempotency, outbox
+from .forms import BookingForm
+from .models import Booking, EditConflict, Restaurant
+from .ratelimit import rate_limit
+from .signals import bookings_created
+from .tables import lock_restaurants
+
+BOOKING_FIELDS = BookingForm.Meta.fields
+
+
+def api_login_required(view_func):
+    """Like login_required, but answers 401 instead of redirecting."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'error': 'Authentication required.'},
+                status=401
+            )
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def serialize_booking(booking):
+    return {
+        'id': booking.id,
+        'restaurant': booking.restaurant_id,
+        'table': booking.table_id,
+        'time_slot': booking.time_slot_id,
+        'date': booking.date.isoformat(),
+        'time': booking.time.strftime('%H:%M'),
+        'number_of_guests': booking.number_of_guests,
+        'special_requests': booking.special_requests or '',
+        'status': booking.status,
+        'created_at': booking.created_at.isoformat(),
+        'updated_at': booking.updated_at.isoformat(),
+    }
+
+
+def parse_json(request):
+    """Return the decoded request body, or None if it is not valid JSON."""
+    try:
+        return json.loads(request.body or b'null')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _etag(*parts):
+    return hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def booking_list_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    summary = Booking.objects.filter(user=request.user).aggregate(
+        count=Count('id'),
+        last_updated=Max('updated_at')
+    )
+    return _etag(request.user.pk, summary['count'], summary['last_updated'])
+
+
+def booking_detail_etag(request, booking_id):
+    if not request.user.is_authenticated:
+        return None
+    updated_at = Booking.objects.filter(
+        id=booking_id, user=request.user
+    ).values_list('updated_at', flat=True).first()
+    return _etag(booking_id, updated_at) if updated_at else None
+
+
+@condition(etag_func=booking_list_etag)
+def _list_bookings(request):
+    bookings = Booking.objects.filter(
+        user=request.user
+    ).order_by('-date', '-time')
+    return JsonResponse(
+        {'bookings': [serialize_booking(b) for b in bookings]}
+    )
+
+
+def _form_errors(form):
+    return {field: list(errors) for field, errors in form.errors.items()}
+
+
+def _create_bookings(request):
+    """Validate every booking in the payload, then insert them together.
+
+    The body is either one booking object or a list of them. Nothing is
+    saved unless every item is valid.
+    """
+    payload = parse_json(request)
+    many = isinstance(payload, list)
+    items = payload if many else [payload]
+    if not items or not all(isinstance(item, dict) for item in items):
+        return JsonResponse(
+            {'error': 'Expected a booking object or a list of them.'},
+            status=400
+        )
+    if len(items) > settings.API_MAX_BATCH_SIZE:
+        return JsonResponse(
+            {'error': f'At most {settings.API_MAX_BATCH_SIZE} bookings '
+                      f'can be created per request.'},
+            status=400
+        )
+
+    with transaction.atomic():
+        restaurants = Restaurant.objects.in_bulk(
+            item['restaurant'] for item in items
+            if isinstance(item.get('restaurant'), int)
+        )
+        # Large parties are seated from what is booked: no other request
+        # may pick tables here until these bookings are saved.
+        lock_restaurants(list(restaurants))
+        bookings, forms, errors, claimed = [], [], [], []
+        for index, item in enumerate(items):
+            restaurant = restaurants.get(item.get('restaurant'))
+            form = BookingForm(item, restaurant=restaurant, claimed=claimed)
+            if restaurant is None:
+                form.add_error(None, 'Unknown restaurant.')
+            if form.is_valid():
+                booking = form.save(commit=False)
+                booking.user = request.user
+                booking.restaurant = restaurant
+                booking._actor = request.user
+                bookings.append(booking)
+                forms.append(form)
+                claimed.append(
+                    (booking.date, booking.time, form.held_tables())
+                )
+            else:
+                errors.append({'index': index, 'errors': _form_errors(form)})
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+
+        Booking.objects.bulk_create(bookings)
+        for form in forms:
+            form.save_m2m()  # Joined tables of large parties
+        bookings_created(bookings)
+    data = [serialize_booking(b) for b in bookings]
+    return JsonResponse(
+        {'bookings': data} if many else data[0],
+        status=201
+    )
+
+
+@rate_limit('booking')
+@api_login_required
+def booking_list(request):
+    """GET: the user's bookings. POST: create one or many bookings.
+
+    A POST with an ``Idempotency-Key`` header is run once per key; retries
+    get the first response back.
+    """
+    if request.method == 'GET':
+        return _list_bookings(request)
+    if request.method == 'POST':
+        key = idempotency.request_key(request)
+        if key is None:
+            return _create_bookings(request)
+        try:
+            return idempotency.run_once(
+                request, key, lambda: _create_bookings(request)
+            )
+        except idempotency.KeyReused as error:
+            return JsonResponse({'error': str(error)}, status=422)
+        except idempotency.KeyTooLong as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    return HttpResponseNotAllowed(['GET', 'POST'])
+
+
+@condition(etag_func=booking_detail_etag)
+def _booking_detail(request, booking_id):
+    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    return JsonResponse(serialize_booking(booking))
+
+
+def _update_booking(request, booking):
+    payload = parse_json(request)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Expected an object.'}, status=400)
+    data = serialize_booking(booking)
+    data.update(payload)
+    form = BookingForm(
+        {field: data[field] for field in BOOKING_FIELDS},
+        instance=booking
+    )
+    if not form.is_valid():
+        return JsonResponse({'errors': _form_errors(form)}, status=400)
+    booking._actor = request.user
+    try:
+        form.save()
+    except EditConflict as conflict:
+        return _edit_conflict(booking, conflict)
+    return JsonResponse(serialize_booking(booking))
+
+
+def _edit_conflict(booking, conflict):
+    """409 with the booking as it now is, for the client to retry from."""
+    current = get_object_or_404(Booking, id=booking.id)
+    return JsonResponse(
+        {'error': str(conflict), 'booking': serialize_booking(current)},
+        status=409
+    )
+
+
+@api_login_required
+def booking_detail(request, booking_id):
+    """GET a booking, PATCH/PUT it, or DELETE to cancel it."""
+    if request.method == 'GET':
+        return _booking_detail(request, booking_id)
+    if request.method not in ('PATCH', 'PUT', 'DELETE'):
+        return HttpResponseNotAllowed(['GET', 'PATCH', 'PUT', 'DELETE'])
+    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    if request.method == 'DELETE':
+        booking.status = 'cancelled'
+        booking._actor = request.user
+        try:
+            booking.save()
+        except EditConflict as conflict:
+            return _edit_conflict(booking, conflict)
+        return JsonResponse(serialize_booking(booking))
+    return _update_booking(request, booking)
+
+
+@api_login_required
+def change_feed(request):
+    """GET booking changes after ``?after=<seq>``, for staff systems.
+
+    ``limit`` caps the batch (default ``outbox.PAGE_SIZE``); ``consumer``
+    names the reader, whose position then moves to ``after`` so that
+    ``compact_outbox`` can trim what it has read. Send ``next`` back as
+    ``after`` for the following batch.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required.'}, status=403)
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = int(request.GET.get('limit', outbox.PAGE_SIZE))
+    except ValueError:
+        return JsonResponse(
+            {'error': 'after and limit must be integers.'}, status=400
+        )
+    if after < 0 or not 1 <= limit <= outbox.MAX_PAGE_SIZE:
+        return JsonResponse(
+            {'error': f'after must not be negative and limit must be '
+                      f'between 1 and {outbox.MAX_PAGE_SIZE}.'},
+            status=400
+        )
+    consumer = request.GET.get('consumer', '')
+    if consumer and (len(consumer) > 50 or not slug_re.match(consumer)):
+        return JsonResponse(
+            {'error': 'consumer must be a slug of at most 50 characters.'},
+            status=400
+        )
+    entries, more = outbox.read_changes(after, limit, consumer or None)
+    return JsonResponse({
+        'changes': [outbox.serialize_entry(entry) for entry in entries],
+        'next': entries[-1].id if entries else after,
+        'has_more': more,
+    })
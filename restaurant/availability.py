@@ -0,0 +1,134 @@
+"""Which booking start times still have room at a restaurant.
+
+Opening periods come from the cached schedule (``restaurant.schedule``).
+The covers taken on a day, by bookings and by standing reservations not yet
+expanded into bookings, are read with two queries and cached per restaurant
+and day until a booking on that day changes. Changing a standing
+reservation can touch any future day, so it bumps a per-restaurant version
+that is part of every key instead.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import Booking, StandingReservation
+from .schedule import get_schedule, opening_periods, to_minutes, to_time
+
+AVAILABILITY_CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(restaurant_id):
+    return f'availability:version:{restaurant_id}'
+
+
+def cache_key(restaurant_id, day):
+    version = cache.get(_version_key(restaurant_id), 0)
+    return f'availability:{restaurant_id}:{version}:{day.isoformat()}'
+
+
+def booked_covers(restaurant_id, day, refresh=False):
+    """(start minute, guests) for everything holding seats on ``day``.
+
+    ``refresh`` reads them from the database and leaves the cache alone.
+    """
+    covers = None
+    if not refresh:
+        key = cache_key(restaurant_id, day)
+        covers = cache.get(key)
+        metrics.record_availability_lookup(covers is not None)
+    if covers is None:
+        bookings = Booking.objects.filter(
+            restaurant_id=restaurant_id, date=day
+        ).exclude(status='cancelled').order_by().values_list(
+            'time', 'number_of_guests'
+        )
+        standing = StandingReservation.objects.filter(
+            restaurant_id=restaurant_id
+        ).pending_on(day).only(
+            'weekday', 'time', 'number_of_guests', 'interval_weeks',
+            'start_date', 'end_date'
+        )
+        covers = tuple(
+            (to_minutes(start), guests) for start, guests in bookings
+        ) + tuple(
+            (to_minutes(reservation.time), reservation.number_of_guests)
+            for reservation in standing if reservation.occurs_on(day)
+        )
+        if not refresh:
+            cache.set(key, covers, AVAILABILITY_CACHE_TIMEOUT)
+    return covers
+
+
+def forget_availability(days):
+    """Drop cached covers for these (restaurant_id, date) pairs, on commit."""
+    days = {(restaurant_id, day) for restaurant_id, day in days if day}
+    if days:
+        transaction.on_commit(lambda: cache.delete_many([
+            cache_key(restaurant_id, day) for restaurant_id, day in days
+        ]))
+
+
+def forget_restaurant_availability(restaurant_id):
+    """Drop every cached day of a restaurant, on commit."""
+    transaction.on_commit(lambda: cache.set(
+        _version_key(restaurant_id), time.time_ns(), None
+    ))
+
+
+def _seated(covers, minute, duration):
+    return sum(
+        guests for start, guests in covers
+        if start <= minute < start + duration
+    )
+
+
+def remaining_seats(restaurant, day, refresh=False):
+    """(start time, free seats) for each bookable start time on ``day``.
+
+    A start time is bookable when the restaurant is open then and it has
+    not passed. Its free seats are what the busiest moment of the following
+    ``BOOKING_DURATION_MINUTES`` leaves of ``restaurant.capacity``.
+    ``refresh`` is passed on to ``booked_covers``.
+    """
+    periods = opening_periods(get_schedule(restaurant.id), day)
+    if not periods:
+        return []
+    covers = booked_covers(restaurant.id, day, refresh)
+    duration = settings.BOOKING_DURATION_MINUTES
+    earliest = 0
+    now = timezone.localtime()
+    if day == now.date():
+        earliest = to_minutes(now.time())
+
+    seats = []
+    for opens, closes in periods:
+        for start in range(
+            opens, closes + 1, settings.BOOKING_SLOT_MINUTES
+        ):
+            if start < earliest:
+                continue
+            # Occupancy only rises when a booking starts, so checking the
+            # window's start and each booking start inside it is enough.
+            moments = [start] + [
+                minute for minute, _ in covers
+                if start < minute < start + duration
+            ]
+            busiest = max(
+                _seated(covers, moment, duration) for moment in moments
+            )
+            seats.append(
+                (to_time(start), max(restaurant.capacity - busiest, 0))
+            )
+    return seats
+
+
+def available_times(restaurant, day, guests=1):
+    """Start times on ``day`` with room for ``guests`` more covers."""
+    return [
+        start for start, free in remaining_seats(restaurant, day)
+        if free >= guests
+    ]
@@ -0,0 +1,187 @@
+"""Live seat counts for the booking page, sent as Server-Sent Events.
+
+Every worker process runs one ``Notifier`` on its event loop. Once per
+``settings.AVAILABILITY_STREAM_POLL_SECONDS`` it reads which restaurants
+have new booking outbox entries (``restaurant.outbox``) in one query, and
+recomputes the seats of only the restaurant-days someone is watching there;
+every ``AVAILABILITY_STREAM_REFRESH_SECONDS`` it recomputes all of them, so
+start times that pass, standing reservations and a change whose outbox
+entry committed behind a later one are picked up too. The
+database work therefore grows with the restaurant-days being watched, not
+with the number of open pages.
+
+Each restaurant-day is a ``Channel`` holding its latest seats and an
+``asyncio.Event`` that is replaced on every change. A subscriber remembers
+what it last sent and, when woken, sends only the start times that moved;
+one that falls behind skips straight to the latest seats.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+
+from .availability import remaining_seats
+from .models import BookingOutbox
+
+KEEPALIVE_SECONDS = 15
+
+
+def _seats(restaurant, day, refresh=False):
+    return {
+        start.strftime('%H:%M'): free
+        for start, free in remaining_seats(restaurant, day, refresh)
+    }
+
+
+def _open(restaurant, day):
+    """The outbox position to watch from, then the day's seats."""
+    position = BookingOutbox.objects.aggregate(last=Max('id'))['last'] or 0
+    return position, _seats(restaurant, day)
+
+
+def _changed_restaurants(after):
+    """Restaurants with outbox entries after ``after``, and the new last."""
+    rows = (
+        BookingOutbox.objects.filter(id__gt=after)
+        .order_by()
+        .values('restaurant_id')
+        .annotate(last=Max('id'))
+    )
+    restaurants = {row['restaurant_id']: row['last'] for row in rows}
+    return set(restaurants), max(restaurants.values(), default=after)
+
+
+class Channel:
+    """The latest seats of one restaurant-day."""
+
+    def __init__(self, restaurant, day, seats):
+        self.restaurant = restaurant
+        self.day = day
+        self.seats = seats
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+
+    def publish(self, seats):
+        """Store ``seats`` and wake subscribers if anything moved."""
+        if seats == self.seats:
+            return
+        self.seats = seats
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class Notifier:
+    """Watches the booking outbox for the restaurant-days subscribed to."""
+
+    def __init__(self):
+        self.channels = {}
+        self.opening = {}
+        self.position = None
+        self.task = None
+
+    async def subscribe(self, restaurant, day):
+        key = (restaurant.id, day)
+        if key not in self.channels:
+            # Pages opened together share one read of the seats.
+            opening = self.opening.get(key)
+            if opening is None:
+                opening = self.opening[key] = asyncio.ensure_future(
+                    sync_to_async(_open)(restaurant, day)
+                )
+                opening.add_done_callback(
+                    lambda _: self.opening.pop(key, None)
+                )
+            position, seats = await asyncio.shield(opening)
+            if self.position is None:
+                self.position = position
+            self.channels.setdefault(key, Channel(restaurant, day, seats))
+        channel = self.channels[key]
+        channel.subscribers += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return channel
+
+    def unsubscribe(self, channel):
+        channel.subscribers -= 1
+        key = (channel.restaurant.id, channel.day)
+        if channel.subscribers or self.channels.get(key) is not channel:
+            return
+        del self.channels[key]
+        if not self.channels and self.task is not None:
+            self.task.cancel()
+            self.task = None
+            # Outbox entries written while nobody watches do not matter.
+            self.position = None
+
+    async def poll(self, refresh_all=False):
+        """Publish fresh seats for the channels whose bookings changed."""
+        restaurants, self.position = await sync_to_async(
+            _changed_restaurants
+        )(self.position or 0)
+        for channel in list(self.channels.values()):
+            if channel.restaurant.id in restaurants:
+                # Read past the cache: the writer clears it only after its
+                # commit, which is when its outbox entry becomes visible.
+                seats = await sync_to_async(_seats)(
+                    channel.restaurant, channel.day, refresh=True
+                )
+            elif refresh_all:
+                seats = await sync_to_async(_seats)(
+                    channel.restaurant, channel.day
+                )
+            else:
+                continue
+            channel.publish(seats)
+
+    async def run(self):
+        interval = settings.AVAILABILITY_STREAM_POLL_SECONDS
+        every = max(
+            round(settings.AVAILABILITY_STREAM_REFRESH_SECONDS / interval), 1
+        )
+        ticks = 0
+        while True:
+            await asyncio.sleep(interval)
+            ticks += 1
+            await self.poll(refresh_all=ticks % every == 0)
+
+
+notifier = Notifier()
+
+
+def message(event, data):
+    """One Server-Sent Events message."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def delta(old, new):
+    """Start times whose seats differ; ones no longer offered get 0."""
+    changes = {start: free for start, free in new.items()
+               if old.get(start) != free}
+    changes.update({start: 0 for start in old if start not in new})
+    return changes
+
+
+async def events(restaurant, day, source=None):
+    """A ``snapshot`` of the day's seats, then a ``delta`` per change."""
+    source = source or notifier
+    channel = await source.subscribe(restaurant, day)
+    try:
+        seats, changed = channel.seats, channel.changed
+        yield message('snapshot', {'date': day.isoformat(), 'seats': seats})
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            latest, changed = channel.seats, channel.changed
+            changes = delta(seats, latest)
+            seats = latest
+            if changes:
+                yield message(
+                    'delta', {'date': day.isoformat(), 'seats': changes}
+                )
+    finally:
+        source.unsubscribe(channel)
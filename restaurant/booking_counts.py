@@ -0,0 +1,85 @@
+"""Incremental maintenance of ``UserBookingCounts``.
+
+Every booking falls in one bucket: cancelled, upcoming (dated today or
+later) or past. ``apply_changes`` takes the same ``(before, after)`` pairs
+as ``stats.apply_changes`` and moves the affected users' counts between
+buckets with one UPDATE per user. Counts last recounted on an earlier day
+are left alone: ``get_counts`` recounts them on their next read.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Booking, UserBookingCounts
+
+FIELDS = ('upcoming_count', 'past_count', 'cancelled_count')
+
+
+def bucket(values, today):
+    """The count field a booking with these field values belongs to."""
+    if values['status'] == 'cancelled':
+        return 'cancelled_count'
+    if values['date'] >= today:
+        return 'upcoming_count'
+    return 'past_count'
+
+
+def apply_changes(changes, today=None):
+    """Update the counts of the users whose bookings changed."""
+    today = today or timezone.localdate()
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        if before is not None:
+            deltas[before['user_id']][bucket(before, today)] -= 1
+        if after is not None:
+            deltas[after['user_id']][bucket(after, today)] += 1
+    for user_id, delta in sorted(deltas.items()):
+        delta = {field: value for field, value in delta.items() if value}
+        if delta:
+            UserBookingCounts.objects.filter(
+                user_id=user_id, counted_on=today
+            ).update(**{
+                field: F(field) + value for field, value in delta.items()
+            })
+
+
+def recount(user_id, today, row=None):
+    """Count a user's bookings from scratch and store the result.
+
+    ``row`` is the user's stored counts, if they have any.
+    """
+    not_cancelled = ~Q(status='cancelled')
+    counts = Booking.objects.filter(user_id=user_id).aggregate(
+        upcoming_count=Count('id', filter=not_cancelled & Q(date__gte=today)),
+        past_count=Count('id', filter=not_cancelled & Q(date__lt=today)),
+        cancelled_count=Count('id', filter=Q(status='cancelled')),
+    )
+    if row is None:
+        row = UserBookingCounts(user_id=user_id)
+    for field, value in dict(counts, counted_on=today).items():
+        setattr(row, field, value)
+    if row._state.adding:
+        # Another request may have stored the counts first; theirs are as
+        # good as these.
+        UserBookingCounts.objects.bulk_create([row], ignore_conflicts=True)
+        row._state.adding = False
+    else:
+        row.save()
+    return row
+
+
+def get_counts(user_id):
+    """Today's counts for a user: one primary key lookup when current."""
+    today = timezone.localdate()
+    row = UserBookingCounts.objects.filter(user_id=user_id).first()
+    if row is None or row.counted_on != today:
+        row = recount(user_id, today, row)
+    return row
+
+
+def forget_counts(user_ids):
+    """Make these users' counts be recounted on their next read."""
+    UserBookingCounts.objects.filter(user_id__in=user_ids).update(
+        counted_on=None
+    )
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .booking_counts import get_counts
+
+
+def booking_counts(request):
+    """The signed-in user's booking counts, read only if a template does."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'booking_counts': SimpleLazyObject(lambda: get_counts(user.pk))}
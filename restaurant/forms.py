@@ -1,7 +1,12 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Booking, MenuItem, Contact
+from .models import Booking, MenuCategory, MenuItem, Contact, Table
+from django.conf import settings
+from django.db import transaction
+from . import schedule
+from .menu import MENU_FIELDS, read_cursor, read_menu_file
+from .tables import combination_for
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
@@ -26,8 +31,42 @@ class UserRegistrationForm(UserCreationForm):
         fields = ['username', 'email', 'password1', 'password2']
 
 
-class BookingForm(forms.ModelForm):
-    """Model form for creating/editing bookings."""
+class VersionedModelForm(forms.ModelForm):
+    """Model form that posts back the version of the row it was shown.
+
+    Saving then fails with ``EditConflict`` if the row moved on in the
+    meantime (see ``models.VersionedModel``); the view reports that on the
+    form. Posts without a version are checked against the version loaded
+    with the instance.
+    """
+    version = forms.IntegerField(
+        required=False, min_value=1, widget=forms.HiddenInput
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial.setdefault('version', self.instance.version)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('version') is not None:
+            self.instance.version = cleaned_data['version']
+        return cleaned_data
+
+    def save(self, commit=True):
+        # Anything saved along with the row is undone by a conflict.
+        with transaction.atomic():
+            return super().save(commit)
+
+
+class BookingForm(VersionedModelForm):
+    """Model form for creating/editing bookings.
+
+    Parties larger than ``MAX_TABLE_GUESTS`` are only accepted for a known
+    restaurant, seated on a combination of joinable tables.
+    """
+    MAX_TABLE_GUESTS = 8
+
     class Meta:
         model = Booking
         fields = [
@@ -40,15 +79,12 @@ class BookingForm(forms.ModelForm):
                 attrs={
                     'type': 'date',
                     'class': 'form-control',
-                    'min': timezone.now().date().isoformat(),
                 }
             ),
             'time': forms.TimeInput(
                 attrs={
                     'type': 'time',
                     'class': 'form-control',
-                    'min': '09:00',
-                    'max': '22:00',
                 }
             ),
             'number_of_guests': forms.NumberInput(
@@ -72,14 +108,49 @@ class BookingForm(forms.ModelForm):
             ),
         }
 
+    def __init__(self, *args, restaurant=None, claimed=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # Tables held by earlier, not yet saved bookings of the same batch.
+        self.claimed = claimed
+        # Opening hours are checked against the restaurant's cached
+        # schedule; unsaved forms without a restaurant use the defaults.
+        restaurant_id = restaurant.pk if restaurant else (
+            self.instance.restaurant_id
+        )
+        self.restaurant_id = restaurant_id
+        self.joined_tables = None
+        self.schedule = (
+            schedule.get_schedule(restaurant_id) if restaurant_id
+            else schedule.DEFAULT_SCHEDULE
+        )
+        self.fields['date'].widget.attrs['min'] = (
+            timezone.now().date().isoformat()
+        )
+        self.fields['number_of_guests'].widget.attrs['max'] = str(
+            self.max_guests()
+        )
+        opens, closes = schedule.time_bounds(self.schedule)
+        if opens is not None:
+            self.fields['time'].widget.attrs.update({
+                'min': opens.strftime('%H:%M'),
+                'max': closes.strftime('%H:%M'),
+            })
+
+    def max_guests(self):
+        if self.restaurant_id:
+            return settings.LARGE_PARTY_MAX_GUESTS
+        return self.MAX_TABLE_GUESTS
+
     def clean_number_of_guests(self):
         guests = self.cleaned_data.get('number_of_guests')
         if guests is None:
             raise forms.ValidationError("Please specify the number of guests.")
         if guests < 1:
             raise forms.ValidationError("Number of guests must be at least 1.")
-        if guests > 8:
-            raise forms.ValidationError("Number of guests cannot exceed 8.")
+        if guests > self.max_guests():
+            raise forms.ValidationError(
+                f"Number of guests cannot exceed {self.max_guests()}."
+            )
         return guests
 
     def clean_date(self):
@@ -90,28 +161,44 @@ class BookingForm(forms.ModelForm):
             raise forms.ValidationError(
                 "You cannot book a table for a past date."
             )
+        if not schedule.opening_periods(self.schedule, date):
+            raise forms.ValidationError(
+                "The restaurant is closed on that date."
+            )
         return date
 
     def clean_time(self):
         time = self.cleaned_data.get('time')
         if time is None:
             raise forms.ValidationError("Please select a time.")
-        opening_time = timezone.now().replace(hour=9, minute=0).time()
-        closing_time = timezone.now().replace(hour=22, minute=0).time()
-        if time < opening_time:
-            raise forms.ValidationError(
-                "Booking time must be after 09:00."
-            )
-        if time > closing_time:
+        date = self.cleaned_data.get('date')
+        if date is None:
+            # No valid date to look up: use the week's widest hours.
+            opens, closes = schedule.time_bounds(self.schedule)
+            periods = [(
+                schedule.to_minutes(opens), schedule.to_minutes(closes)
+            )] if opens is not None else []
+        else:
+            periods = schedule.opening_periods(self.schedule, date)
+        minutes = schedule.to_minutes(time)
+        # Days with no periods at all are reported on the date field.
+        if periods and not any(
+            opens <= minutes <= closes for opens, closes in periods
+        ):
             raise forms.ValidationError(
-                "Booking time must be before 22:00."
+                f"Booking time must be between "
+                f"{schedule.describe(periods)}."
             )
         return time
 
     def clean_table(self):
         table = self.cleaned_data.get('table')
         num_guests = self.cleaned_data.get('number_of_guests')
-        if table and num_guests and num_guests > table.capacity:
+        if (
+            table and num_guests
+            and num_guests <= self.MAX_TABLE_GUESTS
+            and num_guests > table.capacity
+        ):
             raise ValidationError(
                 'Number of guests exceeds table capacity. '
                 'Please select a larger table.'
@@ -126,12 +213,60 @@ class BookingForm(forms.ModelForm):
             )
         return special_requests
 
+    def clean(self):
+        cleaned_data = super().clean()
+        guests = cleaned_data.get('number_of_guests')
+        day, start = cleaned_data.get('date'), cleaned_data.get('time')
+        if guests and guests > self.MAX_TABLE_GUESTS and day and start:
+            table_ids = combination_for(
+                self.restaurant_id, day, start, guests,
+                exclude=self.instance.pk, claimed=self.claimed
+            )
+            if table_ids is None:
+                raise ValidationError(
+                    f"We cannot seat a party of {guests} at that time. "
+                    f"Please try another time."
+                )
+            tables = Table.objects.in_bulk(table_ids)
+            cleaned_data['table'] = tables[table_ids[0]]
+            self.joined_tables = [tables[pk] for pk in table_ids[1:]]
+        elif self.instance.pk:
+            self.joined_tables = []
+        return cleaned_data
+
+    def held_tables(self):
+        """Ids of the tables the cleaned booking will sit at."""
+        table = self.cleaned_data.get('table')
+        joined = [joined.pk for joined in self.joined_tables or []]
+        return [table.pk] + joined if table else joined
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        if self.joined_tables is not None:
+            self.instance.joined_tables.set(self.joined_tables)
+
+
+class MenuItemForm(VersionedModelForm):
+    """Model form for creating/editing menu items.
+
+    The category is typed by name; a name the restaurant has no category
+    for yet creates one when the form is saved.
+    """
+    category = forms.CharField(
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(
+            attrs={
+                'class': 'form-control',
+                'maxlength': '100',
+            }
+        ),
+        help_text='An existing category of this restaurant, or a new one.'
+    )
 
-class MenuItemForm(forms.ModelForm):
-    """Model form for creating/editing menu items."""
     class Meta:
         model = MenuItem
-        fields = ['name', 'description', 'price']
+        fields = ['name', 'description', 'price', 'category', 'position']
         widgets = {
             'name': forms.TextInput(
                 attrs={
@@ -153,8 +288,25 @@ class MenuItemForm(forms.ModelForm):
                     'step': '0.01',
                 }
             ),
+            'position': forms.NumberInput(
+                attrs={
+                    'class': 'form-control',
+                    'min': '0',
+                }
+            ),
         }
 
+    def __init__(self, *args, restaurant=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if restaurant is not None:
+            self.instance.restaurant = restaurant
+        if 'category' not in self._meta.fields:
+            del self.fields['category']
+        elif self.instance.category_id:
+            self.initial['category'] = self.instance.category.name
+        if 'position' in self.fields:
+            self.fields['position'].required = False
+
     def clean_name(self):
         name = self.cleaned_data.get('name')
         if not name:
@@ -183,6 +335,196 @@ class MenuItemForm(forms.ModelForm):
             raise forms.ValidationError("Price must be greater than 0.")
         return price
 
+    def clean_category(self):
+        name = self.cleaned_data.get('category', '').strip()
+        if not name:
+            return None
+        restaurant_id = self.instance.restaurant_id
+        return MenuCategory.objects.filter(
+            restaurant_id=restaurant_id, name=name
+        ).first() or MenuCategory(restaurant_id=restaurant_id, name=name)
+
+    def clean_position(self):
+        position = self.cleaned_data.get('position')
+        return self.instance.position if position is None else position
+
+    def save(self, commit=True):
+        with transaction.atomic():
+            # self.errors runs the validation that picks the category.
+            if commit and not self.errors:
+                category = self.instance.category
+                if category is not None and category.pk is None:
+                    category.save()
+            return super().save(commit)
+
+
+# The many-item forms below leave the category out: each form would look
+# its category up separately.
+MenuItemFormSet = forms.modelformset_factory(
+    MenuItem, form=MenuItemForm, extra=0,
+    fields=['name', 'description', 'price', 'position']
+)
+MenuItemRowForm = forms.modelform_factory(
+    MenuItem, form=MenuItemForm,
+    fields=['name', 'description', 'price', 'position']
+)
+
+
+class MenuImportForm(forms.Form):
+    """Upload of a CSV or JSON menu for one restaurant.
+
+    Rows are matched to the restaurant's existing items by name: matches
+    are updated, the rest added. A ``category`` column names the item's
+    category, which is created if the restaurant has none by that name.
+    Every row is validated before anything is saved; ``new_items``,
+    ``changed_items`` and ``new_categories`` then hold the unsaved rows.
+    """
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(
+            attrs={'class': 'form-control', 'accept': '.csv,.json'}
+        ),
+        help_text='CSV with a name,description,price header and optional '
+                  'category and position columns, or a JSON list of '
+                  'objects with those keys.'
+    )
+
+    def __init__(self, *args, restaurant=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.restaurant = restaurant
+        self.new_items = []
+        self.changed_items = []
+        self.new_categories = []
+
+    def clean_file(self):
+        try:
+            return read_menu_file(self.cleaned_data['file'])
+        except ValueError as error:
+            raise forms.ValidationError(str(error))
+
+    def category_named(self, name, categories):
+        """The category called ``name``, adding an unsaved one if new."""
+        if name not in categories:
+            categories[name] = MenuCategory(
+                restaurant=self.restaurant, name=name,
+                position=len(categories)
+            )
+            self.new_categories.append(categories[name])
+        return categories[name]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        rows = cleaned_data.get('file')
+        if not rows:
+            return cleaned_data
+        existing = {}
+        for item in MenuItem.objects.filter(
+            restaurant=self.restaurant
+        ).select_related('category'):
+            existing.setdefault(item.name, item)
+        categories = {
+            category.name: category
+            for category in self.restaurant.menu_categories.all()
+        }
+        seen = set()
+        errors = []
+        for number, row in enumerate(rows, start=1):
+            name = str(row.get('name') or '').strip()
+            if name in seen:
+                errors.append(f'Row {number}: "{name}" appears twice.')
+                continue
+            seen.add(name)
+            item = existing.get(name) or MenuItem(restaurant=self.restaurant)
+            before = [getattr(item, field) for field in MENU_FIELDS]
+            data = {
+                field: row.get(field) for field in MENU_FIELDS
+                if field in row and field != 'category'
+            }
+            data['name'] = name
+            form = MenuItemRowForm(data, instance=item)
+            valid = form.is_valid()
+            if not valid:
+                errors.extend(
+                    f'Row {number}: {form.fields[field].label}: {message}'
+                    if field in form.fields else f'Row {number}: {message}'
+                    for field, messages in form.errors.items()
+                    for message in messages
+                )
+            category = str(row.get('category') or '').strip()
+            if len(category) > 100:
+                valid = False
+                errors.append(
+                    f'Row {number}: Category names cannot exceed 100 '
+                    f'characters.'
+                )
+            if not valid:
+                continue
+            if 'category' in row:
+                item.category = (
+                    self.category_named(category, categories)
+                    if category else None
+                )
+            if item.pk is None:
+                self.new_items.append(item)
+            elif before != [getattr(item, field) for field in MENU_FIELDS]:
+                self.changed_items.append(item)
+        if errors:
+            self.new_items, self.changed_items = [], []
+            self.new_categories = []
+            raise forms.ValidationError(errors)
+        return cleaned_data
+
+
+class MenuSearchForm(forms.Form):
+    """Text and price filters for searching menus across restaurants."""
+    q = forms.CharField(
+        required=False,
+        max_length=100,
+        label='Dish',
+        widget=forms.TextInput(
+            attrs={'class': 'form-control', 'placeholder': 'e.g. risotto'}
+        )
+    )
+    min_price = forms.DecimalField(
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        widget=forms.NumberInput(
+            attrs={'class': 'form-control', 'min': '0', 'step': '0.01'}
+        )
+    )
+    max_price = forms.DecimalField(
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        widget=forms.NumberInput(
+            attrs={'class': 'form-control', 'min': '0', 'step': '0.01'}
+        )
+    )
+    after = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def clean_q(self):
+        return self.cleaned_data.get('q', '').strip()
+
+    def clean_after(self):
+        after = self.cleaned_data.get('after')
+        if not after:
+            return None
+        try:
+            return read_cursor(after)
+        except ValueError:
+            raise forms.ValidationError('Invalid page.')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        min_price = cleaned_data.get('min_price')
+        max_price = cleaned_data.get('max_price')
+        if (min_price is not None and max_price is not None
+                and min_price > max_price):
+            raise forms.ValidationError(
+                'The minimum price cannot be above the maximum price.'
+            )
+        return cleaned_data
+
 
 class ContactForm(forms.ModelForm):
     """Model form for contact submissions."""
@@ -251,3 +593,10 @@ class ContactForm(forms.ModelForm):
                 'Message cannot exceed 1000 characters.'
             )
         return message
+
+    def save(self, commit=True):
+        """Save the message, merging it into a recent identical one."""
+        contact = super().save(commit=False)
+        if commit:
+            Contact.objects.save_or_merge(contact)
+        return contact
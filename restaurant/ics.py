@@ -0,0 +1,165 @@
+"""iCalendar feeds of bookings, one per user and one per restaurant.
+
+Calendar clients poll without a session, so feed URLs carry a signed token
+instead. Each feed body is serialised once and kept in the cache until a
+booking that appears in it changes, so a poll is a signature check and a
+single cache read.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking
+
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+# Past bookings older than this are left out of the feeds.
+FEED_HISTORY = timedelta(days=30)
+
+STATUS_MAP = {
+    'pending': 'TENTATIVE',
+    'confirmed': 'CONFIRMED',
+    'cancelled': 'CANCELLED',
+    'no_show': 'CONFIRMED',
+}
+
+signer = signing.Signer(salt='restaurant.ics')
+
+
+def feed_token(kind, pk):
+    """Token for the ``kind`` ('user' or 'restaurant') feed of ``pk``."""
+    return signer.sign(f'{kind}-{pk}')
+
+
+def read_token(kind, token):
+    """Return the primary key a token was issued for, or None."""
+    try:
+        value = signer.unsign(token)
+    except signing.BadSignature:
+        return None
+    prefix = f'{kind}-'
+    if not value.startswith(prefix) or not value[len(prefix):].isdigit():
+        return None
+    return int(value[len(prefix):])
+
+
+def cache_key(kind, pk):
+    return f'ics:{kind}:{pk}'
+
+
+def escape(text):
+    return (
+        text.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    parts, current, size, limit = [], '', 0, 75
+    for char in line:
+        width = len(char.encode())
+        if size + width > limit:
+            parts.append(current)
+            # Continuation lines start with a space, which counts.
+            current, size, limit = '', 0, 74
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def booking_event(booking, summary):
+    start = timezone.make_aware(datetime.combine(booking.date, booking.time))
+    end = start + timedelta(minutes=settings.BOOKING_DURATION_MINUTES)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:booking-{booking.id}@restaurant-booking',
+        f'DTSTAMP:{format_utc(booking.updated_at)}',
+        f'DTSTART:{format_utc(start)}',
+        f'DTEND:{format_utc(end)}',
+        f'SUMMARY:{escape(summary)}',
+        f'LOCATION:{escape(booking.restaurant.address)}',
+        f'STATUS:{STATUS_MAP.get(booking.status, "TENTATIVE")}',
+    ]
+    if booking.special_requests:
+        lines.append(f'DESCRIPTION:{escape(booking.special_requests)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_calendar(name, events):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Restaurant Booking//Bookings//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape(name)}',
+    ]
+    for event in events:
+        lines.extend(event)
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold(line) for line in lines) + '\r\n'
+
+
+def _recent(bookings):
+    return bookings.filter(
+        date__gte=timezone.now().date() - FEED_HISTORY
+    ).select_related('restaurant', 'user').order_by('date', 'time')
+
+
+def build_user_feed(user_id):
+    bookings = _recent(Booking.objects.filter(user_id=user_id))
+    return render_calendar('My restaurant bookings', [
+        booking_event(booking, f'Table at {booking.restaurant.name}')
+        for booking in bookings
+    ])
+
+
+def build_restaurant_feed(restaurant_id):
+    bookings = _recent(Booking.objects.filter(restaurant_id=restaurant_id))
+    events = [
+        booking_event(
+            booking,
+            f'{booking.user.username} - {booking.number_of_guests} guests'
+        )
+        for booking in bookings
+    ]
+    name = bookings[0].restaurant.name if events else 'Bookings'
+    return render_calendar(f'{name} bookings', events)
+
+
+BUILDERS = {
+    'user': build_user_feed,
+    'restaurant': build_restaurant_feed,
+}
+
+
+def get_feed(kind, pk):
+    """Return the serialised feed, building it only on a cache miss."""
+    key = cache_key(kind, pk)
+    body = cache.get(key)
+    if body is None:
+        body = BUILDERS[kind](pk)
+        cache.set(key, body, FEED_CACHE_TIMEOUT)
+    return body
+
+
+def forget_feeds(bookings):
+    """Drop the cached feeds that show any of ``bookings``, on commit."""
+    keys = set()
+    for booking in bookings:
+        keys.add(cache_key('user', booking.user_id))
+        keys.add(cache_key('restaurant', booking.restaurant_id))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
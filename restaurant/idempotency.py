@@ -0,0 +1,139 @@
+"""Idempotency keys for booking POSTs.
+
+A client sends a key with a POST: the booking form renders a fresh one
+into a hidden field, API clients send an ``Idempotency-Key`` header. The
+first request with a key claims it by inserting an ``IdempotencyKey`` row
+in the same transaction as its work and stores the response it got. A
+retry with the same key gets that response back, marked with an
+``Idempotent-Replayed`` header, without running again. A retry racing the
+first request waits on the row's unique index until the first commits.
+
+Only responses that created something or redirected (status 201-399)
+are stored. A form shown again with its errors (200) or an error response
+gives the key back, so the corrected request can be sent with it again.
+"""
+import hashlib
+import uuid
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+# Response headers stored with the response and sent again on a replay.
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+FORM_CONTENT_TYPES = (
+    'application/x-www-form-urlencoded', 'multipart/form-data',
+)
+
+
+class KeyReused(Exception):
+    """The key was already used for a different request."""
+
+
+class KeyTooLong(Exception):
+    """The key is longer than can be stored."""
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    """The key sent with ``request``, or None if there is none."""
+    key = (
+        request.headers.get(HEADER) or request.POST.get(FORM_FIELD) or ''
+    ).strip()
+    return key or None
+
+
+def fingerprint(request):
+    """Hash of the request's path and content, to spot reused keys."""
+    if request.content_type in FORM_CONTENT_TYPES:
+        # The body of a parsed multipart form can no longer be read.
+        content = urlencode(sorted(
+            (name, values) for name, values in request.POST.lists()
+            if name != 'csrfmiddlewaretoken'
+        ), doseq=True).encode()
+    else:
+        content = request.body
+    return hashlib.sha256(request.path.encode() + b'\n' + content).hexdigest()
+
+
+def _replay(stored):
+    headers = dict(stored.response_headers)
+    if 'Location' in headers:
+        response = HttpResponseRedirect(headers.pop('Location'))
+        response.status_code = stored.response_status
+    else:
+        response = HttpResponse(
+            stored.response_body, status=stored.response_status
+        )
+    for name, value in headers.items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def run_once(request, key, view_func):
+    """Return ``view_func()``'s response, running it once per key.
+
+    Raises ``KeyReused`` if the user already sent the key with a different
+    request; ``KeyTooLong`` before running anything if the key is too long.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise KeyTooLong(
+            f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'
+        )
+    now = timezone.now()
+    request_hash = fingerprint(request)
+    with transaction.atomic():
+        IdempotencyKey.objects.filter(
+            user=request.user, key=key, expires_at__lte=now
+        ).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    fingerprint=request_hash,
+                    expires_at=now + timedelta(
+                        seconds=settings.IDEMPOTENCY_KEY_TTL
+                    )
+                )
+        except IntegrityError:
+            stored = IdempotencyKey.objects.get(user=request.user, key=key)
+            if stored.fingerprint != request_hash:
+                raise KeyReused(
+                    'This key was already used for a different request.'
+                )
+            return _replay(stored)
+        response = view_func()
+        if not 201 <= response.status_code < 400:
+            record.delete()
+            return response
+        record.response_status = response.status_code
+        record.response_headers = {
+            name: response[name] for name in REPLAYED_HEADERS
+            if response.has_header(name)
+        }
+        record.response_body = response.content.decode(response.charset)
+        record.save(update_fields=[
+            'response_status', 'response_headers', 'response_body'
+        ])
+    return response
+
+
+def purge_expired(now=None):
+    """Delete expired keys; return how many were deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(
+        expires_at__lte=now or timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,104 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from restaurant.booking_counts import forget_counts
+from restaurant.models import ArchivedBooking, Booking, BookingReminder
+
+ARCHIVED_FIELDS = (
+    'id', 'user_id', 'restaurant_id', 'table_id', 'time_slot_id', 'date',
+    'time', 'number_of_guests', 'special_requests', 'status', 'created_at',
+    'updated_at',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move bookings dated before a cutoff into the archive table, one "
+        "short transaction per chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before', type=date.fromisoformat,
+            help='Archive bookings dated before this day (YYYY-MM-DD). '
+                 'Defaults to BOOKING_ARCHIVE_AFTER_DAYS days ago.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Bookings moved per transaction.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to sleep between chunks.'
+        )
+
+    def move_chunk(self, cutoff, chunk_size):
+        """Archive up to ``chunk_size`` bookings; return how many moved."""
+        with transaction.atomic():
+            ids = list(
+                Booking.objects.filter(date__lt=cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                return 0
+            rows = list(
+                Booking.objects.filter(id__in=ids).values(*ARCHIVED_FIELDS)
+            )
+            joined = Booking.joined_tables.through.objects.filter(
+                booking_id__in=ids
+            )
+            joined_table_ids = {}
+            pairs = joined.order_by('table_id').values_list(
+                'booking_id', 'table_id'
+            )
+            for booking_id, table_id in pairs:
+                joined_table_ids.setdefault(booking_id, []).append(table_id)
+            ArchivedBooking.objects.bulk_create(
+                [
+                    ArchivedBooking(
+                        joined_table_ids=joined_table_ids.get(row['id'], []),
+                        **row
+                    )
+                    for row in rows
+                ],
+                ignore_conflicts=True
+            )
+            # A plain DELETE: archiving is not a cancellation, so the
+            # signal bookkeeping (stats, event log) must not run. Rows
+            # pointing at the bookings have to go first.
+            BookingReminder.objects.filter(booking_id__in=ids).delete()
+            joined.delete()
+            Booking.objects.filter(id__in=ids)._raw_delete(Booking.objects.db)
+            # The per-user counts only cover live bookings.
+            forget_counts({row['user_id'] for row in rows})
+        return len(ids)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        cutoff = options['before'] or (
+            timezone.localdate()
+            - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+        )
+        if cutoff > timezone.localdate():
+            raise CommandError('--before must not be in the future.')
+
+        total = 0
+        while True:
+            moved = self.move_chunk(cutoff, chunk_size)
+            total += moved
+            if moved < chunk_size:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} booking(s) dated before {cutoff}.'
+        ))
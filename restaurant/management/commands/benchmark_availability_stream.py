@@ -0,0 +1,130 @@
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurant.availability_stream import Notifier, events
+from restaurant.models import Booking, Restaurant
+
+
+def _book(restaurant, day, start, guests):
+    user = User.objects.create_user(username='availability-benchmark')
+    return Booking.objects.create(
+        user=user,
+        restaurant=restaurant,
+        date=day,
+        time=datetime.strptime(start, '%H:%M').time(),
+        number_of_guests=guests,
+        status='confirmed'
+    )
+
+
+async def _receive(stream):
+    await anext(stream)
+    return time.perf_counter()
+
+
+async def _measure(restaurant, day, subscribers, queries):
+    # ``connection`` is per thread: count where the queries are run.
+    count = sync_to_async(len)
+    notifier = Notifier()
+    streams = [
+        events(restaurant, day, source=notifier) for _ in range(subscribers)
+    ]
+    waiting = []
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(anext(stream) for stream in streams))
+        subscribe_seconds = time.perf_counter() - started
+        subscribe_queries = await count(queries)
+        # The change is polled for by hand, so timing starts at the write.
+        notifier.task.cancel()
+
+        seats = notifier.channels[(restaurant.id, day)].seats
+        start = next((start for start, free in seats.items() if free), None)
+        if start is None:
+            raise CommandError(f'No free seats at {restaurant} on {day}.')
+        waiting = [
+            asyncio.create_task(_receive(stream)) for stream in streams
+        ]
+        await sync_to_async(_book)(
+            restaurant, day, start, min(seats[start], 2)
+        )
+        before = await count(queries)
+        changed = time.perf_counter()
+        await notifier.poll()
+        poll_queries = await count(queries) - before
+        received = await asyncio.gather(*waiting)
+    finally:
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        for stream in streams:
+            await stream.aclose()
+    latencies = sorted(moment - changed for moment in received)
+    return {
+        'subscribe_seconds': subscribe_seconds,
+        'subscribe_queries': subscribe_queries,
+        'poll_queries': poll_queries,
+        'median_ms': statistics.median(latencies) * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many availability streams in this process, make one booking "
+        "and time how long the change takes to reach all of them. The "
+        "booking is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subscribers', type=int, default=1000,
+            help='Streams to open on the same restaurant-day.'
+        )
+        parser.add_argument(
+            '--restaurant', type=int,
+            help='Restaurant id; defaults to the first restaurant.'
+        )
+        parser.add_argument(
+            '--date', type=date.fromisoformat,
+            help='Day to watch (YYYY-MM-DD); defaults to tomorrow.'
+        )
+
+    def handle(self, *args, **options):
+        subscribers = options['subscribers']
+        if subscribers < 1:
+            raise CommandError('--subscribers must be at least 1.')
+        restaurants = Restaurant.objects.order_by('id')
+        if options['restaurant']:
+            restaurants = restaurants.filter(id=options['restaurant'])
+        restaurant = restaurants.first()
+        if restaurant is None:
+            raise CommandError('No such restaurant.')
+        day = options['date'] or timezone.localdate() + timedelta(days=1)
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                result = async_to_sync(_measure)(
+                    restaurant, day, subscribers, queries
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Subscribed {subscribers} stream(s) in "
+            f"{result['subscribe_seconds']:.2f}s with "
+            f"{result['subscribe_queries']} queries."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"One booking reached {subscribers} stream(s) in "
+            f"{result['max_ms']:.1f} ms (median {result['median_ms']:.1f} ms) "
+            f"with {result['poll_queries']} queries."
+        ))
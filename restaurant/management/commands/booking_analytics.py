@@ -0,0 +1,47 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.analytics import booking_analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Write occupancy curves, lead times, cancellation and no-show rates "
+        "per restaurant as JSON, computed over live and archived bookings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help='Only report on this restaurant (may be repeated).'
+        )
+        parser.add_argument(
+            '--start', type=date.fromisoformat,
+            help='First booking date to include (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--end', type=date.fromisoformat,
+            help='Last booking date to include (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write to this file instead of standard output.'
+        )
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end.')
+        results = booking_analytics(options['restaurants'], start, end)
+        report = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote analytics for {len(results)} restaurant(s) to '
+                f'{options["output"]}.'
+            ))
+        else:
+            self.stdout.write(report)
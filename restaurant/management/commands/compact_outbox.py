@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.outbox import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete booking change-feed entries every consumer has read, and "
+        "entries older than CHANGE_FEED_RETENTION_DAYS."
+    )
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} change-feed entries.'
+        ))
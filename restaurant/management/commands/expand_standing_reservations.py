@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.standing import expand_standing_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Create bookings for standing reservation occurrences within the "
+        "rolling horizon. Run daily; occurrences already booked are "
+        "skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            default=settings.STANDING_RESERVATION_HORIZON_DAYS,
+            help='How many days ahead to create bookings for.'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        created = expand_standing_reservations(options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} booking(s) from standing reservations.'
+        ))
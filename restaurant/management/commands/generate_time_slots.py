@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from restaurant.models import Restaurant
+from restaurant.timeslots import generate_time_slots, parse_weekdays
+
+
+def parse_time(value):
+    return datetime.strptime(value, '%H:%M').time()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create recurring time slots for restaurants. Safe to re-run: "
+        "existing slots are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help='Only this restaurant (may be repeated). Defaults to all.'
+        )
+        parser.add_argument(
+            '--every', type=int, default=30,
+            help='Minutes between slot starts.'
+        )
+        parser.add_argument(
+            '--length', type=int,
+            help='Slot length in minutes. Defaults to --every.'
+        )
+        parser.add_argument(
+            '--weekdays', default='all',
+            help="'all', 'weekdays', 'weekends' or e.g. 'mon,wed,fri'."
+        )
+        parser.add_argument(
+            '--start', type=parse_time,
+            help='First slot start (HH:MM) instead of opening hours.'
+        )
+        parser.add_argument(
+            '--end', type=parse_time,
+            help='Last slot end (HH:MM) instead of opening hours.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            weekdays = parse_weekdays(options['weekdays'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if (options['start'] is None) != (options['end'] is None):
+            raise CommandError('--start and --end must be given together.')
+        if options['every'] < 1 or (options['length'] or 1) < 1:
+            raise CommandError('--every and --length must be positive.')
+
+        restaurants = Restaurant.objects.all()
+        if options['restaurants']:
+            restaurants = restaurants.filter(id__in=options['restaurants'])
+        with transaction.atomic():
+            created = generate_time_slots(
+                restaurants,
+                every=options['every'],
+                length=options['length'],
+                weekdays=weekdays,
+                start=options['start'],
+                end=options['end'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} time slot(s) for '
+            f'{restaurants.count()} restaurant(s).'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys older than IDEMPOTENCY_KEY_TTL seconds."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired idempotency key(s).'
+        ))
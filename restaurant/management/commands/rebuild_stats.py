@@ -0,0 +1,68 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from restaurant.models import (
+    ArchivedBooking, Booking, DailyBookingStats, Restaurant
+)
+from restaurant.reports import forget_reports
+from restaurant.stats import compute_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute DailyBookingStats from the live and archived bookings, "
+        "one restaurant per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help='Only rebuild this restaurant (may be repeated).'
+        )
+        parser.add_argument(
+            '--start', type=date.fromisoformat,
+            help='First date to rebuild (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--end', type=date.fromisoformat,
+            help='Last date to rebuild (YYYY-MM-DD).'
+        )
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end.')
+        restaurant_ids = options['restaurants'] or list(
+            Restaurant.objects.values_list('id', flat=True)
+        )
+        total = 0
+        for restaurant_id in restaurant_ids:
+            bookings = Booking.objects.filter(restaurant_id=restaurant_id)
+            archived = ArchivedBooking.objects.filter(
+                restaurant_id=restaurant_id
+            )
+            existing = DailyBookingStats.objects.filter(
+                restaurant_id=restaurant_id
+            )
+            if start:
+                bookings = bookings.filter(date__gte=start)
+                archived = archived.filter(date__gte=start)
+                existing = existing.filter(date__gte=start)
+            if end:
+                bookings = bookings.filter(date__lte=end)
+                archived = archived.filter(date__lte=end)
+                existing = existing.filter(date__lte=end)
+            with transaction.atomic():
+                existing.delete()
+                rows = DailyBookingStats.objects.bulk_create(
+                    compute_stats(bookings, archived), batch_size=1000
+                )
+                # Cached reports were built from the old rows.
+                forget_reports([restaurant_id])
+            total += len(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {total} daily stats rows for '
+            f'{len(restaurant_ids)} restaurant(s).'
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.reminders import BATCH_SIZE, TICK_LIMIT, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the booking reminder emails that are due. Runs once, or every "
+        "--interval seconds until stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep running, checking for due reminders this often.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=TICK_LIMIT,
+            help='Most reminders sent per check.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Emails handed to the mail connection at a time.'
+        )
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--limit and --batch-size must be at least 1.')
+        while True:
+            sent = send_due_reminders(
+                limit=options['limit'], batch_size=options['batch_size']
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Sent {sent} booking reminder(s).'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,204 @@
+"""Cached restaurant menus and bulk menu changes.
+
+A menu is a list of sections, ``{'category': MenuCategory or None,
+'items': [MenuItem, ...]}``, in category order with uncategorised items
+last. It is read with one query and grouped in Python, and cached until one
+of the restaurant's items or categories changes. Single saves and deletes
+drop it through the model signals; ``save_menu_items`` writes many items
+with one ``bulk_create`` and one ``bulk_update`` in a single transaction and
+drops the cached menu once, after it commits.
+
+``search_menus`` finds items across all restaurants, a page at a time.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import EditConflict, MenuCategory, MenuItem
+
+MENU_CACHE_TIMEOUT = 24 * 60 * 60
+MENU_FIELDS = ('name', 'description', 'price', 'category', 'position')
+# Columns an uploaded menu must have; ``category`` and ``position`` are
+# optional.
+REQUIRED_COLUMNS = ('name', 'description', 'price')
+SEARCH_PAGE_SIZE = 50
+
+
+def menu_queryset():
+    """Menu items with their categories, in menu order, in one query."""
+    return MenuItem.objects.select_related('category').order_by(
+        F('category__position').asc(nulls_last=True), 'category_id',
+        'position', 'id'
+    )
+
+
+def group_menu(items):
+    """Sections of ``items``, which must be in ``menu_queryset`` order."""
+    return [
+        {'category': section[0].category, 'items': section}
+        for section in (
+            list(group) for _, group in groupby(
+                items, key=lambda item: item.category_id
+            )
+        )
+    ]
+
+
+def cache_key(restaurant_id):
+    return f'menu:{restaurant_id}'
+
+
+def get_menu(restaurant_id):
+    """Return the cached menu of a restaurant, loading it on a miss."""
+    key = cache_key(restaurant_id)
+    menu = cache.get(key)
+    if menu is None:
+        menu = group_menu(
+            menu_queryset().filter(restaurant_id=restaurant_id)
+        )
+        cache.set(key, menu, MENU_CACHE_TIMEOUT)
+    return menu
+
+
+def forget_menu(restaurant_id):
+    """Drop a restaurant's cached menu once the change commits."""
+    transaction.on_commit(lambda: cache.delete(cache_key(restaurant_id)))
+
+
+def save_menu_items(restaurant_id, new=(), changed=(), categories=()):
+    """Insert ``new`` and update ``changed`` items of one restaurant.
+
+    ``categories`` are new categories the items refer to; they are inserted
+    first. The items must already be validated. Returns the created items.
+    Raises ``EditConflict``, saving nothing, if any changed item's
+    ``version`` is no longer the stored one.
+    """
+    new, changed = list(new), list(changed)
+    if not new and not changed:
+        return []
+    with transaction.atomic():
+        for category in categories:
+            category.restaurant_id = restaurant_id
+        MenuCategory.objects.bulk_create(categories)
+        for item in new:
+            item.restaurant_id = restaurant_id
+        created = MenuItem.objects.bulk_create(new)
+        stored = dict(
+            MenuItem.objects.select_for_update()
+            .filter(id__in=[item.pk for item in changed])
+            .values_list('id', 'version')
+        )
+        moved = [
+            item.name for item in changed
+            if stored.get(item.pk) != item.version
+        ]
+        if moved:
+            raise EditConflict(
+                f"{', '.join(moved)} changed while you were editing. "
+                f"Reload the page to see the changes."
+            )
+        for item in changed:
+            item.version = F('version') + 1
+        MenuItem.objects.bulk_update(changed, MENU_FIELDS + ('version',))
+        forget_menu(restaurant_id)
+    return created
+
+
+def search_menus(text='', min_price=None, max_price=None, after=None,
+                 limit=None):
+    """One page of menu items across restaurants, cheapest first.
+
+    Items match when ``text`` is in their name or description and their
+    price is within the bounds. Pages are keyed on (price, restaurant id,
+    item id): ``after`` is the ``cursor`` of the last item of the previous
+    page. Returns the items, with their restaurants, from one joined query
+    and the cursor of the next page, or None on the last page.
+    """
+    limit = limit or SEARCH_PAGE_SIZE
+    items = MenuItem.objects.select_related('restaurant').order_by(
+        'price', 'restaurant_id', 'id'
+    )
+    if text:
+        items = items.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    if min_price is not None:
+        items = items.filter(price__gte=min_price)
+    if max_price is not None:
+        items = items.filter(price__lte=max_price)
+    if after is not None:
+        price, restaurant_id, item_id = after
+        items = items.filter(
+            Q(price__gt=price)
+            | Q(price=price, restaurant_id__gt=restaurant_id)
+            | Q(price=price, restaurant_id=restaurant_id, id__gt=item_id)
+        )
+    items = list(items[:limit + 1])
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, cursor(items[-1])
+
+
+def cursor(item):
+    return f'{item.price}_{item.restaurant_id}_{item.id}'
+
+
+def read_cursor(value):
+    """The (price, restaurant id, item id) of a cursor; ValueError if bad."""
+    try:
+        price, restaurant_id, item_id = value.split('_')
+        return Decimal(price), int(restaurant_id), int(item_id)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'Invalid cursor: {value!r}')
+
+
+def group_by_restaurant(items):
+    """Sections ``{'restaurant': ..., 'items': [...]}`` in first-seen order."""
+    sections = {}
+    for item in items:
+        sections.setdefault(
+            item.restaurant_id,
+            {'restaurant': item.restaurant, 'items': []}
+        )['items'].append(item)
+    return list(sections.values())
+
+
+def read_menu_file(upload):
+    """Rows of an uploaded CSV or JSON menu as a list of dicts.
+
+    Both formats carry ``name``, ``description`` and ``price`` for each
+    item, and optionally ``category`` (a name) and ``position``; JSON is a
+    list of objects, CSV has a header row. Raises ValueError when the file
+    cannot be read.
+    """
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError('The file must be UTF-8 encoded.')
+    if upload.name.lower().endswith('.json'):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as error:
+            raise ValueError(f'Invalid JSON: {error}')
+        if not isinstance(rows, list) or not all(
+            isinstance(row, dict) for row in rows
+        ):
+            raise ValueError('Expected a JSON list of menu item objects.')
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(
+                'Missing CSV column(s): ' + ', '.join(sorted(missing)) + '.'
+            )
+        rows = list(reader)
+    if not rows:
+        raise ValueError('The file has no menu items.')
+    return rows
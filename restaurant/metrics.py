@@ -0,0 +1,90 @@
+"""Prometheus metrics for the restaurant app.
+
+When the ``PROMETHEUS_MULTIPROC_DIR`` environment variable is set (see
+``gunicorn.conf.py``) every worker writes its samples to memory-mapped files
+in that directory and ``render_metrics`` aggregates them, so a scrape covers
+the whole server rather than whichever worker happened to answer it.
+"""
+import os
+import resource
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+BOOKINGS_CREATED = Counter(
+    'restaurant_bookings_created_total',
+    'Bookings created.',
+    ['restaurant'],
+)
+BOOKINGS_CANCELLED = Counter(
+    'restaurant_bookings_cancelled_total',
+    'Bookings cancelled by customers or staff.',
+    ['restaurant'],
+)
+BOOKING_POST_LATENCY = Histogram(
+    'restaurant_booking_post_latency_seconds',
+    'Time taken to handle a booking form POST.',
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+AVAILABILITY_CACHE = Counter(
+    'restaurant_availability_cache_requests_total',
+    'Availability cache lookups, by result (hit or miss).',
+    ['result'],
+)
+DB_QUERIES = Histogram(
+    'restaurant_db_queries_per_request',
+    'Database queries issued while handling a request.',
+    ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+CONTACT_SUBMISSIONS = Counter(
+    'restaurant_contact_submissions_total',
+    'Contact form messages received.',
+)
+RATE_LIMITED = Counter(
+    'restaurant_rate_limited_total',
+    'Requests turned away with a 429, by rate limit scope.',
+    ['scope'],
+)
+WORKER_MEMORY = Gauge(
+    'restaurant_worker_memory_bytes',
+    'Resident memory of each live worker process.',
+    multiprocess_mode='liveall',
+)
+
+BOOKING_POST_VIEWS = ('book_restaurant', 'create_booking')
+
+
+def record_availability_lookup(hit):
+    """Count an availability cache lookup as a hit or a miss."""
+    AVAILABILITY_CACHE.labels(result='hit' if hit else 'miss').inc()
+
+
+def update_worker_memory():
+    """Publish this process's resident set size."""
+    try:
+        with open('/proc/self/statm') as statm:
+            rss_pages = int(statm.read().split()[1])
+        rss = rss_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No procfs (e.g. macOS): fall back to the peak RSS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    WORKER_MEMORY.set(rss)
+
+
+def render_metrics():
+    """Return the exposition body and its content type."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics
+from .slow_queries import SlowQueryLogger
+
+# Reading /proc on every request is cheap but pointless; a few seconds of
+# staleness is fine for a memory gauge.
+MEMORY_SAMPLE_INTERVAL = 5.0
+
+
+class MetricsMiddleware:
+    """Record per-view query counts, booking POST latency and worker memory."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._memory_sampled_at = 0.0
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.url_name if match and match.url_name else 'unknown'
+        metrics.DB_QUERIES.labels(view=view_name).observe(queries[0])
+        if (
+            request.method == 'POST'
+            and view_name in metrics.BOOKING_POST_VIEWS
+        ):
+            metrics.BOOKING_POST_LATENCY.observe(elapsed)
+
+        now = time.monotonic()
+        if now - self._memory_sampled_at >= MEMORY_SAMPLE_INTERVAL:
+            self._memory_sampled_at = now
+            metrics.update_worker_memory()
+        return response
+
+
+class SlowQueryMiddleware:
+    """Log statements slower than ``SLOW_QUERY_THRESHOLD_MS`` with plans."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        if self.threshold_ms is None:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        wrapper = SlowQueryLogger(connection, self.threshold_ms, request)
+        with connection.execute_wrapper(wrapper):
+            return self.get_response(request)
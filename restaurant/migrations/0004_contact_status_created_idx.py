@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0003_contact'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='table',
+            unique_together={('restaurant', 'table_number')},
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(
+                fields=['status', '-created_at'],
+                name='contact_status_created_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:39
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def contact_fingerprint(email, subject, message):
+    """Copy of ``models.contact_fingerprint`` as it was for this migration."""
+    normalised = '\x1f'.join(
+        ' '.join(part.casefold().split())
+        for part in (email, subject, message)
+    )
+    return hashlib.sha256(normalised.encode()).hexdigest()
+
+
+def fingerprint_existing_contacts(apps, schema_editor):
+    Contact = apps.get_model('restaurant', 'Contact')
+    contacts = Contact.objects.only('email', 'subject', 'message')
+    batch = []
+    for contact in contacts.iterator(chunk_size=1000):
+        contact.fingerprint = contact_fingerprint(
+            contact.email, contact.subject, contact.message
+        )
+        batch.append(contact)
+        if len(batch) == 1000:
+            Contact.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    Contact.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0004_contact_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='duplicate_count',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='fingerprint',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=64
+            ),
+        ),
+        migrations.RunPython(
+            fingerprint_existing_contacts,
+            migrations.RunPython.noop
+        ),
+    ]
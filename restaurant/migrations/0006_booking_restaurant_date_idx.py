@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0005_contact_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(
+                fields=['restaurant', 'date'],
+                name='booking_restaurant_date_idx'
+            ),
+        ),
+    ]
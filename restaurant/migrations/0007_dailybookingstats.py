@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0006_booking_restaurant_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('date', models.DateField()),
+                ('pending_count', models.IntegerField(default=0)),
+                ('confirmed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('total_covers', models.IntegerField(default=0)),
+                ('hourly_covers', models.JSONField(default=dict)),
+                ('peak_hour_covers', models.IntegerField(default=0)),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to='restaurant.restaurant'
+                )),
+            ],
+            options={
+                'verbose_name_plural': 'daily booking stats',
+                'unique_together': {('restaurant', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:51
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0007_dailybookingstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingEvent',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('event_type', models.CharField(
+                    choices=[
+                        ('created', 'Created'),
+                        ('status_changed', 'Status changed'),
+                        ('updated', 'Updated'),
+                        ('deleted', 'Deleted')
+                    ],
+                    max_length=20
+                )),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(blank=True, max_length=20)),
+                ('details', models.JSONField(
+                    blank=True,
+                    default=dict,
+                    encoder=django.core.serializers.json.DjangoJSONEncoder
+                )),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    to=settings.AUTH_USER_MODEL
+                )),
+                ('booking', models.ForeignKey(
+                    db_constraint=False,
+                    db_index=False,
+                    on_delete=django.db.models.deletion.DO_NOTHING,
+                    related_name='events',
+                    to='restaurant.booking'
+                )),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(
+                    fields=['booking', 'created_at'],
+                    name='bookingevent_booking_idx'
+                )],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0008_bookingevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(
+                    primary_key=True,
+                    serialize=False
+                )),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('number_of_guests', models.PositiveIntegerField()),
+                ('special_requests', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(
+                    choices=[
+                        ('pending', 'Pending'),
+                        ('confirmed', 'Confirmed'),
+                        ('cancelled', 'Cancelled')
+                    ],
+                    max_length=20
+                )),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to='restaurant.restaurant'
+                )),
+                ('table', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    to='restaurant.table'
+                )),
+                ('time_slot', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    to='restaurant.timeslot'
+                )),
+                ('user', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to=settings.AUTH_USER_MODEL
+                )),
+            ],
+            options={
+                'ordering': ['-date', '-time'],
+                'indexes': [models.Index(
+                    fields=['user', '-date'],
+                    name='archivedbooking_user_idx'
+                )],
+            },
+        ),
+    ]
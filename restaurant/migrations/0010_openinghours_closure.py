@@ -0,0 +1,69 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0009_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Closure',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('reason', models.CharField(blank=True, max_length=200)),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='closures',
+                    to='restaurant.restaurant'
+                )),
+            ],
+            options={
+                'ordering': ['restaurant', 'start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpeningHours',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('weekday', models.PositiveSmallIntegerField(
+                    choices=[
+                        (0, 'Monday'),
+                        (1, 'Tuesday'),
+                        (2, 'Wednesday'),
+                        (3, 'Thursday'),
+                        (4, 'Friday'),
+                        (5, 'Saturday'),
+                        (6, 'Sunday')
+                    ]
+                )),
+                ('opens', models.TimeField()),
+                ('closes', models.TimeField()),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='opening_hours',
+                    to='restaurant.restaurant'
+                )),
+            ],
+            options={
+                'verbose_name_plural': 'opening hours',
+                'ordering': ['restaurant', 'weekday', 'opens'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0010_openinghours_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeslot',
+            name='weekday',
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[
+                    (0, 'Monday'),
+                    (1, 'Tuesday'),
+                    (2, 'Wednesday'),
+                    (3, 'Thursday'),
+                    (4, 'Friday'),
+                    (5, 'Saturday'),
+                    (6, 'Sunday')
+                ],
+                null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='timeslot',
+            constraint=models.UniqueConstraint(
+                fields=('restaurant', 'weekday', 'start_time'),
+                name='timeslot_unique_start'
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0011_timeslot_weekday'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingReservation',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('weekday', models.PositiveSmallIntegerField(
+                    choices=[
+                        (0, 'Monday'),
+                        (1, 'Tuesday'),
+                        (2, 'Wednesday'),
+                        (3, 'Thursday'),
+                        (4, 'Friday'),
+                        (5, 'Saturday'),
+                        (6, 'Sunday')
+                    ]
+                )),
+                ('time', models.TimeField()),
+                ('number_of_guests', models.PositiveIntegerField()),
+                ('special_requests', models.TextField(blank=True, null=True)),
+                ('interval_weeks', models.PositiveSmallIntegerField(
+                    default=1
+                )),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('expanded_until', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to='restaurant.restaurant'
+                )),
+                ('table', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    to='restaurant.table'
+                )),
+                ('user', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to=settings.AUTH_USER_MODEL
+                )),
+            ],
+            options={
+                'ordering': ['restaurant', 'weekday', 'time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='standing_reservation',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='bookings',
+                to='restaurant.standingreservation'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(
+                fields=('standing_reservation', 'date'),
+                name='booking_unique_occurrence'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='standingreservation',
+            index=models.Index(
+                fields=['restaurant', 'weekday'],
+                name='standing_restaurant_day_idx'
+            ),
+        ),
+    ]
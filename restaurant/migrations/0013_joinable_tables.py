@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0012_standingreservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='joined_tables',
+            field=models.ManyToManyField(
+                blank=True,
+                related_name='joined_bookings',
+                to='restaurant.table'
+            ),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='joinable_with',
+            field=models.ManyToManyField(blank=True, to='restaurant.table'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0013_joinable_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailybookingstats',
+            name='no_show_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='archivedbooking',
+            name='status',
+            field=models.CharField(
+                choices=[
+                    ('pending', 'Pending'),
+                    ('confirmed', 'Confirmed'),
+                    ('cancelled', 'Cancelled'),
+                    ('no_show', 'No-show')
+                ],
+                max_length=20
+            ),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(
+                choices=[
+                    ('pending', 'Pending'),
+                    ('confirmed', 'Confirmed'),
+                    ('cancelled', 'Cancelled'),
+                    ('no_show', 'No-show')
+                ],
+                default='pending',
+                max_length=20
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0014_booking_no_show'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='MenuCategory',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('name', models.CharField(max_length=100)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='menu_categories',
+                    to='restaurant.restaurant'
+                )),
+            ],
+            options={
+                'verbose_name_plural': 'menu categories',
+                'ordering': ['position', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='category',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='items',
+                to='restaurant.menucategory'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(
+                fields=['restaurant', 'category', 'position'],
+                name='menuitem_menu_order_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='menucategory',
+            constraint=models.UniqueConstraint(
+                fields=('restaurant', 'name'),
+                name='menucategory_unique_name'
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0015_menu_categories'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(
+                fields=['price', 'restaurant'],
+                name='menuitem_price_idx'
+            ),
+        ),
+    ]
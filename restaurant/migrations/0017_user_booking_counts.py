@@ -0,0 +1,43 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('restaurant', '0016_menuitem_price_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBookingCounts',
+            fields=[
+                ('user', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='booking_counts',
+                    serialize=False,
+                    to=settings.AUTH_USER_MODEL
+                )),
+                ('counted_on', models.DateField(null=True)),
+                ('upcoming_count', models.IntegerField(default=0)),
+                ('past_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'user booking counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(
+                fields=['user', 'date'],
+                name='booking_user_date_idx'
+            ),
+        ),
+    ]
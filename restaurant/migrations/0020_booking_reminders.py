@@ -0,0 +1,80 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:54
+
+from datetime import datetime, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# ``settings.BOOKING_REMINDER_HOURS`` as it was for this migration.
+REMINDER_HOURS = (24, 2)
+
+
+def starts_at(booking):
+    """Copy of ``reminders.starts_at`` as it was for this migration."""
+    return timezone.make_aware(datetime.combine(booking.date, booking.time))
+
+
+def schedule_upcoming_bookings(apps, schema_editor):
+    Booking = apps.get_model('restaurant', 'Booking')
+    BookingReminder = apps.get_model('restaurant', 'BookingReminder')
+    now = timezone.now()
+    bookings = Booking.objects.filter(
+        status='confirmed', date__gte=timezone.localdate()
+    ).only('date', 'time')
+    batch = []
+    for booking in bookings.iterator(chunk_size=1000):
+        for hours in REMINDER_HOURS:
+            due = starts_at(booking) - timedelta(hours=hours)
+            if due > now:
+                batch.append(BookingReminder(
+                    booking_id=booking.pk, hours_before=hours, due_at=due
+                ))
+        if len(batch) >= 1000:
+            BookingReminder.objects.bulk_create(batch)
+            batch = []
+    BookingReminder.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0019_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingReminder',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('hours_before', models.PositiveSmallIntegerField()),
+                ('due_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='reminders',
+                    to='restaurant.booking'
+                )),
+            ],
+            options={
+                'indexes': [models.Index(
+                    condition=models.Q(('sent_at__isnull', True)),
+                    fields=['due_at'],
+                    name='reminder_pending_due_idx'
+                )],
+                'constraints': [models.UniqueConstraint(
+                    fields=('booking', 'hours_before', 'due_at'),
+                    name='reminder_unique_per_start'
+                )],
+            },
+        ),
+        migrations.RunPython(
+            schedule_upcoming_bookings,
+            migrations.RunPython.noop
+        ),
+    ]
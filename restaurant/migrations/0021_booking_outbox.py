@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:58
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0020_booking_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('booking_id', models.BigIntegerField()),
+                ('restaurant_id', models.BigIntegerField()),
+                ('change', models.CharField(
+                    choices=[
+                        ('created', 'Created'),
+                        ('updated', 'Updated'),
+                        ('deleted', 'Deleted')
+                    ],
+                    max_length=10
+                )),
+                ('data', models.JSONField(
+                    encoder=django.core.serializers.json.DjangoJSONEncoder
+                )),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeFeedConsumer',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID'
+                )),
+                ('name', models.SlugField(unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
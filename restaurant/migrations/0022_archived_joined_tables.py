@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0021_booking_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='joined_table_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,9 +1,123 @@
-from django.db import models
+import hashlib
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.deletion import Collector
 from django.contrib.auth.models import User
-from datetime import datetime
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from datetime import datetime, timedelta
 from django.core.exceptions import ValidationError
 
 
+class EditConflict(Exception):
+    """A versioned row changed after the instance being saved was loaded."""
+
+
+class VersionedModel(models.Model):
+    """A model saved with optimistic concurrency control.
+
+    Saving an instance loaded from the database runs a conditional
+    ``UPDATE ... WHERE version = n`` of just the fields that changed since
+    it was loaded, where n is the instance's ``version``, and moves the
+    version on by one. If another save got there first no row matches and
+    ``EditConflict`` is raised; the row is never locked. Forms carry the
+    version they were rendered with (``forms.VersionedModelForm``), so an
+    edit of a superseded version is refused instead of overwriting it.
+    Bulk updates of these models bump the version themselves.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_values(fields)
+
+    def _remember_values(self, fields=None):
+        """Note the stored values of ``fields`` (default: all loaded)."""
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+            fields = [field.attname for field in self._meta.concrete_fields]
+        else:
+            fields = [self._meta.get_field(name).attname for name in fields]
+        self._loaded_values.update({
+            attname: self.__dict__[attname]
+            for attname in fields if attname in self.__dict__
+        })
+
+    def changed_fields(self):
+        """Names of the fields set to new values since the last load."""
+        loaded = self._loaded_values
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname in self.__dict__
+            and (
+                field.attname not in loaded
+                or self.__dict__[field.attname] != loaded[field.attname]
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        # The save and whatever post_save receivers do form one unit, and a
+        # conflict only rolls back this save, not the caller's transaction.
+        if (
+            self._state.adding
+            or kwargs.get('force_insert')
+            or not hasattr(self, '_loaded_values')
+        ):
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+            self._remember_values()
+            return
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = self.changed_fields() + [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+        kwargs['update_fields'] = {*update_fields, 'version'}
+        expected = self._expected_version = self.version
+        self.version = expected + 1
+        try:
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+        except BaseException:
+            self.version = expected
+            raise
+        finally:
+            del self._expected_version
+        self._remember_values()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update
+            )
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values,
+            update_fields, forced_update
+        )
+        if not updated:
+            raise EditConflict(
+                f'This {self._meta.verbose_name} was changed by someone else '
+                f'while you were editing it. Reload the page to see the '
+                f'changes.'
+            )
+        return updated
+
+
 # Restaurant Model
 class Restaurant(models.Model):
     name = models.CharField(max_length=100)
@@ -23,12 +137,83 @@ class Restaurant(models.Model):
         return self.name
 
 
+# OpeningHours Model
+class OpeningHours(models.Model):
+    """One opening period on a weekday; a day may have several.
+
+    A restaurant with no rows is open from ``opening_time`` to
+    ``closing_time`` every day.
+    """
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='opening_hours'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    opens = models.TimeField()
+    closes = models.TimeField()
+
+    class Meta:
+        ordering = ['restaurant', 'weekday', 'opens']
+        verbose_name_plural = 'opening hours'
+
+    def clean(self):
+        if self.opens and self.closes and self.closes <= self.opens:
+            raise ValidationError('Closing time must be after opening time.')
+
+    def __str__(self):
+        return (
+            f"{self.restaurant.name} - {self.get_weekday_display()} "
+            f"{self.opens.strftime('%H:%M')}-{self.closes.strftime('%H:%M')}"
+        )
+
+
+# Closure Model
+class Closure(models.Model):
+    """Days a restaurant is shut regardless of its weekly hours."""
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='closures'
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()  # Inclusive
+    reason = models.CharField(max_length=200, blank=True)  # e.g. "Holiday"
+
+    class Meta:
+        ordering = ['restaurant', 'start_date']
+
+    def clean(self):
+        if (
+            self.start_date and self.end_date
+            and self.end_date < self.start_date
+        ):
+            raise ValidationError('End date must not be before start date.')
+
+    def __str__(self):
+        return f"{self.restaurant.name} closed {self.start_date}"
+
+
 # Table Model
 class Table(models.Model):
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     table_number = models.IntegerField()
     capacity = models.IntegerField()
     is_active = models.BooleanField(default=True)
+    joinable_with = models.ManyToManyField(
+        'self',
+        blank=True
+    )  # Tables that can be pushed together with this one
 
     class Meta:
         unique_together = ['restaurant', 'table_number']
@@ -60,10 +245,24 @@ class Table(models.Model):
 # TimeSlot Model
 class TimeSlot(models.Model):
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    weekday = models.PositiveSmallIntegerField(
+        choices=OpeningHours.WEEKDAY_CHOICES,
+        null=True,
+        blank=True
+    )  # Empty for slots that apply every day
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            # Lets generate_time_slots re-run with ignore_conflicts.
+            models.UniqueConstraint(
+                fields=['restaurant', 'weekday', 'start_time'],
+                name='timeslot_unique_start'
+            ),
+        ]
+
     def __str__(self):
         return (
             f"{self.restaurant.name} - {self.start_time.strftime('%H:%M:%S')} "
@@ -71,12 +270,156 @@ class TimeSlot(models.Model):
         )
 
 
+class StandingReservationQuerySet(models.QuerySet):
+    def pending_on(self, day):
+        """Active reservations on ``day``'s weekday not yet expanded to it.
+
+        Callers still check ``occurs_on(day)`` for the week interval.
+        """
+        return self.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=day),
+            Q(expanded_until__isnull=True) | Q(expanded_until__lt=day),
+            is_active=True,
+            weekday=day.weekday(),
+            start_date__lte=day,
+        )
+
+
+# StandingReservation Model
+class StandingReservation(models.Model):
+    """A booking that repeats every ``interval_weeks`` on one weekday.
+
+    Occurrences become ``Booking`` rows only inside a rolling horizon (see
+    ``manage.py expand_standing_reservations``); ``expanded_until`` is the
+    last date considered, and later occurrences exist only implicitly.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    table = models.ForeignKey(
+        Table,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    weekday = models.PositiveSmallIntegerField(
+        choices=OpeningHours.WEEKDAY_CHOICES
+    )
+    time = models.TimeField()
+    number_of_guests = models.PositiveIntegerField()
+    special_requests = models.TextField(blank=True, null=True)
+    interval_weeks = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)  # Open-ended if empty
+    expanded_until = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = StandingReservationQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['restaurant', 'weekday', 'time']
+        indexes = [
+            models.Index(
+                fields=['restaurant', 'weekday'],
+                name='standing_restaurant_day_idx'
+            ),
+        ]
+
+    def clean(self):
+        if self.interval_weeks is not None and self.interval_weeks < 1:
+            raise ValidationError('Interval must be at least one week.')
+        if (
+            self.start_date and self.end_date
+            and self.end_date < self.start_date
+        ):
+            raise ValidationError('End date must not be before start date.')
+
+    def first_date(self):
+        """Date of the first occurrence on or after ``start_date``."""
+        return self.start_date + timedelta(
+            days=(self.weekday - self.start_date.weekday()) % 7
+        )
+
+    def occurs_on(self, day):
+        if day.weekday() != self.weekday or day < self.start_date:
+            return False
+        if self.end_date and day > self.end_date:
+            return False
+        return (day - self.first_date()).days % (7 * self.interval_weeks) == 0
+
+    def occurrences(self, start, end):
+        """Occurrence dates from ``start`` to ``end``, inclusive."""
+        step = 7 * self.interval_weeks
+        first = self.first_date()
+        if self.end_date:
+            end = min(end, self.end_date)
+        if start > first:
+            # Jump straight to the first occurrence on or after ``start``.
+            first += timedelta(days=-(-(start - first).days // step) * step)
+        day = first
+        while day <= end:
+            yield day
+            day += timedelta(days=step)
+
+    def __str__(self):
+        return (
+            f"{self.user.username} at {self.restaurant.name} every "
+            f"{self.get_weekday_display()} {self.time.strftime('%H:%M')}"
+        )
+
+
+class BookingQuerySet(models.QuerySet):
+    def set_status(self, status, actor=None):
+        """Move every booking not already in ``status`` to it.
+
+        Runs one UPDATE, then hands the changed bookings to the same
+        bookkeeping that saving a single booking triggers, recording
+        ``actor`` as the user who made the change.
+        Returns the number of bookings changed.
+        """
+        from .signals import bookings_updated
+        with transaction.atomic():
+            bookings = list(self.exclude(status=status))
+            now = timezone.now()
+            Booking.objects.filter(
+                pk__in=[booking.pk for booking in bookings]
+            ).update(
+                status=status, updated_at=now, version=F('version') + 1
+            )
+            for booking in bookings:
+                booking.status = status
+                booking.updated_at = now
+                booking.version += 1
+                booking._remember_values()
+                booking._actor = actor
+            bookings_updated(bookings)
+        return len(bookings)
+
+    def delete(self, actor=None):
+        """Delete the bookings, recording ``actor`` as the user who did.
+
+        Related rows cascade as usual, but the bookkeeping runs once for
+        the whole batch instead of from every row's post_delete signal.
+        """
+        from .signals import bookings_deleted
+        with transaction.atomic(using=self.db):
+            bookings = list(self)
+            for booking in bookings:
+                booking._actor = actor
+                booking._deleted_in_bulk = True
+            bookings_deleted(bookings)
+            collector = Collector(using=self.db, origin=self)
+            collector.collect(bookings)
+            return collector.delete()
+
+
 # Booking Model
-class Booking(models.Model):
+class Booking(VersionedModel):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
         ('cancelled', 'Cancelled'),
+        ('no_show', 'No-show'),
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -93,6 +436,18 @@ class Booking(models.Model):
         null=True,
         blank=True
     )  # Optional time slot
+    standing_reservation = models.ForeignKey(
+        StandingReservation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings'
+    )  # Set on bookings expanded from a standing reservation
+    joined_tables = models.ManyToManyField(
+        Table,
+        blank=True,
+        related_name='joined_bookings'
+    )  # Extra tables pushed together with ``table`` for a large party
     date = models.DateField()
     time = models.TimeField()
     number_of_guests = models.PositiveIntegerField()
@@ -105,19 +460,358 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     def __str__(self):
         return f"Booking for {self.restaurant.name} on {self.date}"
 
     class Meta:
         ordering = ['-date', '-time']  # Orders bookings by date and time
+        indexes = [
+            models.Index(
+                fields=['restaurant', 'date'],
+                name='booking_restaurant_date_idx'
+            ),
+            # Serves a user's upcoming and past bookings (my_bookings).
+            models.Index(
+                fields=['user', 'date'],
+                name='booking_user_date_idx'
+            ),
+        ]
+        constraints = [
+            # One booking per occurrence of a standing reservation.
+            models.UniqueConstraint(
+                fields=['standing_reservation', 'date'],
+                name='booking_unique_occurrence'
+            ),
+        ]
+
+
+# BookingEvent Model
+class BookingEvent(models.Model):
+    """Append-only history of changes to bookings.
+
+    Written by the booking bookkeeping in ``restaurant.signals``. The
+    booking is referenced without a database constraint so that history
+    outlives the booking row.
+    """
+    CREATED = 'created'
+    STATUS_CHANGED = 'status_changed'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    EVENT_CHOICES = [
+        (CREATED, 'Created'),
+        (STATUS_CHANGED, 'Status changed'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,  # Covered by the (booking, created_at) index
+        related_name='events'
+    )
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, blank=True)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )  # Who made the change, when known
+    details = models.JSONField(
+        default=dict,
+        blank=True,
+        encoder=DjangoJSONEncoder
+    )  # {field: [old, new]} for updates
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['booking', 'created_at'],
+                name='bookingevent_booking_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError('Booking events cannot be changed.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError('Booking events cannot be deleted.')
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} booking {self.booking_id}"
+
+
+class BookingOutbox(models.Model):
+    """Transactional outbox of booking changes for downstream systems.
+
+    One row is written in the same transaction as every booking insert,
+    update and delete (see ``restaurant.outbox``); ``id`` is the sequence
+    number consumers page through. Rows every consumer has read are
+    removed by the ``compact_outbox`` command.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    CHANGE_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    booking_id = models.BigIntegerField()  # No FK: deletes are sent too
+    restaurant_id = models.BigIntegerField()
+    change = models.CharField(max_length=10, choices=CHANGE_CHOICES)
+    data = models.JSONField(encoder=DjangoJSONEncoder)  # See outbox.payload
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.change} booking {self.booking_id}"
+
+
+class ChangeFeedConsumer(models.Model):
+    """How far a downstream system has read the booking change feed."""
+    name = models.SlugField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)  # Last sequence read
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} at {self.position}"
+
+
+class BookingReminder(models.Model):
+    """An email reminder due some hours before a confirmed booking starts.
+
+    See ``restaurant.reminders``. Unsent reminders are replaced whenever
+    their booking's status, date or time changes; sent ones are kept, so a
+    reminder is not sent twice for the same start time.
+    """
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='reminders'
+    )
+    hours_before = models.PositiveSmallIntegerField()
+    due_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the scheduler's range query over pending reminders.
+            models.Index(
+                fields=['due_at'],
+                condition=Q(sent_at__isnull=True),
+                name='reminder_pending_due_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['booking', 'hours_before', 'due_at'],
+                name='reminder_unique_per_start'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.hours_before}h reminder for booking {self.booking_id}"
+
+
+# ArchivedBooking Model
+class ArchivedBooking(models.Model):
+    """A past booking moved out of the live table.
+
+    ``manage.py archive_bookings`` moves old bookings here in chunks and
+    keeps their ids, so the booking event log still lines up.
+    """
+    id = models.BigIntegerField(primary_key=True)  # Original Booking id
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    table = models.ForeignKey(
+        Table,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    time_slot = models.ForeignKey(
+        TimeSlot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    date = models.DateField()
+    time = models.TimeField()
+    number_of_guests = models.PositiveIntegerField()
+    special_requests = models.TextField(blank=True, null=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Booking.STATUS_CHOICES
+    )
+    joined_table_ids = models.JSONField(
+        default=list,
+        blank=True
+    )  # Ids of the joined tables the booking was seated on
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(
+                fields=['user', '-date'],
+                name='archivedbooking_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archived booking for {self.restaurant.name} on {self.date}"
+
+
+# DailyBookingStats Model
+class DailyBookingStats(models.Model):
+    """Booking totals for one restaurant and day.
+
+    Maintained incrementally by ``restaurant.stats`` whenever a booking is
+    created, changed or deleted; ``manage.py rebuild_stats`` recomputes it
+    from the bookings table.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    date = models.DateField()
+    pending_count = models.IntegerField(default=0)
+    confirmed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    no_show_count = models.IntegerField(default=0)
+    total_covers = models.IntegerField(default=0)  # Excludes cancelled
+    hourly_covers = models.JSONField(default=dict)  # {"19": 24, ...}
+    peak_hour_covers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['restaurant', 'date']
+        verbose_name_plural = 'daily booking stats'
+
+    def __str__(self):
+        return f"{self.restaurant.name} on {self.date}"
+
+
+# UserBookingCounts Model
+class UserBookingCounts(models.Model):
+    """How many upcoming, past and cancelled bookings a user has.
+
+    Kept up to date by ``restaurant.booking_counts`` whenever a booking
+    changes. Upcoming bookings become past ones as days go by, so the counts
+    only hold for ``counted_on``; on a later day they are recounted once.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='booking_counts'
+    )
+    counted_on = models.DateField(null=True)
+    upcoming_count = models.IntegerField(default=0)
+    past_count = models.IntegerField(default=0)  # Excludes cancelled
+    cancelled_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'user booking counts'
+
+    def __str__(self):
+        return f"Booking counts for {self.user}"
+
+
+# IdempotencyKey Model
+class IdempotencyKey(models.Model):
+    """A client-chosen key for a POST and the response it got.
+
+    See ``restaurant.idempotency``. Rows expire after
+    ``settings.IDEMPOTENCY_KEY_TTL`` seconds and are removed by the
+    ``purge_idempotency_keys`` command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)  # Hash of path and body
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_headers = models.JSONField(default=dict)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='idempotency_key_unique_per_user'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Idempotency key {self.key} of {self.user}"
+
+
+# MenuCategory Model
+class MenuCategory(models.Model):
+    """A section of a restaurant's menu, such as starters or desserts."""
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='menu_categories'
+    )
+    name = models.CharField(max_length=100)
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position', 'id']
+        verbose_name_plural = 'menu categories'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'name'],
+                name='menucategory_unique_name'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 # MenuItem Model
-class MenuItem(models.Model):
+class MenuItem(VersionedModel):
     name = models.CharField(max_length=100)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    category = models.ForeignKey(
+        MenuCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='items'
+    )
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Serves the menu query: one restaurant's items in menu order.
+            models.Index(
+                fields=['restaurant', 'category', 'position'],
+                name='menuitem_menu_order_idx'
+            ),
+            # Serves price-range search across restaurants.
+            models.Index(
+                fields=['price', 'restaurant'],
+                name='menuitem_price_idx'
+            ),
+        ]
 
     def clean(self):
         if self.price is not None and self.price < 0:
@@ -131,8 +825,71 @@ class MenuItem(models.Model):
         return f"{self.name} - ${self.price}"
 
 
-class Contact(models.Model):
+def contact_fingerprint(email, subject, message):
+    """Hash of a message's sender and content, ignoring case and spacing."""
+    normalised = '\x1f'.join(
+        ' '.join(part.casefold().split())
+        for part in (email, subject, message)
+    )
+    return hashlib.sha256(normalised.encode()).hexdigest()
+
+
+class ContactQuerySet(models.QuerySet):
+    def save_or_merge(self, contact):
+        """Save a new submission unless it repeats a recent one.
+
+        A repeat of a message received within
+        ``settings.CONTACT_DUPLICATE_WINDOW`` seconds only bumps that
+        message's ``duplicate_count``; ``contact`` then takes the primary
+        key of the stored message. Recent fingerprints are kept in the
+        cache, so a flood of identical posts costs one UPDATE each.
+        Returns True if a new row was inserted.
+        """
+        window = settings.CONTACT_DUPLICATE_WINDOW
+        contact.fingerprint = contact_fingerprint(
+            contact.email, contact.subject, contact.message
+        )
+        cache_key = f'contact:fingerprint:{contact.fingerprint}'
+        original_id = cache.get(cache_key)
+        if original_id is None or not self._count_repeat(original_id):
+            original_id = self.filter(
+                fingerprint=contact.fingerprint,
+                created_at__gte=timezone.now() - timedelta(seconds=window)
+            ).order_by('-created_at').values_list('id', flat=True).first()
+            if original_id is None or not self._count_repeat(original_id):
+                contact.save()
+                transaction.on_commit(
+                    lambda: cache.set(cache_key, contact.pk, window)
+                )
+                return True
+        contact.pk = original_id
+        contact._state.adding = False
+        return False
+
+    def _count_repeat(self, contact_id):
+        return self.filter(id=contact_id).update(
+            duplicate_count=F('duplicate_count') + 1,
+            updated_at=timezone.now()
+        )
+
+    def set_status(self, status):
+        """Change the status of every message in one UPDATE."""
+        updated = self.update(status=status, version=F('version') + 1)
+        Contact.forget_unread_count()
+        return updated
+
+    def bulk_delete(self):
+        """Delete every message in one DELETE."""
+        deleted, _ = self.delete()
+        Contact.forget_unread_count()
+        return deleted
+
+
+class Contact(VersionedModel):
     """Model for storing contact form submissions."""
+    UNREAD_COUNT_CACHE_KEY = 'contact:unread_count'
+    UNREAD_COUNT_TIMEOUT = 60 * 60
+
     STATUS_CHOICES = [
         ('unread', 'Unread'),
         ('read', 'Read'),
@@ -148,11 +905,79 @@ class Contact(models.Model):
         choices=STATUS_CHOICES,
         default='unread'
     )
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False
+    )  # See contact_fingerprint()
+    duplicate_count = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ContactQuerySet.as_manager()
+
     def __str__(self):
         return f"Contact from {self.name} - {self.subject}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', '-created_at'],
+                name='contact_status_created_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        was_unread = getattr(self, '_loaded_status', None) == 'unread'
+        self.fingerprint = contact_fingerprint(
+            self.email, self.subject, self.message
+        )
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if was_unread != (self.status == 'unread'):
+            Contact.adjust_unread_count(-1 if was_unread else 1)
+
+    def delete(self, *args, **kwargs):
+        was_unread = getattr(self, '_loaded_status', None) == 'unread'
+        result = super().delete(*args, **kwargs)
+        if was_unread:
+            Contact.adjust_unread_count(-1)
+        return result
+
+    @classmethod
+    def unread_count(cls):
+        """Number of unread messages, counted at most once per timeout."""
+        count = cache.get(cls.UNREAD_COUNT_CACHE_KEY)
+        if count is None:
+            count = cls.objects.filter(status='unread').count()
+            cache.add(
+                cls.UNREAD_COUNT_CACHE_KEY,
+                count,
+                cls.UNREAD_COUNT_TIMEOUT
+            )
+        return count
+
+    @classmethod
+    def adjust_unread_count(cls, delta):
+        """Apply ``delta`` to the cached count once the change commits."""
+        def apply():
+            try:
+                cache.incr(cls.UNREAD_COUNT_CACHE_KEY, delta)
+            except ValueError:
+                # Not cached; the next read counts from the database.
+                pass
+        transaction.on_commit(apply)
+
+    @classmethod
+    def forget_unread_count(cls):
+        transaction.on_commit(
+            lambda: cache.delete(cls.UNREAD_COUNT_CACHE_KEY)
+        )
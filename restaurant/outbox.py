@@ -0,0 +1,104 @@
+"""Booking change feed for downstream systems (POS, CRM).
+
+The booking bookkeeping in ``restaurant.signals`` calls ``record`` for
+every insert, update and delete, so an outbox row commits or rolls back
+with the change itself. Consumers page through the outbox by sequence
+number with ``read_changes``; each read also acknowledges everything up to
+the cursor it was sent from, and ``compact`` deletes what every consumer
+has acknowledged.
+
+Sequence numbers are handed out when a row is inserted, not when it
+commits, so entries younger than ``settings.CHANGE_FEED_SETTLE_SECONDS``
+are held back: a slow transaction cannot commit a lower number behind a
+consumer's cursor.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import BookingOutbox, ChangeFeedConsumer
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def payload(booking):
+    """A booking's fields as sent to consumers."""
+    return {
+        'id': booking.pk,
+        'restaurant': booking.restaurant_id,
+        'user': booking.user_id,
+        'table': booking.table_id,
+        'time_slot': booking.time_slot_id,
+        'date': booking.date,
+        'time': booking.time,
+        'number_of_guests': booking.number_of_guests,
+        'special_requests': booking.special_requests or '',
+        'status': booking.status,
+        'version': booking.version,
+        'updated_at': booking.updated_at,
+    }
+
+
+def record(bookings, change):
+    """Add one outbox entry per booking; call inside its transaction."""
+    BookingOutbox.objects.bulk_create([
+        BookingOutbox(
+            booking_id=booking.pk,
+            restaurant_id=booking.restaurant_id,
+            change=change,
+            data=payload(booking)
+        )
+        for booking in bookings
+    ])
+
+
+def serialize_entry(entry):
+    return {
+        'seq': entry.id,
+        'change': entry.change,
+        'booking': entry.booking_id,
+        'restaurant': entry.restaurant_id,
+        'at': entry.created_at.isoformat(),
+        'data': entry.data,
+    }
+
+
+def read_changes(after=0, limit=PAGE_SIZE, consumer=None, now=None):
+    """Entries after sequence number ``after``, oldest first.
+
+    Returns the entries and whether more are ready. ``consumer`` names the
+    reader; its position moves to ``after``, which it has read.
+    """
+    now = now or timezone.now()
+    if consumer:
+        ChangeFeedConsumer.objects.update_or_create(
+            name=consumer, defaults={'position': after}
+        )
+    settled = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    entries = list(
+        BookingOutbox.objects.filter(id__gt=after).order_by('id')[:limit + 1]
+    )
+    for index, entry in enumerate(entries):
+        if entry.created_at > settled:
+            return entries[:index], False
+    return entries[:limit], len(entries) > limit
+
+
+def compact(now=None):
+    """Delete entries every consumer has read, or past retention.
+
+    Returns the number of entries deleted.
+    """
+    now = now or timezone.now()
+    read_by_all = ChangeFeedConsumer.objects.aggregate(
+        position=Min('position')
+    )['position']
+    expired = now - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS)
+    deleted, _ = BookingOutbox.objects.filter(created_at__lt=expired).delete()
+    if read_by_all:
+        more, _ = BookingOutbox.objects.filter(id__lte=read_by_all).delete()
+        deleted += more
+    return deleted
@@ -0,0 +1,111 @@
+"""Cache-backed sliding-window rate limiting for write-heavy views.
+
+Each scope in ``settings.RATE_LIMITS`` maps to a rate such as ``'10/m'``:
+at most 10 requests in any minute. A request counts against its client
+IP's window and, for signed-in users, the user's window; if either is full
+the view is never called and a bare 429 is returned.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Turn ``'10/m'`` into ``(capacity, tokens_per_second)``."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0].lower()]
+
+
+def client_ip(request):
+    """Return the client's IP address.
+
+    Behind a proxy that appends to X-Forwarded-For (Heroku's router does),
+    set ``RATE_LIMIT_TRUST_X_FORWARDED_FOR`` and the last hop is used; the
+    earlier entries are supplied by the client and can be forged.
+    """
+    if getattr(settings, 'RATE_LIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class SlidingWindow:
+    """A sliding-window request counter kept in the default cache.
+
+    Requests are counted per fixed window of ``capacity / refill_rate``
+    seconds with ``cache.incr``, which is atomic, so requests arriving
+    together in different workers each get a count of their own. The
+    previous window's count is weighted by how much of it the last
+    window's worth of time still covers, so a burst cannot straddle a
+    window boundary to get twice the capacity through.
+    """
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.window = capacity / refill_rate
+        # Counts are read for one more window after their own.
+        self.timeout = int(2 * self.window) + 1
+
+    def consume(self, key, now=None):
+        """Count a request for ``key``; return the seconds to wait if full."""
+        now = time.time() if now is None else now
+        number, elapsed = divmod(now, self.window)
+        current = f'{key}:{int(number)}'
+        previous = cache.get(f'{key}:{int(number) - 1}', 0)
+        cache.add(current, 0, self.timeout)
+        count = cache.incr(current)
+        excess = previous * (1 - elapsed / self.window) + count - self.capacity
+        if excess <= 0:
+            return 0
+        # A refused request does not use up the allowance.
+        cache.decr(current)
+        left = self.window - elapsed
+        if previous:
+            return min(excess * self.window / previous, left)
+        return left
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Too many requests. Please try again shortly.',
+        status=429,
+        content_type='text/plain'
+    )
+    response['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def rate_limit(scope, methods=('POST',)):
+    """Decorator limiting ``methods`` requests to the rate for ``scope``.
+
+    Apply it outside ``login_required`` so that over-limit requests are
+    turned away before the session or user is loaded.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            rate = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+            if rate and request.method in methods:
+                window = SlidingWindow(*parse_rate(rate))
+                wait = window.consume(
+                    f'ratelimit:{scope}:ip:{client_ip(request)}'
+                )
+                if not wait and request.user.is_authenticated:
+                    wait = window.consume(
+                        f'ratelimit:{scope}:user:{request.user.pk}'
+                    )
+                if wait:
+                    metrics.RATE_LIMITED.labels(scope=scope).inc()
+                    return too_many_requests(wait)
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
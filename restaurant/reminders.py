@@ -0,0 +1,120 @@
+"""Reminder emails before confirmed bookings.
+
+A confirmed booking that has not started has one ``BookingReminder`` for
+each entry of ``settings.BOOKING_REMINDER_HOURS``, due that many hours
+before it starts. The booking signal hooks call ``reschedule`` when a
+booking is created or its status, date or time changes.
+
+``send_due_reminders`` is one tick of the ``send_reminders`` command. One
+range query on the pending reminders' ``due_at`` index picks what is due,
+one UPDATE marks it all sent, and the emails then go out in batches over a
+single mail connection. Marking first means a reminder is sent at most
+once even if ticks overlap; a batch that fails to send is marked unsent
+again with everything after it.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import BookingReminder
+
+TICK_LIMIT = 10000
+BATCH_SIZE = 100
+# Changes to these booking fields move or cancel its reminders.
+SCHEDULE_FIELDS = ('status', 'date', 'time')
+
+
+def starts_at(booking):
+    return timezone.make_aware(datetime.combine(booking.date, booking.time))
+
+
+def reschedule(bookings, now=None):
+    """Replace the unsent reminders of ``bookings``."""
+    if not bookings:
+        return
+    now = now or timezone.now()
+    BookingReminder.objects.filter(
+        booking__in=[booking.pk for booking in bookings],
+        sent_at__isnull=True
+    ).delete()
+    reminders = [
+        BookingReminder(booking_id=booking.pk, hours_before=hours, due_at=due)
+        for booking in bookings if booking.status == 'confirmed'
+        for hours in settings.BOOKING_REMINDER_HOURS
+        if (due := starts_at(booking) - timedelta(hours=hours)) > now
+    ]
+    if reminders:
+        # A reminder already sent for the same start time is kept.
+        BookingReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+
+
+def due_reminders(now):
+    """Unsent reminders due by ``now`` and not overdue past the grace."""
+    grace = timedelta(minutes=settings.BOOKING_REMINDER_GRACE_MINUTES)
+    return BookingReminder.objects.filter(
+        sent_at__isnull=True, due_at__gt=now - grace, due_at__lte=now
+    )
+
+
+def reminder_email(reminder, connection):
+    booking = reminder.booking
+    context = {
+        'booking': booking,
+        'restaurant': booking.restaurant,
+        'user': booking.user,
+        'hours_before': reminder.hours_before,
+    }
+    return mail.EmailMessage(
+        subject=(
+            f'Reminder: {booking.restaurant.name} on '
+            f'{booking.date:%d %b} at {booking.time:%H:%M}'
+        ),
+        body=render_to_string(
+            'restaurant/email/booking_reminder.txt', context
+        ),
+        to=[booking.user.email],
+        connection=connection,
+    )
+
+
+def send_due_reminders(now=None, limit=TICK_LIMIT, batch_size=BATCH_SIZE):
+    """Send up to ``limit`` due reminders; return how many emails went out.
+
+    Reminders of users without an email address are marked sent without
+    sending anything.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        reminders = list(
+            due_reminders(now)
+            .filter(booking__status='confirmed')
+            .select_related('booking__restaurant', 'booking__user')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('due_at')[:limit]
+        )
+        BookingReminder.objects.filter(
+            pk__in=[reminder.pk for reminder in reminders]
+        ).update(sent_at=now)
+    reminders = [
+        reminder for reminder in reminders if reminder.booking.user.email
+    ]
+    sent = 0
+    if not reminders:
+        return sent
+    with mail.get_connection() as connection:
+        for start in range(0, len(reminders), batch_size):
+            batch = reminders[start:start + batch_size]
+            try:
+                sent += connection.send_messages([
+                    reminder_email(reminder, connection) for reminder in batch
+                ]) or 0
+            except Exception:
+                BookingReminder.objects.filter(pk__in=[
+                    reminder.pk for reminder in reminders[start:]
+                ]).update(sent_at=None)
+                raise
+    return sent
@@ -0,0 +1,101 @@
+"""Staff reports, read from the ``DailyBookingStats`` summary table."""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DailyBookingStats
+
+REPORT_CACHE_TIMEOUT = 60 * 60
+WEEKDAYS = [
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday',
+    'Sunday',
+]
+
+
+def _version(restaurant_id):
+    """Current cache version of a restaurant's reports."""
+    key = f'reports:version:{restaurant_id}'
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, None)
+    return version
+
+
+def forget_reports(restaurant_ids):
+    """Invalidate every cached report for these restaurants, on commit."""
+    keys = {f'reports:version:{pk}' for pk in restaurant_ids}
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(
+            {key: time.time_ns() for key in keys}, None
+        ))
+
+
+def weekday_counts(start, end):
+    """How many times each weekday (Monday=0) occurs from start to end."""
+    days = (end - start).days + 1
+    counts = [days // 7] * 7
+    for offset in range(days % 7):
+        counts[(start + timedelta(days=offset)).weekday()] += 1
+    return counts
+
+
+def occupancy_heatmap(restaurant, start, end):
+    """Covers per weekday and hour for bookings between two dates.
+
+    Returns ``{'hours': [...], 'rows': [(weekday_name, [cells])]}`` where
+    each cell holds the total and the average covers for that hour across
+    the matching weekdays in the range. The numbers are summed from the
+    restaurant's ``DailyBookingStats`` rows (one query, at most one row per
+    day) and cached per restaurant and date range.
+    """
+    key = (
+        f'reports:occupancy:{restaurant.id}:{_version(restaurant.id)}:'
+        f'{start.isoformat()}:{end.isoformat()}'
+    )
+    heatmap = cache.get(key)
+    if heatmap is not None:
+        return heatmap
+
+    days = DailyBookingStats.objects.filter(
+        restaurant=restaurant,
+        date__range=(start, end),
+    ).values_list('date', 'hourly_covers')
+    totals = defaultdict(int)
+    for day, hourly_covers in days:
+        for hour, covers in hourly_covers.items():
+            totals[(day.weekday(), int(hour))] += covers
+
+    first_hour = restaurant.opening_time.hour
+    last_hour = max(restaurant.closing_time.hour, first_hour)
+    hours = sorted(
+        set(range(first_hour, last_hour + 1))
+        | {hour for _, hour in totals}
+    )
+    occurrences = weekday_counts(start, end)
+    busiest = max(totals.values(), default=0)
+    heatmap = {
+        'hours': hours,
+        'busiest': busiest,
+        'rows': [
+            (name, [
+                {
+                    'total': totals.get((weekday, hour), 0),
+                    'average': round(
+                        totals.get((weekday, hour), 0)
+                        / max(occurrences[weekday], 1), 1
+                    ),
+                    'intensity': round(
+                        totals.get((weekday, hour), 0) / busiest, 2
+                    ) if busiest else 0,
+                }
+                for hour in hours
+            ])
+            for weekday, name in enumerate(WEEKDAYS)
+        ],
+    }
+    cache.set(key, heatmap, REPORT_CACHE_TIMEOUT)
+    return heatmap
@@ -0,0 +1,128 @@
+"""Per-restaurant opening schedules, compiled once and cached.
+
+A schedule is a small tuple-only structure::
+
+    {
+        'weekly': ((540, 1320),) * 7,   # opening periods per weekday
+        'closures': ((739000, 739002),) # inclusive date ordinal ranges
+    }
+
+with times as minutes after midnight. It is built from a restaurant's
+``OpeningHours`` and ``Closure`` rows (falling back to ``opening_time`` and
+``closing_time``), cached until one of them changes, and every check below
+works on it without touching the database.
+"""
+from bisect import bisect_right
+from datetime import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Closure, OpeningHours, Restaurant
+
+SCHEDULE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def _daily(opens, closes):
+    return {
+        'weekly': (((to_minutes(opens), to_minutes(closes)),),) * 7,
+        'closures': (),
+    }
+
+
+# Used by forms that are not tied to a restaurant yet.
+DEFAULT_SCHEDULE = _daily(
+    Restaurant._meta.get_field('opening_time').get_default(),
+    Restaurant._meta.get_field('closing_time').get_default(),
+)
+
+
+def compile_schedule(restaurant_id):
+    """Build the schedule of a restaurant from the database."""
+    restaurant = Restaurant.objects.filter(pk=restaurant_id).values(
+        'opening_time', 'closing_time'
+    ).first()
+    if restaurant is None:
+        return DEFAULT_SCHEDULE
+    schedule = _daily(restaurant['opening_time'], restaurant['closing_time'])
+
+    hours = OpeningHours.objects.filter(
+        restaurant_id=restaurant_id
+    ).values_list('weekday', 'opens', 'closes')
+    weekly = [[] for _ in range(7)]
+    for weekday, opens, closes in hours:
+        weekly[weekday].append((to_minutes(opens), to_minutes(closes)))
+    if any(weekly):
+        schedule['weekly'] = tuple(tuple(sorted(day)) for day in weekly)
+
+    closures = Closure.objects.filter(
+        restaurant_id=restaurant_id,
+        end_date__gte=timezone.localdate(),
+    ).order_by('start_date').values_list('start_date', 'end_date')
+    schedule['closures'] = tuple(
+        (start.toordinal(), end.toordinal()) for start, end in closures
+    )
+    return schedule
+
+
+def cache_key(restaurant_id):
+    return f'schedule:{restaurant_id}'
+
+
+def get_schedule(restaurant_id):
+    """Return the cached schedule, compiling it on a miss."""
+    key = cache_key(restaurant_id)
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = compile_schedule(restaurant_id)
+        cache.set(key, schedule, SCHEDULE_CACHE_TIMEOUT)
+    return schedule
+
+
+def forget_schedule(restaurant_id):
+    """Drop a restaurant's cached schedule once the change commits."""
+    transaction.on_commit(lambda: cache.delete(cache_key(restaurant_id)))
+
+
+def is_closure(schedule, day):
+    ordinal = day.toordinal()
+    closures = schedule['closures']
+    # Sorted by start date: only ranges starting by ``day`` can cover it.
+    started = closures[:bisect_right(closures, (ordinal, float('inf')))]
+    return any(end >= ordinal for _, end in started)
+
+
+def opening_periods(schedule, day):
+    """Opening periods on ``day``, as (opens, closes) minutes."""
+    if is_closure(schedule, day):
+        return ()
+    return schedule['weekly'][day.weekday()]
+
+
+def time_bounds(schedule):
+    """Earliest opening and latest closing time over the week."""
+    periods = [period for day in schedule['weekly'] for period in day]
+    if not periods:
+        return None, None
+    return (
+        to_time(min(opens for opens, _ in periods)),
+        to_time(max(closes for _, closes in periods)),
+    )
+
+
+def describe(periods):
+    """'12:00 and 15:00 or 18:00 and 22:00' for error messages."""
+    return ' or '.join(
+        f"{to_time(opens).strftime('%H:%M')} and "
+        f"{to_time(closes).strftime('%H:%M')}"
+        for opens, closes in periods
+    )
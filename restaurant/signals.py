@@ -0,0 +1,230 @@
+"""Keep data derived from bookings in step with the ``Booking`` table.
+
+``bookings_created``, ``bookings_updated`` and ``bookings_deleted`` are the
+single place where that bookkeeping happens. The model signals below call
+them for single saves and deletes; code that changes rows in bulk
+(``bulk_create``, ``BookingQuerySet.set_status`` and ``.delete``) calls
+them directly, inside the same transaction as the change. That makes the
+change-feed entries they write (``restaurant.outbox``) transactional with
+it.
+
+Changes to a restaurant, its opening hours or closures drop its cached
+schedule, changes to standing reservations its cached availability and
+changes to menu items or categories its cached menu (see the receivers at
+the end).
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import (
+    availability, booking_counts, ics, metrics, outbox, reminders, reports,
+    stats,
+)
+from .menu import forget_menu
+from .models import (
+    Booking, BookingEvent, BookingOutbox, Closure, MenuCategory, MenuItem,
+    OpeningHours, Restaurant, StandingReservation,
+)
+from .schedule import forget_schedule
+
+TRACKED_FIELDS = (
+    'restaurant_id', 'user_id', 'date', 'time', 'number_of_guests', 'status',
+    'table_id', 'time_slot_id', 'special_requests',
+)
+TRACKED = [Booking._meta.get_field(field) for field in TRACKED_FIELDS]
+
+
+def snapshot(booking):
+    """Tracked field values of a booking; deferred fields are not loaded."""
+    return {field: booking.__dict__.get(field) for field in TRACKED_FIELDS}
+
+
+def _to_python(bookings):
+    """Convert tracked values given as strings, such as ``time='19:00'``.
+
+    The bookkeeping below reads them as if loaded from the database.
+    """
+    for booking in bookings:
+        values = booking.__dict__
+        for field in TRACKED:
+            if field.attname in values:
+                values[field.attname] = field.to_python(values[field.attname])
+
+
+def _actor_id(booking):
+    """The user a view or admin action recorded as making the change."""
+    return getattr(getattr(booking, '_actor', None), 'pk', None)
+
+
+def _record_events(events):
+    if events:
+        BookingEvent.objects.bulk_create(events)
+
+
+def _update_events(booking):
+    before, after = booking._loaded, snapshot(booking)
+    events = []
+    if before['status'] != after['status']:
+        events.append(BookingEvent(
+            booking_id=booking.pk,
+            event_type=BookingEvent.STATUS_CHANGED,
+            from_status=before['status'] or '',
+            to_status=after['status'],
+            actor_id=_actor_id(booking)
+        ))
+    details = {
+        field: [before[field], after[field]]
+        for field in TRACKED_FIELDS
+        if field != 'status' and before[field] != after[field]
+    }
+    if details:
+        events.append(BookingEvent(
+            booking_id=booking.pk,
+            event_type=BookingEvent.UPDATED,
+            from_status=before['status'] or '',
+            to_status=after['status'],
+            actor_id=_actor_id(booking),
+            details=details
+        ))
+    return events
+
+
+def _forget_cached(bookings, previous=()):
+    """Invalidate caches showing ``bookings`` or their ``previous`` values."""
+    ics.forget_feeds(bookings)
+    reports.forget_reports(booking.restaurant_id for booking in bookings)
+    availability.forget_availability(
+        [(booking.restaurant_id, booking.date) for booking in bookings]
+        + [(values['restaurant_id'], values['date']) for values in previous]
+    )
+
+
+def bookings_created(bookings):
+    """Update everything derived from bookings after they are inserted."""
+    _to_python(bookings)
+    changes = [(None, snapshot(booking)) for booking in bookings]
+    stats.apply_changes(changes)
+    booking_counts.apply_changes(changes)
+    reminders.reschedule(
+        [booking for booking in bookings if booking.status == 'confirmed']
+    )
+    outbox.record(bookings, BookingOutbox.CREATED)
+    _record_events([
+        BookingEvent(
+            booking_id=booking.pk,
+            event_type=BookingEvent.CREATED,
+            to_status=booking.status,
+            actor_id=_actor_id(booking)
+        )
+        for booking in bookings
+    ])
+    for booking in bookings:
+        metrics.BOOKINGS_CREATED.labels(
+            restaurant=str(booking.restaurant_id)
+        ).inc()
+        booking._loaded = snapshot(booking)
+    _forget_cached(bookings)
+
+
+def bookings_updated(bookings):
+    """Update derived data after bookings are saved.
+
+    Each booking's ``_loaded`` still holds its values from before the
+    save; it is reset once the bookkeeping is done.
+    """
+    _to_python(bookings)
+    previous = [booking._loaded for booking in bookings]
+    changes = [
+        (values, snapshot(booking))
+        for booking, values in zip(bookings, previous)
+    ]
+    stats.apply_changes(changes)
+    booking_counts.apply_changes(changes)
+    reminders.reschedule([
+        booking for booking, (before, after) in zip(bookings, changes)
+        if any(
+            before[field] != after[field]
+            for field in reminders.SCHEDULE_FIELDS
+        )
+    ])
+    outbox.record(bookings, BookingOutbox.UPDATED)
+    _record_events([
+        event for booking in bookings for event in _update_events(booking)
+    ])
+    for booking in bookings:
+        if (
+            booking.status == 'cancelled'
+            and booking._loaded['status'] != 'cancelled'
+        ):
+            metrics.BOOKINGS_CANCELLED.labels(
+                restaurant=str(booking.restaurant_id)
+            ).inc()
+        booking._loaded = snapshot(booking)
+    _forget_cached(bookings, previous)
+
+
+def bookings_deleted(bookings):
+    """Update derived data after bookings are deleted."""
+    changes = [(booking._loaded, None) for booking in bookings]
+    stats.apply_changes(changes)
+    booking_counts.apply_changes(changes)
+    outbox.record(bookings, BookingOutbox.DELETED)
+    _record_events([
+        BookingEvent(
+            booking_id=booking.pk,
+            event_type=BookingEvent.DELETED,
+            from_status=booking._loaded['status'] or '',
+            actor_id=_actor_id(booking)
+        )
+        for booking in bookings
+    ])
+    _forget_cached(bookings)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_values(sender, instance, **kwargs):
+    """Keep the values the booking was loaded with to spot changes."""
+    instance._loaded = snapshot(instance)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    if created:
+        bookings_created([instance])
+    else:
+        bookings_updated([instance])
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    # BookingQuerySet.delete has done the bookkeeping for its rows.
+    if not getattr(instance, '_deleted_in_bulk', False):
+        bookings_deleted([instance])
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def restaurant_changed(sender, instance, **kwargs):
+    forget_schedule(instance.pk)
+
+
+@receiver(post_save, sender=OpeningHours)
+@receiver(post_delete, sender=OpeningHours)
+@receiver(post_save, sender=Closure)
+@receiver(post_delete, sender=Closure)
+def schedule_changed(sender, instance, **kwargs):
+    forget_schedule(instance.restaurant_id)
+
+
+@receiver(post_save, sender=StandingReservation)
+@receiver(post_delete, sender=StandingReservation)
+def standing_reservation_changed(sender, instance, **kwargs):
+    availability.forget_restaurant_availability(instance.restaurant_id)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+def menu_changed(sender, instance, **kwargs):
+    forget_menu(instance.restaurant_id)
@@ -0,0 +1,109 @@
+"""Capture slow SQL statements, with their query plans, as JSON lines.
+
+``SlowQueryMiddleware`` installs a ``SlowQueryLogger`` around every request.
+Statements that take longer than ``settings.SLOW_QUERY_THRESHOLD_MS`` are
+logged to the ``restaurant.slow_queries`` logger, which ``settings.LOGGING``
+sends to a rotating file. Only SELECT and WITH statements are logged with
+an EXPLAIN plan; entries for UPDATE, DELETE and other statements carry
+none.
+"""
+import json
+import logging
+import os
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_FRAMES = 8
+
+
+def _format_frames(frames):
+    base_dir = str(settings.BASE_DIR) + os.sep
+    return [
+        f"{frame.filename.replace(base_dir, '')}:{frame.lineno} "
+        f"in {frame.name}"
+        for frame in frames[-MAX_STACK_FRAMES:]
+    ]
+
+
+def _caller_stack():
+    """Return the frames that issued the query, innermost last.
+
+    Frames from this project are preferred; queries issued from the admin
+    have none, so fall back to the django.contrib frames.
+    """
+    stack = traceback.extract_stack()[:-3]
+    base_dir = str(settings.BASE_DIR)
+    project = [
+        frame for frame in stack
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    if project:
+        return _format_frames(project)
+    contrib = [
+        frame for frame in stack
+        if f'django{os.sep}contrib' in frame.filename
+    ]
+    return _format_frames(contrib)
+
+
+class SlowQueryLogger:
+    """Database execute wrapper that logs statements over a threshold."""
+
+    def __init__(self, connection, threshold_ms, request=None):
+        self.connection = connection
+        self.threshold_ms = threshold_ms
+        self.request = request
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.log(sql, params, many, duration_ms)
+        return result
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def explain(self, sql, params):
+        """Return the database's plan for ``sql``, or None if unavailable."""
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        prefix = self.connection.ops.explain_query_prefix()
+        self._explaining = True
+        try:
+            # The savepoint keeps a failed EXPLAIN from aborting the
+            # surrounding transaction on PostgreSQL.
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}', params)
+                    rows = cursor.fetchall()
+        except DatabaseError:
+            return None
+        finally:
+            self._explaining = False
+        return [' '.join(str(column) for column in row) for row in rows]
+
+    def log(self, sql, params, many, duration_ms):
+        entry = {
+            'timestamp': time.time(),
+            'database': self.connection.vendor,
+            'duration_ms': round(duration_ms, 3),
+            'view': self.view_name(),
+            'sql': sql,
+            'params': params,
+            'stack': _caller_stack(),
+            'explain': None if many else self.explain(sql, params),
+        }
+        logger.warning(json.dumps(entry, default=str))
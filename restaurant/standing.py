@@ -0,0 +1,72 @@
+"""Turn standing reservations into bookings inside a rolling horizon.
+
+Only occurrences up to the horizon become ``Booking`` rows; later ones are
+counted by the availability lookup straight from the reservation (see
+``availability.booked_covers``), so the bookings table never holds
+speculative rows years ahead.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking, StandingReservation
+from .schedule import get_schedule, opening_periods
+from .signals import bookings_created
+
+
+def expand_reservation(reservation, start, until):
+    """Create the bookings of one reservation from ``start`` to ``until``.
+
+    Days the restaurant is closed are skipped. Returns the new bookings.
+    """
+    schedule = get_schedule(reservation.restaurant_id)
+    with transaction.atomic():
+        existing = set(reservation.bookings.filter(
+            date__range=(start, until)
+        ).values_list('date', flat=True))
+        bookings = [
+            Booking(
+                user_id=reservation.user_id,
+                restaurant_id=reservation.restaurant_id,
+                table_id=reservation.table_id,
+                standing_reservation=reservation,
+                date=day,
+                time=reservation.time,
+                number_of_guests=reservation.number_of_guests,
+                special_requests=reservation.special_requests,
+                # Standing reservations are agreed with staff up front.
+                status='confirmed',
+            )
+            for day in reservation.occurrences(start, until)
+            if day not in existing and opening_periods(schedule, day)
+        ]
+        Booking.objects.bulk_create(bookings)
+        bookings_created(bookings)
+        StandingReservation.objects.filter(pk=reservation.pk).update(
+            expanded_until=until
+        )
+    return bookings
+
+
+def expand_standing_reservations(horizon_days, today=None):
+    """Expand every active reservation up to ``horizon_days`` ahead.
+
+    Returns the number of bookings created.
+    """
+    today = today or timezone.localdate()
+    until = today + timedelta(days=horizon_days)
+    reservations = StandingReservation.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=today),
+        Q(expanded_until__isnull=True) | Q(expanded_until__lt=until),
+        is_active=True,
+        start_date__lte=until,
+    )
+    created = 0
+    for reservation in reservations:
+        start = today
+        if reservation.expanded_until:
+            start = max(start, reservation.expanded_until + timedelta(days=1))
+        created += len(expand_reservation(reservation, start, until))
+    return created
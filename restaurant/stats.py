@@ -0,0 +1,112 @@
+"""Incremental maintenance of ``DailyBookingStats``.
+
+``apply_changes`` takes ``(before, after)`` pairs of booking field values
+(see ``signals.snapshot``), where ``before`` is None for a new booking and
+``after`` is None for a deleted one, and adds the difference to the stats
+row of each affected restaurant and day.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour
+
+from .models import Booking, DailyBookingStats
+
+STATUS_FIELDS = {
+    status: f'{status}_count' for status, _ in Booking.STATUS_CHOICES
+}
+
+
+def _add(deltas, values, sign):
+    delta = deltas[(values['restaurant_id'], values['date'])]
+    field = STATUS_FIELDS.get(values['status'])
+    if field:
+        delta[field] += sign
+    if values['status'] != 'cancelled':
+        covers = sign * values['number_of_guests']
+        delta['total_covers'] += covers
+        delta[str(values['time'].hour)] += covers
+
+
+def apply_changes(changes):
+    """Update the stats rows touched by ``changes``."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    added = set()
+    for before, after in changes:
+        if before is not None:
+            _add(deltas, before, -1)
+        if after is not None:
+            _add(deltas, after, 1)
+            added.add((after['restaurant_id'], after['date']))
+
+    for (restaurant_id, day), delta in sorted(deltas.items()):
+        delta = {key: value for key, value in delta.items() if value}
+        if not delta:
+            continue
+        with transaction.atomic():
+            rows = DailyBookingStats.objects.select_for_update()
+            if (restaurant_id, day) in added:
+                stats, _ = rows.get_or_create(
+                    restaurant_id=restaurant_id, date=day
+                )
+            else:
+                # Only removals: a missing row means the restaurant's stats
+                # are being deleted along with it, so leave them be.
+                stats = rows.filter(
+                    restaurant_id=restaurant_id, date=day
+                ).first()
+                if stats is None:
+                    continue
+            for key, value in delta.items():
+                if key.isdigit():
+                    covers = stats.hourly_covers.get(key, 0) + value
+                    if covers:
+                        stats.hourly_covers[key] = covers
+                    else:
+                        stats.hourly_covers.pop(key, None)
+                else:
+                    setattr(stats, key, getattr(stats, key) + value)
+            stats.peak_hour_covers = max(
+                stats.hourly_covers.values(), default=0
+            )
+            stats.save()
+
+
+def compute_stats(*sources):
+    """Build unsaved stats rows from two GROUP BYs per source.
+
+    Each source is a queryset of ``Booking`` or ``ArchivedBooking`` rows.
+    """
+    rows = {}
+
+    def row(restaurant_id, day):
+        key = (restaurant_id, day)
+        if key not in rows:
+            rows[key] = DailyBookingStats(
+                restaurant_id=restaurant_id, date=day, hourly_covers={}
+            )
+        return rows[key]
+
+    for bookings in sources:
+        bookings = bookings.order_by()
+        by_status = bookings.values_list(
+            'restaurant_id', 'date', 'status'
+        ).annotate(count=Count('id'), covers=Sum('number_of_guests'))
+        for restaurant_id, day, status, count, covers in by_status:
+            stats = row(restaurant_id, day)
+            if status in STATUS_FIELDS:
+                field = STATUS_FIELDS[status]
+                setattr(stats, field, getattr(stats, field) + count)
+            if status != 'cancelled':
+                stats.total_covers += covers
+
+        by_hour = bookings.exclude(status='cancelled').values_list(
+            'restaurant_id', 'date', ExtractHour('time')
+        ).annotate(covers=Sum('number_of_guests'))
+        for restaurant_id, day, hour, covers in by_hour:
+            hourly = row(restaurant_id, day).hourly_covers
+            hourly[str(hour)] = hourly.get(str(hour), 0) + covers
+    for stats in rows.values():
+        stats.peak_hour_covers = max(stats.hourly_covers.values(), default=0)
+    return list(rows.values())
@@ -0,0 +1,168 @@
+"""Seat large parties on a combination of joinable tables.
+
+Tables that can be pushed together are linked through
+``Table.joinable_with``. A combination is a connected group of such tables
+that are all free at the requested time; ``find_combination`` looks for the
+one with the fewest tables, then the fewest empty seats.
+"""
+from heapq import nlargest
+
+from django.conf import settings
+
+from .models import Booking, Restaurant, Table
+from .schedule import to_minutes, to_time
+
+
+def _totals(capacities, max_tables):
+    """Seat totals reachable with exactly n tables, for n up to max."""
+    reach = [{0}] + [set() for _ in range(max_tables)]
+    for seats in capacities.values():
+        for n in range(max_tables, 0, -1):
+            reach[n] |= {total + seats for total in reach[n - 1]}
+    return reach
+
+
+def _search(capacities, neighbours, guests, size, best_extra, least_waste):
+    """Best connected group of exactly ``size`` tables, or None.
+
+    A depth-first branch and bound: groups grow through their neighbours,
+    larger tables first so a fit turns up early; every partial group is
+    remembered so no group is explored twice, and a branch is cut when
+    the largest tables could not fill it up to ``guests`` or when even
+    the smallest tables would waste at least as many seats as the best
+    fit found so far. The search stops as soon as a group leaves only
+    ``least_waste`` seats empty, the best any ``size`` tables could do.
+    """
+    smallest = min(capacities.values())
+    seen = set()
+    best = {'waste': None, 'group': None}
+
+    def extend(group, seats, frontier):
+        remaining = size - len(group)
+        if remaining == 0:
+            if seats >= guests and (
+                best['waste'] is None or seats - guests < best['waste']
+            ):
+                best['waste'], best['group'] = seats - guests, group
+            return
+        if seats + best_extra[remaining] < guests:
+            return
+        if best['waste'] is not None and (
+            seats + smallest * remaining - guests >= best['waste']
+        ):
+            return
+        for pk in sorted(frontier, key=lambda pk: (-capacities[pk], pk)):
+            bigger = group | {pk}
+            if bigger in seen:
+                continue
+            seen.add(bigger)
+            extend(
+                bigger,
+                seats + capacities[pk],
+                (frontier | neighbours[pk]) - bigger
+            )
+            if best['waste'] == least_waste:
+                return
+
+    for pk in sorted(capacities, key=lambda pk: (-capacities[pk], pk)):
+        extend(frozenset([pk]), capacities[pk], neighbours[pk])
+        if best['waste'] == least_waste:
+            break
+    return sorted(best['group']) if best['group'] else None
+
+
+def find_combination(capacities, neighbours, guests, max_tables=None):
+    """Smallest connected group of tables seating ``guests``, or None.
+
+    ``capacities`` maps table id to seats and ``neighbours`` maps table id
+    to the ids it can be joined with; both should only hold free tables.
+    Group sizes are tried from the fewest tables that could possibly seat
+    the party upwards, so the first size with a fit is the answer and
+    the search below it is bounded by that exact size.
+    """
+    max_tables = max_tables or settings.MAX_JOINED_TABLES
+    fitting = [pk for pk, seats in capacities.items() if seats >= guests]
+    if fitting:
+        return [min(fitting, key=lambda pk: (capacities[pk], pk))]
+
+    ordered = nlargest(max_tables, capacities.values())
+    # best_extra[n]: most seats any n tables could add.
+    best_extra = [sum(ordered[:n]) for n in range(max_tables + 1)]
+    totals = _totals(capacities, max_tables)
+    for size in range(2, max_tables + 1):
+        enough = [total for total in totals[size] if total >= guests]
+        if not enough:
+            continue
+        group = _search(
+            capacities, neighbours, guests, size, best_extra,
+            least_waste=min(enough) - guests
+        )
+        if group:
+            return group
+    return None
+
+
+def busy_tables(restaurant_id, day, start, exclude=None, claimed=()):
+    """Ids of tables held by bookings overlapping a booking at ``start``.
+
+    ``claimed`` holds ``(day, start, table_ids)`` of bookings that are not
+    saved yet, such as the earlier ones of a batch.
+    """
+    minutes = to_minutes(start)
+    duration = settings.BOOKING_DURATION_MINUTES
+    overlapping = Booking.objects.filter(
+        restaurant_id=restaurant_id, date=day
+    ).exclude(status='cancelled')
+    if minutes - duration >= 0:
+        overlapping = overlapping.filter(time__gt=to_time(minutes - duration))
+    if minutes + duration < 24 * 60:
+        overlapping = overlapping.filter(time__lt=to_time(minutes + duration))
+    if exclude is not None:
+        overlapping = overlapping.exclude(pk=exclude)
+    busy = set(overlapping.exclude(
+        table__isnull=True
+    ).values_list('table_id', flat=True))
+    busy.update(Booking.joined_tables.through.objects.filter(
+        booking__in=overlapping
+    ).values_list('table_id', flat=True))
+    for held_day, held_start, table_ids in claimed:
+        apart = abs(to_minutes(held_start) - minutes)
+        if held_day == day and apart < duration:
+            busy.update(table_ids)
+    return busy
+
+
+def free_tables(restaurant_id, busy=()):
+    """Capacities and join links of a restaurant's free, active tables."""
+    capacities = dict(Table.objects.filter(
+        restaurant_id=restaurant_id, is_active=True
+    ).exclude(pk__in=busy).values_list('pk', 'capacity'))
+    neighbours = {pk: set() for pk in capacities}
+    links = Table.joinable_with.through.objects.filter(
+        from_table__in=list(capacities), to_table__in=list(capacities)
+    ).values_list('from_table_id', 'to_table_id')
+    for from_id, to_id in links:
+        neighbours[from_id].add(to_id)
+    return capacities, neighbours
+
+
+def combination_for(restaurant_id, day, start, guests, exclude=None,
+                    claimed=()):
+    """Table ids to seat ``guests`` at ``start`` on ``day``, or None."""
+    busy = busy_tables(restaurant_id, day, start, exclude, claimed)
+    capacities, neighbours = free_tables(restaurant_id, busy)
+    return find_combination(capacities, neighbours, guests)
+
+
+def lock_restaurants(restaurant_ids):
+    """Hold the restaurants' rows until the transaction ends.
+
+    Tables are picked from the bookings already saved, so bookings at the
+    same restaurant have to pick and save theirs one after another.
+    """
+    list(
+        Restaurant.objects.select_for_update()
+        .filter(pk__in=restaurant_ids)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
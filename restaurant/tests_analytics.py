@@ -0,0 +1,144 @@
+import json
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import date, datetime, time
+from restaurant.analytics import analyse, booking_analytics, load_columns
+from restaurant.models import ArchivedBooking, Booking, Restaurant
+
+
+def at(day):
+    return timezone.make_aware(datetime.combine(day, time(12, 0)))
+
+
+class BookingAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com',
+            capacity=40
+        )
+        self.other = Restaurant.objects.create(
+            name='Other Restaurant',
+            address='456 Test St',
+            contact_number='0987654321',
+            email='other@test.com'
+        )
+        self.monday = date(2025, 1, 6)
+        self.tuesday = date(2025, 1, 7)
+        for restaurant, day, start, guests, status, booked_on in [
+            (self.restaurant, self.monday, time(19, 0), 4, 'confirmed',
+             date(2025, 1, 1)),
+            (self.restaurant, self.monday, time(20, 0), 2, 'no_show',
+             self.monday),
+            (self.restaurant, self.tuesday, time(19, 0), 6, 'cancelled',
+             date(2024, 12, 7)),
+            (self.other, self.monday, time(12, 0), 3, 'pending',
+             date(2025, 1, 4)),
+        ]:
+            booking = Booking.objects.create(
+                user=self.user,
+                restaurant=restaurant,
+                date=day,
+                time=start,
+                number_of_guests=guests,
+                status=status
+            )
+            Booking.objects.filter(pk=booking.pk).update(
+                created_at=at(booked_on)
+            )
+        ArchivedBooking.objects.create(
+            id=10000,
+            user=self.user,
+            restaurant=self.restaurant,
+            date=self.tuesday,
+            time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed',
+            created_at=at(date(2025, 1, 6)),
+            updated_at=at(date(2025, 1, 6))
+        )
+        self.today = date(2025, 2, 1)
+
+    def test_columns_are_read_in_chunks(self):
+        sources = (Booking.objects.all(), ArchivedBooking.objects.all())
+        whole = load_columns(*sources)
+        chunked = load_columns(*sources, chunk_size=2)
+        self.assertEqual(len(whole['day']), 5)
+        for name, values in whole.items():
+            self.assertEqual(
+                sorted(values.tolist()), sorted(chunked[name].tolist())
+            )
+        self.assertEqual(
+            sorted(whole['lead'].tolist()), [0, 1, 2, 5, 31]
+        )
+        self.assertIn(self.monday.toordinal(), whole['day'].tolist())
+        self.assertIn(19 * 60, whole['minute'].tolist())
+
+    def test_rates_and_lead_times(self):
+        report = booking_analytics(today=self.today)
+        self.assertEqual(
+            [row['restaurant_id'] for row in report],
+            sorted([self.restaurant.id, self.other.id])
+        )
+        row = report[[r['restaurant_id'] for r in report].index(
+            self.restaurant.id
+        )]
+        self.assertEqual(row['bookings'], 4)
+        self.assertEqual(row['cancellation_rate'], 0.25)
+        self.assertEqual(row['no_show_rate'], 0.3333)
+        self.assertEqual(row['lead_time']['median_days'], 1)
+        self.assertEqual(row['lead_time']['p90_days'], 5)
+        self.assertEqual(
+            [(b['from_days'], b['bookings'])
+             for b in row['lead_time']['histogram'] if b['bookings']],
+            [(0, 1), (1, 1), (4, 1), (31, 1)]
+        )
+
+    def test_occupancy_curve(self):
+        report = booking_analytics(
+            restaurants=[self.restaurant.id], today=self.today
+        )
+        self.assertEqual(len(report), 1)
+        # Monday: 4 covers 19:00-21:00 and 2 covers 20:00-22:00; Tuesday:
+        # 2 covers 19:00-21:00. Averaged over the two days.
+        self.assertEqual(
+            [(slot['time'], slot['covers'], slot['share'])
+             for slot in report[0]['occupancy']],
+            [
+                ('19:00', 3.0, 0.075), ('19:30', 3.0, 0.075),
+                ('20:00', 4.0, 0.1), ('20:30', 4.0, 0.1),
+                ('21:00', 1.0, 0.025), ('21:30', 1.0, 0.025),
+            ]
+        )
+
+    def test_future_bookings_are_not_no_show_candidates(self):
+        report = booking_analytics(
+            restaurants=[self.restaurant.id], today=self.tuesday
+        )
+        self.assertEqual(report[0]['no_show_rate'], 0.5)
+
+    def test_no_bookings(self):
+        self.assertEqual(
+            analyse(load_columns(Booking.objects.none()), {}, self.today),
+            []
+        )
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'booking_analytics', '--restaurant', str(self.other.id),
+            '--start', '2025-01-01', stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]['bookings'], 1)
+        self.assertEqual(report[0]['occupancy'][0]['time'], '12:00')
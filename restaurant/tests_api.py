@@ -0,0 +1,167 @@
+import json
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import datetime, timedelta
+from restaurant.models import Restaurant, Booking
+
+
+class BookingApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.tomorrow = timezone.now().date() + timedelta(days=1)
+        self.booking = Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=self.tomorrow,
+            time=datetime.strptime('19:00', '%H:%M').time(),
+            number_of_guests=2
+        )
+        self.list_url = reverse('api_booking_list')
+        self.detail_url = reverse(
+            'api_booking_detail', args=[self.booking.id]
+        )
+
+    def booking_data(self, **overrides):
+        data = {
+            'restaurant': self.restaurant.id,
+            'date': self.tomorrow.isoformat(),
+            'time': '18:30',
+            'number_of_guests': 4,
+        }
+        data.update(overrides)
+        return data
+
+    def post_json(self, data):
+        return self.client.post(
+            self.list_url,
+            json.dumps(data),
+            content_type='application/json'
+        )
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_only_own_bookings(self):
+        other = User.objects.create_user(username='other', password='x12345')
+        Booking.objects.create(
+            user=other,
+            restaurant=self.restaurant,
+            date=self.tomorrow,
+            time=datetime.strptime('12:00', '%H:%M').time(),
+            number_of_guests=2
+        )
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        bookings = response.json()['bookings']
+        self.assertEqual([b['id'] for b in bookings], [self.booking.id])
+        self.assertEqual(bookings[0]['time'], '19:00')
+
+    def test_list_conditional_get(self):
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        # Session, user and one aggregate; the bookings are not loaded.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.list_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.booking.number_of_guests = 3
+        self.booking.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_conditional_get(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.booking.id)
+        response = self.client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_of_other_user_not_found(self):
+        other = User.objects.create_user(username='other', password='x12345')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_create_single(self):
+        response = self.post_json(self.booking_data())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['number_of_guests'], 4)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_batch_create(self):
+        response = self.post_json([
+            self.booking_data(time=f'{hour}:00') for hour in (12, 13, 14)
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['bookings']), 3)
+        self.assertEqual(
+            Booking.objects.filter(user=self.user).count(), 4
+        )
+
+    def test_batch_create_is_all_or_nothing(self):
+        response = self.post_json([
+            self.booking_data(),
+            self.booking_data(number_of_guests=40),
+            self.booking_data(restaurant=999),
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual([e['index'] for e in errors], [1, 2])
+        self.assertIn('number_of_guests', errors[0]['errors'])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_invalid_json(self):
+        response = self.client.post(
+            self.list_url, 'not json', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_update(self):
+        response = self.client.patch(
+            self.detail_url,
+            json.dumps({'number_of_guests': 5}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.number_of_guests, 5)
+        self.assertEqual(
+            self.booking.time, datetime.strptime('19:00', '%H:%M').time()
+        )
+
+    def test_update_invalid(self):
+        response = self.client.patch(
+            self.detail_url,
+            json.dumps({'number_of_guests': 0}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel(self):
+        response = self.client.delete(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'cancelled')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
@@ -0,0 +1,114 @@
+from io import StringIO
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from datetime import date, time
+from restaurant.models import (
+    Restaurant, Booking, BookingEvent, ArchivedBooking, DailyBookingStats,
+    Table
+)
+
+
+class ArchiveBookingsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+
+    def book(self, day, guests=2, status='confirmed'):
+        return Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=day,
+            time=time(19, 0),
+            number_of_guests=guests,
+            status=status
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_bookings', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_bookings_in_chunks(self):
+        old = [self.book(date(2020, 1, day)) for day in range(1, 6)]
+        recent = self.book(date(2020, 6, 1))
+        output = self.archive('--before', '2020-03-01', '--chunk-size', '2')
+        self.assertIn('Archived 5 booking(s)', output)
+        self.assertEqual(list(Booking.objects.all()), [recent])
+        self.assertEqual(
+            sorted(ArchivedBooking.objects.values_list('id', flat=True)),
+            [booking.id for booking in old]
+        )
+        archived = ArchivedBooking.objects.get(id=old[0].id)
+        self.assertEqual(archived.status, 'confirmed')
+        self.assertEqual(archived.created_at, old[0].created_at)
+
+    def test_archiving_keeps_stats_and_history(self):
+        booking = self.book(date(2020, 1, 1), guests=4)
+        self.archive('--before', '2020-03-01')
+        stats = DailyBookingStats.objects.get(date=date(2020, 1, 1))
+        self.assertEqual(stats.total_covers, 4)
+        self.assertEqual(
+            list(BookingEvent.objects.filter(
+                booking_id=booking.id
+            ).values_list('event_type', flat=True)),
+            ['created']
+        )
+
+    def test_rebuild_stats_includes_archived(self):
+        self.book(date(2020, 1, 1), guests=4)
+        self.book(date(2020, 1, 1), guests=3)
+        self.archive('--before', '2020-03-01')
+        self.book(date(2020, 1, 1), guests=2)
+        call_command('rebuild_stats', stdout=StringIO())
+        stats = DailyBookingStats.objects.get(date=date(2020, 1, 1))
+        self.assertEqual(stats.confirmed_count, 3)
+        self.assertEqual(stats.hourly_covers, {'19': 9})
+        self.assertEqual(stats.peak_hour_covers, 9)
+
+    def test_archives_bookings_on_joined_tables(self):
+        tables = [
+            Table.objects.create(
+                restaurant=self.restaurant, table_number=number, capacity=4
+            )
+            for number in (1, 2, 3)
+        ]
+        booking = self.book(date(2020, 1, 1), guests=12)
+        booking.table = tables[0]
+        booking.save()
+        booking.joined_tables.set(tables[1:])
+        output = self.archive('--before', '2020-03-01')
+        self.assertIn('Archived 1 booking(s)', output)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Booking.joined_tables.through.objects.exists())
+        archived = ArchivedBooking.objects.get(id=booking.id)
+        self.assertEqual(archived.table_id, tables[0].id)
+        self.assertEqual(
+            archived.joined_table_ids, [table.id for table in tables[1:]]
+        )
+
+    def test_rejects_future_cutoff(self):
+        with self.assertRaises(CommandError):
+            self.archive('--before', '2999-01-01')
+
+    def test_my_bookings_shows_archive_on_demand(self):
+        self.book(date(2020, 1, 1))
+        self.archive('--before', '2020-03-01')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('my_bookings'), {'tab': 'past'})
+        self.assertIsNone(response.context['archived_bookings'])
+        self.assertContains(response, 'Show older bookings')
+        response = self.client.get(reverse('my_bookings'), {'archived': '1'})
+        self.assertEqual(len(response.context['archived_bookings']), 1)
+        self.assertContains(response, 'Test Restaurant')
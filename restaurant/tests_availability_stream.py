@@ -0,0 +1,181 @@
+import asyncio
+import json
+import re
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, Client, AsyncClient, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from restaurant import availability_stream
+from restaurant.availability import available_times, remaining_seats
+from restaurant.availability_stream import Notifier, events
+from restaurant.models import Booking, Restaurant
+
+
+def parse(message):
+    event, data = message.strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+@override_settings(AVAILABILITY_STREAM_POLL_SECONDS=3600)
+class AvailabilityStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com',
+            opening_time=time(12, 0),
+            closing_time=time(20, 0),
+            capacity=10
+        )
+        self.other = Restaurant.objects.create(
+            name='Other Restaurant',
+            address='456 Test St',
+            contact_number='0987654321',
+            email='other@test.com'
+        )
+        self.day = timezone.localdate() + timedelta(days=7)
+        self.url = reverse(
+            'restaurant_availability_stream', args=[self.restaurant.id]
+        )
+
+    def book(self, restaurant=None, start=time(13, 0), guests=4):
+        return Booking.objects.create(
+            user=self.user,
+            restaurant=restaurant or self.restaurant,
+            date=self.day,
+            time=start,
+            number_of_guests=guests,
+            status='confirmed'
+        )
+
+    def test_remaining_seats(self):
+        self.book()
+        seats = dict(remaining_seats(self.restaurant, self.day))
+        self.assertEqual(seats[time(12, 0)], 6)
+        self.assertEqual(seats[time(13, 0)], 6)
+        self.assertEqual(seats[time(16, 0)], 10)
+        self.assertEqual(seats[time(20, 0)], 10)
+        times = available_times(self.restaurant, self.day, guests=7)
+        self.assertNotIn(time(12, 0), times)
+        self.assertIn(time(16, 0), times)
+
+    async def test_subscribers_get_only_what_changed(self):
+        notifier = Notifier()
+        streams = [events(self.restaurant, self.day, notifier)
+                   for _ in range(2)]
+        try:
+            for stream in streams:
+                event, data = parse(await anext(stream))
+                self.assertEqual(event, 'snapshot')
+                self.assertEqual(data['seats']['13:00'], 10)
+            await sync_to_async(self.book)()
+            await notifier.poll()
+            for stream in streams:
+                event, data = parse(await anext(stream))
+                self.assertEqual(event, 'delta')
+                self.assertEqual(data['date'], self.day.isoformat())
+                self.assertEqual(data['seats']['13:00'], 6)
+                self.assertNotIn('17:00', data['seats'])
+        finally:
+            for stream in streams:
+                await stream.aclose()
+        self.assertEqual(notifier.channels, {})
+        self.assertIsNone(notifier.task)
+
+    async def test_idle_stream_sends_keepalive(self):
+        notifier = Notifier()
+        stream = events(self.restaurant, self.day, notifier)
+        try:
+            await anext(stream)
+            with mock.patch.object(
+                availability_stream, 'KEEPALIVE_SECONDS', 0.01
+            ):
+                self.assertEqual(await anext(stream), ': keepalive\n\n')
+        finally:
+            await stream.aclose()
+
+    def test_poll_reads_only_changed_restaurants(self):
+        notifier = Notifier()
+        notifier.position = 0
+        channel = availability_stream.Channel(
+            self.restaurant, self.day,
+            availability_stream._seats(self.restaurant, self.day)
+        )
+        notifier.channels[(self.restaurant.id, self.day)] = channel
+        changed = channel.changed
+        self.book(restaurant=self.other)
+        with self.assertNumQueries(1):
+            async_to_sync(notifier.poll)()
+        self.assertFalse(changed.is_set())
+        self.book()
+        # The outbox, then the day's bookings and standing reservations.
+        with self.assertNumQueries(3):
+            async_to_sync(notifier.poll)()
+        self.assertTrue(changed.is_set())
+        self.assertEqual(channel.seats['13:00'], 6)
+
+    def test_benchmark_queries_do_not_grow_with_subscribers(self):
+        self.book(start=time(12, 0), guests=2)
+        remaining_seats(self.restaurant, self.day)
+        queries = {}
+        for subscribers in (1, 1000):
+            out = StringIO()
+            call_command(
+                'benchmark_availability_stream',
+                subscribers=subscribers,
+                restaurant=self.restaurant.id,
+                date=self.day,
+                stdout=out
+            )
+            self.assertIn(
+                f'One booking reached {subscribers} stream(s)',
+                out.getvalue()
+            )
+            queries[subscribers] = re.findall(
+                r'with (\d+) queries', out.getvalue()
+            )
+        self.assertEqual(queries[1], queries[1000])
+        # The benchmark's booking was rolled back.
+        self.assertEqual(Booking.objects.count(), 1)
+
+    async def test_stream_view(self):
+        notifier = Notifier()
+        with mock.patch.object(availability_stream, 'notifier', notifier):
+            response = await AsyncClient().get(
+                self.url, {'date': self.day.isoformat()}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            content = response.streaming_content
+            event, data = parse((await anext(content)).decode())
+            self.assertEqual(event, 'snapshot')
+            self.assertEqual(data['seats']['12:00'], 10)
+            # A client going away cancels the wait for the next event.
+            following = asyncio.ensure_future(anext(content))
+            await asyncio.sleep(0)
+            following.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await following
+        self.assertEqual(notifier.channels, {})
+
+    def test_stream_view_refusals(self):
+        client = Client()
+        day = self.day.isoformat()
+        # Without an ASGI server the browser is told to stop reconnecting.
+        self.assertEqual(client.get(self.url, {'date': day}).status_code, 204)
+        self.assertEqual(client.get(self.url, {'date': 'x'}).status_code, 400)
+        missing = reverse('restaurant_availability_stream', args=[999])
+        self.assertEqual(client.get(missing, {'date': day}).status_code, 404)
@@ -0,0 +1,153 @@
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import date, time, timedelta
+from restaurant import booking_counts
+from restaurant.models import Booking, Restaurant, UserBookingCounts
+
+
+def counts(user):
+    row = booking_counts.get_counts(user.pk)
+    return row.upcoming_count, row.past_count, row.cancelled_count
+
+
+class BookingCountsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.today = timezone.localdate()
+
+    def book(self, days, user=None, status='confirmed'):
+        return Booking.objects.create(
+            user=user or self.user,
+            restaurant=self.restaurant,
+            date=self.today + timedelta(days=days),
+            time=time(19, 0),
+            number_of_guests=2,
+            status=status
+        )
+
+    def test_counts_follow_booking_changes(self):
+        self.assertEqual(counts(self.user), (0, 0, 0))
+        upcoming = self.book(3)
+        self.book(0)
+        self.book(-2)
+        self.book(5, status='cancelled')
+        self.book(1, user=self.other)
+        self.assertEqual(counts(self.user), (2, 1, 1))
+
+        upcoming.status = 'cancelled'
+        upcoming.save()
+        self.assertEqual(counts(self.user), (1, 1, 2))
+        upcoming.status = 'confirmed'
+        upcoming.date = self.today - timedelta(days=1)
+        upcoming.save()
+        self.assertEqual(counts(self.user), (1, 2, 1))
+        upcoming.user = self.other
+        upcoming.save()
+        self.assertEqual(counts(self.user), (1, 1, 1))
+        self.assertEqual(counts(self.other), (1, 1, 0))
+        upcoming.delete()
+        self.assertEqual(counts(self.other), (1, 0, 0))
+
+    def test_changes_are_applied_without_recounting(self):
+        counts(self.user)
+        with mock.patch.object(
+            booking_counts, 'recount', wraps=booking_counts.recount
+        ) as recount:
+            self.book(2)
+            self.book(-2)
+            self.assertEqual(counts(self.user), (1, 1, 0))
+        recount.assert_not_called()
+
+    def test_recounted_on_a_new_day(self):
+        self.book(1)
+        self.book(-1)
+        self.assertEqual(counts(self.user), (1, 1, 0))
+        tomorrow = self.today + timedelta(days=1)
+        with mock.patch.object(
+            timezone, 'localdate', return_value=tomorrow + timedelta(days=1)
+        ):
+            self.assertEqual(counts(self.user), (0, 2, 0))
+        row = UserBookingCounts.objects.get(user=self.user)
+        self.assertEqual(row.counted_on, tomorrow + timedelta(days=1))
+
+    def test_archiving_forgets_counts(self):
+        Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=date(2020, 1, 1),
+            time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+        self.assertEqual(counts(self.user), (0, 1, 0))
+        call_command(
+            'archive_bookings', '--before', '2020-03-01', stdout=StringIO()
+        )
+        self.assertEqual(counts(self.user), (0, 0, 0))
+
+    def test_tabs(self):
+        later, sooner = self.book(5), self.book(1)
+        older, old = self.book(-1), self.book(-4)
+        cancelled = self.book(2, status='cancelled')
+        self.client.login(username='testuser', password='testpass123')
+        for tab, expected in [
+            (None, [sooner, later]),
+            ('upcoming', [sooner, later]),
+            ('past', [older, old]),
+            ('cancelled', [cancelled]),
+            ('bogus', [sooner, later]),
+        ]:
+            response = self.client.get(
+                reverse('my_bookings'), {'tab': tab} if tab else {}
+            )
+            self.assertEqual(list(response.context['bookings']), expected)
+        self.assertContains(response, 'Cancelled')
+
+    def test_counts_cost_no_count_queries(self):
+        self.book(1)
+        self.book(-1)
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('my_bookings'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('my_bookings'))
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+        self.assertEqual(
+            sum('restaurant_userbookingcounts' in query['sql']
+                for query in queries.captured_queries),
+            1
+        )
+        self.assertEqual(response.context['booking_counts'].upcoming_count, 1)
+        self.assertContains(response, 'My Bookings')
+
+    def test_anonymous_pages_skip_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('restaurant_list'))
+        self.assertNotIn('booking_counts', response.context)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'restaurant_userbookingcounts' in query['sql']
+        ])
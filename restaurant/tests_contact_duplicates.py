@@ -0,0 +1,83 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from restaurant.forms import ContactForm
+from restaurant.models import Contact, contact_fingerprint
+
+
+class ContactDuplicateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.data = {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'subject': 'Test Subject',
+            'message': 'Test Message'
+        }
+
+    def submit(self, **overrides):
+        form = ContactForm(data=dict(self.data, **overrides))
+        self.assertTrue(form.is_valid())
+        return form.save()
+
+    def test_fingerprint_normalises_case_and_spacing(self):
+        self.assertEqual(
+            contact_fingerprint('A@Example.com', 'Hi  there', 'Hello\n'),
+            contact_fingerprint('a@example.com', 'hi there', ' hello')
+        )
+        self.assertNotEqual(
+            contact_fingerprint('a@example.com', 'hi', 'hello'),
+            contact_fingerprint('a@example.com', 'hi', 'goodbye')
+        )
+
+    def test_duplicate_merged(self):
+        first = self.submit()
+        second = self.submit(message='  TEST   message ')
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertEqual(Contact.objects.get().duplicate_count, 2)
+
+    def test_different_message_not_merged(self):
+        self.submit()
+        self.submit(message='Another message')
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_outside_window_not_merged(self):
+        first = self.submit()
+        Contact.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        self.submit()
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_recent_hash_answered_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit()
+        # One UPDATE; no lookup on the fingerprint index.
+        with self.assertNumQueries(1):
+            self.submit()
+        self.assertEqual(Contact.objects.get().duplicate_count, 2)
+
+    def test_stale_cache_entry_falls_back_to_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit()
+        Contact.objects.all().delete()
+        self.submit()
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertEqual(Contact.objects.get().duplicate_count, 1)
+
+    @override_settings(CONTACT_DUPLICATE_WINDOW=0)
+    def test_zero_window_disables_merging(self):
+        self.submit()
+        self.submit()
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_contact_view_merges_flood(self):
+        for _ in range(3):
+            response = self.client.post(reverse('contact'), self.data)
+            self.assertRedirects(response, reverse('contact_success'))
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertEqual(Contact.objects.get().duplicate_count, 3)
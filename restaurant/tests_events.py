@@ -0,0 +1,177 @@
+import csv
+import io
+from asgiref.sync import sync_to_async
+from django.test import TestCase, Client, AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import RequestFactory
+from datetime import date, time
+from restaurant.admin import BookingAdmin
+from restaurant.models import Restaurant, Booking, BookingEvent
+
+
+class BookingEventTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.staff = User.objects.create_user(
+            username='staff',
+            password='staffpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+
+    def book(self, **kwargs):
+        fields = {
+            'user': self.user,
+            'restaurant': self.restaurant,
+            'date': date(2030, 6, 1),
+            'time': time(19, 0),
+            'number_of_guests': 2,
+        }
+        fields.update(kwargs)
+        return Booking.objects.create(**fields)
+
+    def events(self, booking):
+        return list(booking.events.values_list(
+            'event_type', 'from_status', 'to_status', 'actor'
+        ))
+
+    def test_booking_view_records_creator(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(
+            reverse('book_restaurant', args=[self.restaurant.id]),
+            {
+                'date': '2030-06-01',
+                'time': '19:00',
+                'number_of_guests': 2,
+                'special_requests': '',
+            }
+        )
+        booking = Booking.objects.get()
+        self.assertEqual(
+            self.events(booking), [('created', '', 'pending', self.user.pk)]
+        )
+
+    def test_cancel_view_records_status_change(self):
+        booking = self.book()
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(reverse('delete_booking', args=[booking.id]))
+        self.assertEqual(self.events(booking)[-1], (
+            'status_changed', 'pending', 'cancelled', self.user.pk
+        ))
+
+    def test_update_records_changed_fields(self):
+        booking = self.book()
+        booking.number_of_guests = 4
+        booking.special_requests = 'Window seat'
+        booking.save()
+        event = booking.events.get(event_type='updated')
+        self.assertEqual(event.details, {
+            'number_of_guests': [2, 4],
+            'special_requests': [None, 'Window seat'],
+        })
+        self.assertIsNone(event.actor)
+
+    def test_history_outlives_booking(self):
+        booking = self.book()
+        booking_id = booking.id
+        booking.delete()
+        self.assertEqual(
+            list(BookingEvent.objects.filter(
+                booking_id=booking_id
+            ).values_list('event_type', flat=True)),
+            ['created', 'deleted']
+        )
+
+    def test_admin_action_writes_events_in_one_insert(self):
+        bookings = [self.book(time=time(hour, 0)) for hour in (12, 13, 14)]
+        request = RequestFactory().post('/')
+        request.user = self.staff
+        admin = BookingAdmin(Booking, site)
+        with CaptureQueriesContext(connection) as queries:
+            admin.approve_bookings(request, Booking.objects.all())
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith(
+                'INSERT INTO "restaurant_bookingevent"'
+            )
+        ]
+        self.assertEqual(len(inserts), 1)
+        for booking in bookings:
+            self.assertEqual(self.events(booking)[-1], (
+                'status_changed', 'pending', 'confirmed', self.staff.pk
+            ))
+
+    def test_admin_bulk_delete_records_actor(self):
+        bookings = [self.book(time=time(hour, 0)) for hour in (12, 13)]
+        request = RequestFactory().post('/')
+        request.user = self.staff
+        admin = BookingAdmin(Booking, site)
+        with CaptureQueriesContext(connection) as queries:
+            admin.delete_queryset(request, Booking.objects.all())
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith(
+                'INSERT INTO "restaurant_bookingevent"'
+            )
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse(Booking.objects.exists())
+        for booking in bookings:
+            self.assertEqual(self.events(booking)[-1], (
+                'deleted', 'pending', '', self.staff.pk
+            ))
+
+    def test_events_are_append_only(self):
+        event = self.book().events.get()
+        event.to_status = 'confirmed'
+        with self.assertRaises(ValidationError):
+            event.save()
+        with self.assertRaises(ValidationError):
+            event.delete()
+
+    def test_export_streams_csv(self):
+        first = self.book()
+        self.book(time=time(12, 0))
+        after = first.events.get().id
+        self.client.login(username='staff', password='staffpass123')
+        response = self.client.get(
+            reverse('export_booking_events'), {'after': after}
+        )
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        self.assertEqual(rows[0][:3], ['id', 'booking_id', 'event_type'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], 'created')
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await sync_to_async(self.book)()
+        client = AsyncClient()
+        await client.alogin(username='staff', password='staffpass123')
+        response = await client.get(reverse('export_booking_events'))
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response])
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], 'created')
+
+    def test_export_requires_staff(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('export_booking_events'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,95 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import datetime, timedelta
+from restaurant import ics
+from restaurant.models import Restaurant, Booking
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St, Dublin',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.booking = Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=timezone.now().date() + timedelta(days=1),
+            time=datetime.strptime('19:00', '%H:%M').time(),
+            number_of_guests=2,
+            special_requests='Window seat; please'
+        )
+        self.user_url = reverse(
+            'user_calendar', args=[ics.feed_token('user', self.user.pk)]
+        )
+        self.restaurant_url = reverse(
+            'restaurant_calendar',
+            args=[ics.feed_token('restaurant', self.restaurant.pk)]
+        )
+
+    def test_user_feed(self):
+        response = self.client.get(self.user_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'text/calendar; charset=utf-8'
+        )
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:booking-{self.booking.id}@', body)
+        self.assertIn('SUMMARY:Table at Test Restaurant', body)
+        self.assertIn('LOCATION:123 Test St\\, Dublin', body)
+        self.assertIn('DESCRIPTION:Window seat\\; please', body)
+        self.assertIn('STATUS:TENTATIVE', body)
+
+    def test_restaurant_feed(self):
+        response = self.client.get(self.restaurant_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:testuser - 2 guests', response.content.decode())
+
+    def test_bad_token(self):
+        response = self.client.get(
+            reverse('user_calendar', args=['user-1:forged'])
+        )
+        self.assertEqual(response.status_code, 404)
+        token = ics.feed_token('restaurant', self.user.pk)
+        response = self.client.get(reverse('user_calendar', args=[token]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_poll_served_from_cache(self):
+        self.client.get(self.user_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.user_url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_rebuilt_after_booking_change(self):
+        self.client.get(self.user_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = 'confirmed'
+            self.booking.save()
+        body = self.client.get(self.user_url).content.decode()
+        self.assertIn('STATUS:CONFIRMED', body)
+
+    def test_feed_rebuilt_after_bulk_status_change(self):
+        self.client.get(self.restaurant_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.all().set_status('cancelled')
+        body = self.client.get(self.restaurant_url).content.decode()
+        self.assertIn('STATUS:CANCELLED', body)
+
+    def test_long_lines_folded(self):
+        line = 'DESCRIPTION:' + 'é' * 100
+        folded = ics.fold(line)
+        for part in folded.split('\r\n'):
+            self.assertLessEqual(len(part.encode()), 75)
+        self.assertEqual(folded.replace('\r\n ', ''), line)
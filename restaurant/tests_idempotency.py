@@ -0,0 +1,148 @@
+import json
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from restaurant import api, views
+from restaurant.models import Booking, IdempotencyKey, Restaurant
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.tomorrow = timezone.now().date() + timedelta(days=1)
+        self.book_url = reverse('book_restaurant', args=[self.restaurant.id])
+        self.api_url = reverse('api_booking_list')
+
+    def form_data(self, **overrides):
+        data = {
+            'date': self.tomorrow.isoformat(),
+            'time': '19:00',
+            'number_of_guests': 2,
+            'special_requests': '',
+        }
+        data.update(overrides)
+        return data
+
+    def post_api(self, data, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post(
+            self.api_url, json.dumps(data),
+            content_type='application/json', headers=headers
+        )
+
+    def test_form_renders_a_fresh_key(self):
+        first = self.client.get(self.book_url).context['idempotency_key']
+        second = self.client.get(self.book_url).context['idempotency_key']
+        self.assertTrue(first)
+        self.assertNotEqual(first, second)
+        self.assertContains(
+            self.client.get(self.book_url), 'name="idempotency_key"'
+        )
+
+    def test_double_submit_books_once(self):
+        data = self.form_data(idempotency_key='abc123')
+        first = self.client.post(self.book_url, data)
+        second = self.client.post(self.book_url, data)
+        self.assertRedirects(first, reverse('my_bookings'))
+        self.assertRedirects(second, reverse('my_bookings'))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_invalid_post_gives_key_back(self):
+        response = self.client.post(
+            self.book_url,
+            self.form_data(number_of_guests=0, idempotency_key='abc123')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['idempotency_key'], 'abc123')
+        self.assertFalse(IdempotencyKey.objects.exists())
+        response = self.client.post(
+            self.book_url, self.form_data(idempotency_key='abc123')
+        )
+        self.assertRedirects(response, reverse('my_bookings'))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reused_form_key_is_refused(self):
+        self.client.post(self.book_url, self.form_data(idempotency_key='k'))
+        response = self.client.post(
+            self.book_url,
+            self.form_data(number_of_guests=3, idempotency_key='k')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertNotEqual(response.context['idempotency_key'], 'k')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_api_replays_original_response(self):
+        data = {
+            'restaurant': self.restaurant.id,
+            'date': self.tomorrow.isoformat(),
+            'time': '18:30',
+            'number_of_guests': 4,
+        }
+        first = self.post_api(data, key='retry-1')
+        second = self.post_api(data, key='retry-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Booking.objects.count(), 1)
+        # Keys are per user and per request.
+        self.assertEqual(
+            self.post_api(dict(data, number_of_guests=5), key='retry-1')
+            .status_code,
+            422
+        )
+        self.assertEqual(self.post_api(data).status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(self.post_api(data, key='x' * 101).status_code, 400)
+
+    def test_errors_inside_the_request_are_not_taken_for_key_errors(self):
+        failure = ValueError('bug while booking')
+        with mock.patch.object(
+            views, '_create_booking', side_effect=failure
+        ), self.assertRaises(ValueError):
+            self.client.post(
+                self.book_url, self.form_data(idempotency_key='abc123')
+            )
+        with mock.patch.object(
+            api, '_create_bookings', side_effect=failure
+        ), self.assertRaises(ValueError):
+            self.post_api({}, key='retry-1')
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_expired_keys(self):
+        data = self.form_data(idempotency_key='abc123')
+        self.client.post(self.book_url, data)
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.client.post(self.book_url, data)
+        self.assertEqual(Booking.objects.count(), 2)
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1', out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
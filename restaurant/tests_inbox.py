@@ -0,0 +1,114 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from restaurant.models import Contact
+
+
+class ContactInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.client.force_login(self.user)
+        self.contacts = [
+            Contact.objects.create(
+                name=f'Sender {i}',
+                email=f'sender{i}@example.com',
+                subject=f'Subject {i}',
+                message='Hello',
+                status='read' if i % 2 else 'unread'
+            )
+            for i in range(6)
+        ]
+
+    def test_status_filter(self):
+        response = self.client.get(
+            reverse('contact_messages'), {'status': 'unread'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['status'], 'unread')
+        self.assertEqual(len(response.context['contacts']), 3)
+        self.assertTrue(all(
+            c.status == 'unread' for c in response.context['contacts']
+        ))
+
+    def test_unknown_status_lists_everything(self):
+        response = self.client.get(
+            reverse('contact_messages'), {'status': 'bogus'}
+        )
+        self.assertEqual(len(response.context['contacts']), 6)
+
+    def test_unread_count_cached(self):
+        self.assertEqual(Contact.unread_count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(Contact.unread_count(), 3)
+
+    def test_unread_count_maintained_on_save_and_delete(self):
+        Contact.unread_count()
+        with self.captureOnCommitCallbacks(execute=True):
+            contact = Contact.objects.get(pk=self.contacts[0].pk)
+            contact.status = 'replied'
+            contact.save()
+        self.assertEqual(cache.get(Contact.UNREAD_COUNT_CACHE_KEY), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.create(
+                name='New', email='new@example.com',
+                subject='New', message='New'
+            )
+        self.assertEqual(cache.get(Contact.UNREAD_COUNT_CACHE_KEY), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.get(pk=self.contacts[2].pk).delete()
+        self.assertEqual(cache.get(Contact.UNREAD_COUNT_CACHE_KEY), 2)
+        self.assertEqual(
+            Contact.objects.filter(status='unread').count(), 2
+        )
+
+    def test_bulk_mark_read_is_one_update(self):
+        ids = [c.id for c in self.contacts]
+        with self.assertNumQueries(1):
+            updated = Contact.objects.filter(id__in=ids).set_status('read')
+        self.assertEqual(updated, 6)
+
+    def test_bulk_delete_is_one_delete(self):
+        ids = [c.id for c in self.contacts[:3]]
+        with self.assertNumQueries(1):
+            Contact.objects.filter(id__in=ids).bulk_delete()
+        self.assertEqual(Contact.objects.count(), 3)
+
+    def test_bulk_view(self):
+        ids = [c.id for c in self.contacts if c.status == 'unread']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('bulk_update_contacts'), {
+                'action': 'replied',
+                'contact_ids': ids,
+                'status': 'unread',
+            })
+        self.assertRedirects(
+            response,
+            reverse('contact_messages') + '?status=unread'
+        )
+        self.assertEqual(Contact.objects.filter(status='replied').count(), 3)
+        self.assertEqual(Contact.unread_count(), 0)
+
+    def test_bulk_view_delete(self):
+        response = self.client.post(reverse('bulk_update_contacts'), {
+            'action': 'delete',
+            'contact_ids': [self.contacts[0].id, 'x'],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Contact.objects.count(), 5)
+
+    def test_bulk_view_requires_staff(self):
+        User.objects.create_user(username='customer', password='pass12345')
+        self.client.login(username='customer', password='pass12345')
+        response = self.client.post(reverse('bulk_update_contacts'), {
+            'action': 'delete',
+            'contact_ids': [self.contacts[0].id],
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Contact.objects.count(), 6)
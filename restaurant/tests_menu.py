@@ -0,0 +1,413 @@
+import json
+from unittest.mock import patch
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from decimal import Decimal
+from restaurant.forms import MenuItemForm
+from restaurant.menu import get_menu, read_cursor, search_menus
+from restaurant.models import Restaurant, MenuCategory, MenuItem
+
+
+class MenuBulkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.staff = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.soup = MenuItem.objects.create(
+            name='Soup',
+            description='Soup of the day',
+            price=Decimal('6.50'),
+            restaurant=self.restaurant
+        )
+        self.client.login(username='staffuser', password='testpass123')
+        self.import_url = reverse('import_menu', args=[self.restaurant.id])
+        self.edit_url = reverse('bulk_edit_menu', args=[self.restaurant.id])
+
+    def upload(self, name, content):
+        return self.client.post(self.import_url, {
+            'file': SimpleUploadedFile(name, content.encode())
+        })
+
+    def menu(self):
+        return sorted(MenuItem.objects.filter(
+            restaurant=self.restaurant
+        ).values_list('name', 'price'))
+
+    def test_csv_import_adds_and_updates(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.upload(
+                'menu.csv',
+                'name,description,price\n'
+                'Soup,Soup of the day,7.00\n'
+                'Risotto,Mushroom risotto,14.50\n'
+            )
+        self.assertRedirects(
+            response, reverse('manage_menu', args=[self.restaurant.id])
+        )
+        self.assertEqual(self.menu(), [
+            ('Risotto', Decimal('14.50')), ('Soup', Decimal('7.00')),
+        ])
+        # One transaction, one cache invalidation.
+        self.assertEqual(len(callbacks), 1)
+
+    def test_json_import(self):
+        self.upload('menu.json', json.dumps([
+            {'name': 'Tiramisu', 'description': 'Coffee dessert',
+             'price': 6.5},
+        ]))
+        self.assertIn(('Tiramisu', Decimal('6.50')), self.menu())
+
+    def test_invalid_row_saves_nothing(self):
+        response = self.upload(
+            'menu.csv',
+            'name,description,price\n'
+            'Soup,Soup of the day,7.00\n'
+            'Risotto,Mushroom risotto,-1\n'
+            'Risotto,Again,9.00\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        errors = response.context['form'].non_field_errors()
+        self.assertIn('Row 2: Price: Price must be greater than 0.', errors)
+        self.assertIn('Row 3: "Risotto" appears twice.', errors)
+        self.assertEqual(self.menu(), [('Soup', Decimal('6.50'))])
+
+    def test_unreadable_file(self):
+        response = self.upload('menu.csv', 'dish,cost\nSoup,7\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('file', response.context['form'].errors)
+        response = self.upload('menu.json', '{"name": "Soup"}')
+        self.assertIn('file', response.context['form'].errors)
+
+    def test_bulk_edit_reprices_many_items_at_once(self):
+        MenuItem.objects.bulk_create([
+            MenuItem(
+                name=f'Dish {number}', description='Tasty',
+                price=Decimal('10.00'), restaurant=self.restaurant
+            )
+            for number in range(199)
+        ])
+        items = list(MenuItem.objects.filter(
+            restaurant=self.restaurant
+        ).order_by('id'))
+        data = {
+            'form-TOTAL_FORMS': len(items),
+            'form-INITIAL_FORMS': len(items),
+        }
+        for index, item in enumerate(items):
+            data.update({
+                f'form-{index}-id': item.id,
+                f'form-{index}-name': item.name,
+                f'form-{index}-description': item.description,
+                f'form-{index}-price': '12.00',
+            })
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.edit_url, data)
+        self.assertRedirects(
+            response, reverse('manage_menu', args=[self.restaurant.id])
+        )
+        self.assertEqual(
+            set(MenuItem.objects.values_list('price', flat=True)),
+            {Decimal('12.00')}
+        )
+        self.assertEqual(len(callbacks), 1)
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "restaurant_menuitem"')
+        ]
+        self.assertLess(len(updates), 10)
+
+    def test_bulk_edit_validates_every_row(self):
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': self.soup.id,
+            'form-0-name': 'Soup',
+            'form-0-description': 'Soup of the day',
+            'form-0-price': '0',
+        }
+        response = self.client.post(self.edit_url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['formset'].is_valid())
+        self.soup.refresh_from_db()
+        self.assertEqual(self.soup.price, Decimal('6.50'))
+
+    def test_non_staff_forbidden(self):
+        User.objects.create_user(username='diner', password='testpass123')
+        self.client.login(username='diner', password='testpass123')
+        self.assertEqual(self.client.get(self.import_url).status_code, 403)
+        self.assertEqual(self.client.get(self.edit_url).status_code, 403)
+
+    def test_detail_page_uses_cached_menu_until_changed(self):
+        detail_url = reverse('restaurant_detail', args=[self.restaurant.id])
+        self.client.get(detail_url)
+        MenuItem.objects.filter(pk=self.soup.pk).update(name='Broth')
+        self.assertContains(self.client.get(detail_url), 'Soup')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(
+                'menu.csv',
+                'name,description,price\nSalad,Green salad,5.00\n'
+            )
+        response = self.client.get(detail_url)
+        self.assertContains(response, 'Broth')
+        self.assertContains(response, 'Salad')
+
+
+class MenuCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.staff = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.mains = MenuCategory.objects.create(
+            restaurant=self.restaurant, name='Mains', position=2
+        )
+        self.starters = MenuCategory.objects.create(
+            restaurant=self.restaurant, name='Starters', position=1
+        )
+
+    def add(self, name, category=None, position=0):
+        return MenuItem.objects.create(
+            name=name, description='Tasty', price=Decimal('9.00'),
+            restaurant=self.restaurant, category=category, position=position
+        )
+
+    def test_menu_is_grouped_in_order(self):
+        self.add('Bread')
+        self.add('Steak', self.mains, 2)
+        self.add('Fish', self.mains, 1)
+        self.add('Soup', self.starters)
+        with self.assertNumQueries(1):
+            sections = get_menu(self.restaurant.id)
+        self.assertEqual(
+            [
+                (section['category'] and section['category'].name,
+                 [item.name for item in section['items']])
+                for section in sections
+            ],
+            [
+                ('Starters', ['Soup']),
+                ('Mains', ['Fish', 'Steak']),
+                (None, ['Bread']),
+            ]
+        )
+
+    def test_bulk_editor_lists_items_in_menu_order(self):
+        self.add('Bread')
+        self.add('Steak', self.mains, 2)
+        self.add('Fish', self.mains, 1)
+        self.add('Soup', self.starters)
+        self.client.login(username='staffuser', password='testpass123')
+        response = self.client.get(
+            reverse('bulk_edit_menu', args=[self.restaurant.id])
+        )
+        self.assertEqual(
+            [form.instance.name for form in response.context['formset']],
+            ['Soup', 'Fish', 'Steak', 'Bread']
+        )
+
+    def test_large_menu_pages_use_a_fixed_number_of_queries(self):
+        categories = [self.starters, self.mains, None]
+        MenuItem.objects.bulk_create([
+            MenuItem(
+                name=f'Dish {number}', description='Tasty',
+                price=Decimal('9.00'), restaurant=self.restaurant,
+                category=categories[number % 3], position=number
+            )
+            for number in range(300)
+        ])
+        detail_url = reverse('restaurant_detail', args=[self.restaurant.id])
+        # The restaurant, then the whole menu with its categories.
+        with self.assertNumQueries(2):
+            response = self.client.get(detail_url)
+        self.assertContains(response, 'Dish 299')
+        self.assertContains(response, 'Starters')
+        # Cached afterwards.
+        with self.assertNumQueries(1):
+            self.client.get(detail_url)
+
+        self.client.login(username='staffuser', password='testpass123')
+        manage_url = reverse('manage_menu', args=[self.restaurant.id])
+        self.client.get(manage_url)
+        # Session and user, the restaurant, its prefetched menu, then the
+        # navbar's stored booking counts.
+        with self.assertNumQueries(5):
+            response = self.client.get(manage_url)
+        self.assertEqual(len(response.context['menu_items']), 300)
+        self.assertEqual(len(response.context['menu']), 3)
+
+    def test_category_change_drops_cached_menu(self):
+        self.add('Soup', self.starters)
+        get_menu(self.restaurant.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.starters.name = 'Soups'
+            self.starters.save()
+        self.assertEqual(
+            get_menu(self.restaurant.id)[0]['category'].name, 'Soups'
+        )
+
+    def test_import_assigns_categories(self):
+        self.add('Soup', self.starters)
+        self.client.login(username='staffuser', password='testpass123')
+        self.client.post(
+            reverse('import_menu', args=[self.restaurant.id]),
+            {'file': SimpleUploadedFile('menu.csv', (
+                'name,description,price,category,position\n'
+                'Soup,Tasty,9.00,Starters,0\n'
+                'Cake,Chocolate cake,6.00,Desserts,1\n'
+                'Tart,Lemon tart,6.00,Desserts,0\n'
+            ).encode())}
+        )
+        desserts = MenuCategory.objects.get(name='Desserts')
+        self.assertEqual(desserts.restaurant, self.restaurant)
+        self.assertEqual(
+            [item.name for item in desserts.items.order_by('position')],
+            ['Tart', 'Cake']
+        )
+        # The unchanged row is neither re-added nor rewritten.
+        self.assertEqual(MenuItem.objects.count(), 3)
+
+    def test_item_form_takes_category_by_name(self):
+        other = Restaurant.objects.create(
+            name='Other Restaurant',
+            address='456 Test St',
+            contact_number='0987654321',
+            email='other@test.com'
+        )
+        MenuCategory.objects.create(restaurant=other, name='Desserts')
+        data = {'name': 'Cake', 'description': 'Tasty', 'price': '6.00'}
+        form = MenuItemForm(
+            dict(data, category='Starters'), restaurant=self.restaurant
+        )
+        self.assertEqual(form.save().category, self.starters)
+        form = MenuItemForm(
+            dict(data, name='Tart', category='Desserts'),
+            restaurant=self.restaurant
+        )
+        tart = form.save()
+        self.assertEqual(tart.category.restaurant, self.restaurant)
+        self.assertEqual(MenuCategory.objects.filter(
+            name='Desserts'
+        ).count(), 2)
+        form = MenuItemForm(instance=tart)
+        self.assertEqual(form.initial['category'], 'Desserts')
+
+
+class MenuSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                address='123 Test St',
+                contact_number='1234567890',
+                email=f'restaurant{number}@test.com'
+            )
+            for number in range(3)
+        ]
+        first, second, third = self.restaurants
+        for restaurant, name, description, price in [
+            (first, 'Mushroom Risotto', 'Creamy', '14.00'),
+            (first, 'Steak', 'With a risotto side', '24.00'),
+            (second, 'Seafood risotto', 'Fresh', '12.50'),
+            (second, 'Soup', 'Tomato', '6.00'),
+            (third, 'Risotto Milanese', 'Saffron', '14.00'),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, description=description,
+                price=Decimal(price)
+            )
+        self.url = reverse('menu_search')
+
+    def test_text_and_price_filters(self):
+        items, next_cursor = search_menus('risotto', max_price=Decimal('15'))
+        self.assertIsNone(next_cursor)
+        self.assertEqual(
+            [item.name for item in items],
+            ['Seafood risotto', 'Mushroom Risotto', 'Risotto Milanese']
+        )
+        items, _ = search_menus(min_price=Decimal('14'))
+        self.assertEqual(
+            [item.name for item in items],
+            ['Mushroom Risotto', 'Risotto Milanese', 'Steak']
+        )
+
+    def test_keyset_pages_cover_every_item_once(self):
+        seen = []
+        after = None
+        while True:
+            items, next_cursor = search_menus(after=after, limit=2)
+            seen.extend(item.name for item in items)
+            if next_cursor is None:
+                break
+            after = read_cursor(next_cursor)
+        self.assertEqual(seen, [
+            'Soup', 'Seafood risotto', 'Mushroom Risotto',
+            'Risotto Milanese', 'Steak',
+        ])
+
+    def test_view_groups_results_by_restaurant_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {'q': 'risotto', 'max_price': '15'}
+            )
+        sections = response.context['sections']
+        self.assertEqual(
+            [section['restaurant'] for section in sections],
+            [self.restaurants[1], self.restaurants[0], self.restaurants[2]]
+        )
+        self.assertContains(response, 'Seafood risotto')
+        self.assertIsNone(response.context['next_query'])
+
+    def test_view_links_to_the_next_page(self):
+        with patch('restaurant.menu.SEARCH_PAGE_SIZE', 2):
+            response = self.client.get(self.url, {'q': 'risotto'})
+            self.assertEqual(
+                response.context['next_query'],
+                f'q=risotto&after=14.00_{self.restaurants[0].id}_'
+                f'{MenuItem.objects.get(name="Mushroom Risotto").id}'
+            )
+            response = self.client.get(
+                f"{self.url}?{response.context['next_query']}"
+            )
+        self.assertEqual(
+            [item.name for section in response.context['sections']
+             for item in section['items']],
+            ['Risotto Milanese', 'Steak']
+        )
+
+    def test_invalid_filters(self):
+        response = self.client.get(
+            self.url, {'min_price': '20', 'max_price': '10'}
+        )
+        self.assertEqual(response.context['sections'], [])
+        self.assertIn(
+            'The minimum price cannot be above the maximum price.',
+            response.context['form'].non_field_errors()
+        )
+        response = self.client.get(self.url, {'after': 'nonsense'})
+        self.assertIn('after', response.context['form'].errors)
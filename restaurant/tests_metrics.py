@@ -0,0 +1,100 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import datetime, timedelta
+from prometheus_client import REGISTRY
+from restaurant.models import Restaurant, Booking
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.labels = {'restaurant': str(self.restaurant.id)}
+
+    def sample(self, name, labels=None):
+        return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'restaurant_bookings_created_total', response.content)
+        self.assertIn(b'restaurant_db_queries_per_request', response.content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token_required(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            reverse('metrics'),
+            HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_booking_post_counts_and_latency(self):
+        created = self.sample(
+            'restaurant_bookings_created_total', self.labels
+        )
+        latency = self.sample('restaurant_booking_post_latency_seconds_count')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            reverse('book_restaurant', args=[self.restaurant.id]),
+            {
+                'date': (timezone.now().date() + timedelta(days=1)),
+                'time': '19:00',
+                'number_of_guests': 2,
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            self.sample('restaurant_bookings_created_total', self.labels),
+            created + 1
+        )
+        self.assertEqual(
+            self.sample('restaurant_booking_post_latency_seconds_count'),
+            latency + 1
+        )
+
+    def test_cancel_counted_once(self):
+        booking = Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=timezone.now().date() + timedelta(days=1),
+            time=datetime.strptime('19:00', '%H:%M').time(),
+            number_of_guests=2
+        )
+        cancelled = self.sample(
+            'restaurant_bookings_cancelled_total', self.labels
+        )
+        booking.status = 'cancelled'
+        booking.save()
+        booking.save()
+        self.assertEqual(
+            self.sample('restaurant_bookings_cancelled_total', self.labels),
+            cancelled + 1
+        )
+
+    def test_contact_submission_counted(self):
+        before = self.sample('restaurant_contact_submissions_total')
+        self.client.post(reverse('contact'), {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'subject': 'Test Subject',
+            'message': 'Test Message'
+        })
+        self.assertEqual(
+            self.sample('restaurant_contact_submissions_total'),
+            before + 1
+        )
@@ -0,0 +1,150 @@
+import json
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from datetime import date, time, timedelta
+from restaurant import outbox
+from restaurant.models import (
+    Booking, BookingOutbox, ChangeFeedConsumer, Restaurant
+)
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.staff = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.url = reverse('api_change_feed')
+
+    def book(self, **fields):
+        return Booking.objects.create(**dict({
+            'user': self.user,
+            'restaurant': self.restaurant,
+            'date': date(2030, 6, 1),
+            'time': time(19, 0),
+            'number_of_guests': 2,
+        }, **fields))
+
+    def feed(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_every_mutation_is_recorded(self):
+        booking = self.book()
+        booking.number_of_guests = 4
+        booking.save()
+        Booking.objects.filter(pk=booking.pk).set_status('confirmed')
+        pk = booking.pk
+        booking.delete()
+        entries = list(BookingOutbox.objects.all())
+        self.assertEqual(
+            [entry.change for entry in entries],
+            ['created', 'updated', 'updated', 'deleted']
+        )
+        self.assertTrue(all(entry.booking_id == pk for entry in entries))
+        self.assertEqual(entries[1].data['number_of_guests'], 4)
+        self.assertEqual(entries[2].data['status'], 'confirmed')
+        self.assertEqual(entries[2].data['date'], '2030-06-01')
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.book()
+                raise RuntimeError
+        self.assertFalse(BookingOutbox.objects.exists())
+
+    def test_feed_pages_by_sequence(self):
+        self.client.force_login(self.staff)
+        bookings = [self.book() for _ in range(5)]
+        response = self.feed(limit=3)
+        data = response.json()
+        self.assertEqual(
+            [change['booking'] for change in data['changes']],
+            [booking.pk for booking in bookings[:3]]
+        )
+        self.assertTrue(data['has_more'])
+        data = self.feed(after=data['next'], limit=3).json()
+        self.assertEqual(
+            [change['booking'] for change in data['changes']],
+            [booking.pk for booking in bookings[3:]]
+        )
+        self.assertFalse(data['has_more'])
+        last = data['next']
+        data = self.feed(after=last).json()
+        self.assertEqual(
+            data, {'changes': [], 'next': last, 'has_more': False}
+        )
+
+    def test_feed_is_one_range_query(self):
+        self.client.force_login(self.staff)
+        self.book()
+        self.feed()
+        # Session and user, then the outbox page.
+        with self.assertNumQueries(3):
+            self.feed(after=0)
+
+    def test_unsettled_entries_are_held_back(self):
+        self.book()
+        self.book()
+        BookingOutbox.objects.filter(
+            id=BookingOutbox.objects.last().id
+        ).update(created_at=timezone.now() + timedelta(seconds=30))
+        entries, more = outbox.read_changes()
+        self.assertEqual(len(entries), 1)
+        self.assertFalse(more)
+
+    def test_feed_requires_staff(self):
+        self.assertEqual(self.feed().status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.feed().status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.feed(after='x').status_code, 400)
+        self.assertEqual(self.feed(limit=0).status_code, 400)
+        self.assertEqual(self.feed(consumer='no spaces').status_code, 400)
+        self.assertEqual(
+            self.client.post(self.url, json.dumps({}),
+                             content_type='application/json').status_code,
+            405
+        )
+
+    def test_compaction_keeps_unread_entries(self):
+        self.client.force_login(self.staff)
+        for _ in range(4):
+            self.book()
+        first = self.feed(consumer='pos', limit=2).json()['next']
+        self.feed(consumer='pos', after=first)
+        self.feed(consumer='crm', after=first - 1)
+        out = StringIO()
+        call_command('compact_outbox', stdout=out)
+        self.assertIn('Deleted 1 change-feed entries.', out.getvalue())
+        self.assertEqual(BookingOutbox.objects.first().id, first)
+        self.assertEqual(
+            ChangeFeedConsumer.objects.get(name='pos').position, first
+        )
+
+    def test_compaction_drops_entries_past_retention(self):
+        self.book()
+        self.book()
+        later = timezone.now() + timedelta(days=8)
+        with mock.patch.object(timezone, 'now', return_value=later):
+            self.assertEqual(outbox.compact(), 2)
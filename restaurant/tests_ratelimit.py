@@ -0,0 +1,101 @@
+from unittest import mock
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from restaurant.models import Restaurant, Contact, Booking
+from restaurant.ratelimit import SlidingWindow, parse_rate
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 10 / 60))
+        self.assertEqual(parse_rate('2/s'), (2, 2))
+
+    def test_window_slides(self):
+        window = SlidingWindow(2, 1)
+        self.assertEqual(window.consume('key', now=100), 0)
+        self.assertEqual(window.consume('key', now=100), 0)
+        self.assertEqual(window.consume('key', now=101.5), 0.5)
+        # Half of the last window's two requests still count.
+        self.assertEqual(window.consume('key', now=103), 0)
+        self.assertGreater(window.consume('key', now=103), 0)
+
+    def test_interleaved_consumes(self):
+        window = SlidingWindow(1, 1)
+        read = cache.get
+
+        def get(*args, **kwargs):
+            # Another worker takes the last request after this one reads.
+            value = read(*args, **kwargs)
+            patched.side_effect = read
+            self.assertEqual(window.consume('key', now=100), 0)
+            return value
+
+        with mock.patch.object(cache, 'get', side_effect=get) as patched:
+            self.assertGreater(window.consume('key', now=100), 0)
+
+
+@override_settings(RATE_LIMITS={'contact': '2/m', 'booking': '1/m'})
+class RateLimitViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.contact_data = {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'subject': 'Test Subject',
+            'message': 'Test Message'
+        }
+
+    def test_contact_limited_by_ip(self):
+        for i in range(2):
+            response = self.client.post(
+                reverse('contact'),
+                dict(self.contact_data, message=f'Message {i}')
+            )
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(reverse('contact'), self.contact_data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_get_not_limited(self):
+        for _ in range(3):
+            response = self.client.get(reverse('contact'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_other_ip_not_limited(self):
+        for _ in range(3):
+            self.client.post(reverse('contact'), self.contact_data)
+        response = self.client.post(
+            reverse('contact'),
+            self.contact_data,
+            REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_booking_limited_by_user(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('book_restaurant', args=[restaurant.id])
+        self.client.post(url, {}, REMOTE_ADDR='10.0.0.1')
+        response = self.client.post(url, {}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(Booking.objects.exists())
+
+    @override_settings(RATE_LIMITS={'login': '1/m'})
+    def test_login_limited(self):
+        data = {'login': 'nobody', 'password': 'wrong'}
+        self.client.post(reverse('account_login'), data)
+        response = self.client.post(reverse('account_login'), data)
+        self.assertEqual(response.status_code, 429)
@@ -0,0 +1,184 @@
+from io import StringIO
+from unittest import mock
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
+from restaurant import reminders
+from restaurant.models import Booking, BookingReminder, Restaurant
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class BookingReminderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='guest@example.com'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.day = date(2030, 6, 1)
+
+    def book(self, status='confirmed', user=None, start=time(19, 0)):
+        return Booking.objects.create(
+            user=user or self.user,
+            restaurant=self.restaurant,
+            date=self.day,
+            time=start,
+            number_of_guests=2,
+            status=status
+        )
+
+    def due_times(self, booking):
+        return sorted(
+            booking.reminders.filter(sent_at__isnull=True)
+            .values_list('hours_before', 'due_at')
+        )
+
+    def test_confirmed_bookings_get_reminders(self):
+        booking = self.book(status='pending')
+        self.assertEqual(self.due_times(booking), [])
+        Booking.objects.filter(pk=booking.pk).set_status('confirmed')
+        self.assertEqual(self.due_times(booking), [
+            (2, at(self.day, 17)),
+            (24, at(self.day - timedelta(days=1), 19)),
+        ])
+        booking.refresh_from_db()
+        booking.time = time(20, 0)
+        booking.save()
+        self.assertEqual(self.due_times(booking), [
+            (2, at(self.day, 18)),
+            (24, at(self.day - timedelta(days=1), 20)),
+        ])
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.due_times(booking), [])
+
+    def test_unrelated_edit_keeps_reminders(self):
+        booking = self.book()
+        ids = set(booking.reminders.values_list('id', flat=True))
+        booking.special_requests = 'Window seat'
+        booking.save()
+        self.assertEqual(
+            set(booking.reminders.values_list('id', flat=True)), ids
+        )
+
+    def test_past_due_times_are_skipped(self):
+        booking = self.book()
+        BookingReminder.objects.all().delete()
+        reminders.reschedule(
+            [booking], now=at(self.day - timedelta(days=1), 20)
+        )
+        self.assertEqual(self.due_times(booking), [(2, at(self.day, 17))])
+
+    def test_sends_due_reminders_once(self):
+        booking = self.book()
+        self.book(status='pending')
+        now = at(self.day - timedelta(days=1), 19, 1)
+        self.assertEqual(reminders.send_due_reminders(now=now), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['guest@example.com'])
+        self.assertIn('Test Restaurant', message.subject)
+        self.assertIn('19:00', message.body)
+        self.assertEqual(
+            booking.reminders.get(hours_before=24).sent_at, now
+        )
+        self.assertEqual(reminders.send_due_reminders(now=now), 0)
+        # Moving the booking to a later start schedules fresh reminders;
+        # the sent one is not sent again for the same start.
+        booking.refresh_from_db()
+        booking.status = 'pending'
+        booking.save()
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual(len(self.due_times(booking)), 1)
+
+    def test_overdue_reminders_past_grace_are_skipped(self):
+        self.book()
+        late = at(self.day - timedelta(days=1), 21)
+        self.assertEqual(reminders.send_due_reminders(now=late), 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_range_query_and_one_connection_per_tick(self):
+        for minute in range(7):
+            self.book(start=time(19, minute))
+        now = at(self.day - timedelta(days=1), 19, 30)
+        with mock.patch.object(
+            EmailBackend, 'send_messages', autospec=True,
+            side_effect=EmailBackend.send_messages
+        ) as send, mock.patch.object(
+            mail, 'get_connection', wraps=mail.get_connection
+        ) as get_connection, CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                reminders.send_due_reminders(now=now, batch_size=3), 7
+            )
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(
+            [len(call.args[1]) for call in send.call_args_list], [3, 3, 1]
+        )
+        reminder_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'restaurant_bookingreminder' in query['sql']
+        ]
+        self.assertEqual(len(reminder_queries), 2)
+        self.assertIn('"due_at" >', reminder_queries[0])
+        self.assertTrue(reminder_queries[1].startswith('UPDATE'))
+
+    def test_failed_batch_is_marked_unsent(self):
+        for minute in range(4):
+            self.book(start=time(19, minute))
+        now = at(self.day - timedelta(days=1), 19, 30)
+        calls = []
+
+        def flaky(backend, messages):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise ConnectionError('SMTP went away')
+            return len(messages)
+
+        with mock.patch.object(
+            EmailBackend, 'send_messages', autospec=True, side_effect=flaky
+        ):
+            with self.assertRaises(ConnectionError):
+                reminders.send_due_reminders(now=now, batch_size=2)
+        self.assertEqual(
+            BookingReminder.objects.filter(
+                hours_before=24, sent_at__isnull=True
+            ).count(),
+            2
+        )
+        self.assertEqual(reminders.send_due_reminders(now=now), 2)
+
+    def test_users_without_email_are_skipped(self):
+        nobody = User.objects.create_user(
+            username='noemail', password='testpass123'
+        )
+        self.book(user=nobody)
+        now = at(self.day - timedelta(days=1), 19, 1)
+        self.assertEqual(reminders.send_due_reminders(now=now), 0)
+        self.assertFalse(reminders.due_reminders(now).exists())
+
+    def test_command(self):
+        self.book()
+        with mock.patch.object(
+            timezone, 'now',
+            return_value=at(self.day - timedelta(days=1), 19, 1)
+        ):
+            out = StringIO()
+            call_command('send_reminders', stdout=out)
+        self.assertIn('Sent 1 booking reminder(s).', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
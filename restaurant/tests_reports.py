@@ -0,0 +1,106 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from datetime import date, datetime, timedelta
+from io import StringIO
+from restaurant.models import Restaurant, Booking
+from restaurant.reports import occupancy_heatmap, weekday_counts
+
+
+class OccupancyReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.staff = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        # 2025-01-06 is a Monday.
+        self.monday = date(2025, 1, 6)
+        for day, hour, guests, status in [
+            (self.monday, '19:00', 2, 'confirmed'),
+            (self.monday, '19:30', 4, 'pending'),
+            (self.monday + timedelta(days=7), '19:15', 6, 'confirmed'),
+            (self.monday, '19:00', 8, 'cancelled'),
+            (self.monday + timedelta(days=4), '12:00', 3, 'confirmed'),
+        ]:
+            Booking.objects.create(
+                user=self.staff,
+                restaurant=self.restaurant,
+                date=day,
+                time=datetime.strptime(hour, '%H:%M').time(),
+                number_of_guests=guests,
+                status=status
+            )
+        self.start = self.monday
+        self.end = self.monday + timedelta(days=13)
+
+    def cell(self, heatmap, weekday, hour):
+        name, cells = heatmap['rows'][weekday]
+        return cells[heatmap['hours'].index(hour)]
+
+    def test_weekday_counts(self):
+        self.assertEqual(weekday_counts(self.start, self.end), [2] * 7)
+        self.assertEqual(
+            weekday_counts(self.monday, self.monday + timedelta(days=1)),
+            [1, 1, 0, 0, 0, 0, 0]
+        )
+
+    def test_heatmap_aggregates_covers(self):
+        heatmap = occupancy_heatmap(self.restaurant, self.start, self.end)
+        monday_evening = self.cell(heatmap, 0, 19)
+        self.assertEqual(monday_evening['total'], 12)
+        self.assertEqual(monday_evening['average'], 6.0)
+        self.assertEqual(monday_evening['intensity'], 1.0)
+        self.assertEqual(self.cell(heatmap, 4, 12)['total'], 3)
+        self.assertEqual(self.cell(heatmap, 1, 19)['total'], 0)
+        self.assertEqual(heatmap['hours'][0], 9)
+
+    def test_heatmap_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            occupancy_heatmap(self.restaurant, self.start, self.end)
+        with self.assertNumQueries(0):
+            occupancy_heatmap(self.restaurant, self.start, self.end)
+
+    def test_heatmap_refreshed_after_booking_change(self):
+        occupancy_heatmap(self.restaurant, self.start, self.end)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(number_of_guests=2).get().delete()
+        heatmap = occupancy_heatmap(self.restaurant, self.start, self.end)
+        self.assertEqual(self.cell(heatmap, 0, 19)['total'], 10)
+
+    def test_heatmap_refreshed_after_stats_rebuild(self):
+        occupancy_heatmap(self.restaurant, self.start, self.end)
+        # A write that skips the bookkeeping, which the rebuild repairs.
+        Booking.objects.filter(number_of_guests=2).update(number_of_guests=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_stats', stdout=StringIO())
+        heatmap = occupancy_heatmap(self.restaurant, self.start, self.end)
+        self.assertEqual(self.cell(heatmap, 0, 19)['total'], 15)
+
+    def test_dashboard_view(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('occupancy_dashboard', args=[self.restaurant.id]),
+            {'start': '2025-01-06', 'end': '2025-01-19'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'restaurant/occupancy.html')
+        self.assertEqual(response.context['start'], self.start)
+
+    def test_dashboard_requires_staff(self):
+        User.objects.create_user(username='customer', password='pass12345')
+        self.client.login(username='customer', password='pass12345')
+        response = self.client.get(
+            reverse('occupancy_dashboard', args=[self.restaurant.id])
+        )
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,146 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import date, time, timedelta
+from restaurant.availability import available_times
+from restaurant.forms import BookingForm
+from restaurant.models import Restaurant, Booking, OpeningHours, Closure
+
+
+class OpeningScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com',
+            opening_time=time(12, 0),
+            closing_time=time(20, 0),
+            capacity=10
+        )
+        # Next Monday, so weekday rules are predictable.
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday())
+
+    def form(self, day, at, **kwargs):
+        data = {
+            'date': day.isoformat(),
+            'time': at,
+            'number_of_guests': 2,
+            'special_requests': '',
+        }
+        return BookingForm(data, restaurant=self.restaurant, **kwargs)
+
+    def test_falls_back_to_restaurant_hours(self):
+        self.assertTrue(self.form(self.monday, '12:30').is_valid())
+        form = self.form(self.monday, '21:00')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['time'],
+            ['Booking time must be between 12:00 and 20:00.']
+        )
+
+    def test_weekly_hours_with_split_shift(self):
+        for opens, closes in [(time(12), time(15)), (time(18), time(23))]:
+            with self.captureOnCommitCallbacks(execute=True):
+                OpeningHours.objects.create(
+                    restaurant=self.restaurant, weekday=0,
+                    opens=opens, closes=closes
+                )
+        self.assertTrue(self.form(self.monday, '22:30').is_valid())
+        form = self.form(self.monday, '16:00')
+        self.assertFalse(form.is_valid())
+        self.assertIn(
+            '12:00 and 15:00 or 18:00 and 23:00', form.errors['time'][0]
+        )
+        # No hours on Tuesday means closed.
+        form = self.form(self.monday + timedelta(days=1), '13:00')
+        self.assertFalse(form.is_valid())
+        self.assertIn('date', form.errors)
+
+    def test_closure(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Closure.objects.create(
+                restaurant=self.restaurant,
+                start_date=self.monday,
+                end_date=self.monday + timedelta(days=2),
+                reason='Holiday'
+            )
+        for offset in range(3):
+            form = self.form(self.monday + timedelta(days=offset), '13:00')
+            self.assertEqual(
+                form.errors['date'],
+                ['The restaurant is closed on that date.']
+            )
+        self.assertTrue(
+            self.form(self.monday + timedelta(days=3), '13:00').is_valid()
+        )
+
+    def test_validation_uses_cached_schedule(self):
+        self.form(self.monday, '13:00').is_valid()
+        with self.assertNumQueries(0):
+            form = self.form(self.monday, '13:00')
+            self.assertTrue(form.is_valid())
+
+    def test_restaurant_change_invalidates_schedule(self):
+        self.assertFalse(self.form(self.monday, '21:00').is_valid())
+        self.restaurant.closing_time = time(22, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.save()
+        self.assertTrue(self.form(self.monday, '21:00').is_valid())
+
+    def test_time_widget_follows_schedule(self):
+        form = BookingForm(restaurant=self.restaurant)
+        attrs = form.fields['time'].widget.attrs
+        self.assertEqual((attrs['min'], attrs['max']), ('12:00', '20:00'))
+
+    def test_available_times(self):
+        self.assertEqual(
+            available_times(self.restaurant, self.monday)[:3],
+            [time(12, 0), time(12, 30), time(13, 0)]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                user=self.user,
+                restaurant=self.restaurant,
+                date=self.monday,
+                time=time(14, 0),
+                number_of_guests=8
+            )
+        times = available_times(self.restaurant, self.monday, guests=4)
+        # The 14:00 booking holds 8 of 10 seats until 16:00.
+        self.assertNotIn(time(12, 30), times)
+        self.assertNotIn(time(15, 30), times)
+        self.assertIn(time(12, 0), times)
+        self.assertIn(time(16, 0), times)
+        with self.assertNumQueries(0):
+            available_times(self.restaurant, self.monday, guests=4)
+
+    def test_availability_endpoint(self):
+        response = self.client.get(
+            reverse('restaurant_availability', args=[self.restaurant.id]),
+            {'date': self.monday.isoformat(), 'guests': 2}
+        )
+        self.assertEqual(response.json()['times'][0], '12:00')
+        self.assertEqual(response.json()['times'][-1], '20:00')
+        response = self.client.get(
+            reverse('restaurant_availability', args=[self.restaurant.id]),
+            {'date': 'soon'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_past_closures_are_ignored(self):
+        Closure.objects.create(
+            restaurant=self.restaurant,
+            start_date=date(2020, 1, 1),
+            end_date=date(2020, 1, 2)
+        )
+        self.assertTrue(self.form(self.monday, '13:00').is_valid())
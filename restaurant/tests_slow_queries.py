@@ -0,0 +1,51 @@
+import json
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from restaurant.models import Restaurant
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+
+    def entries(self, logs):
+        return [json.loads(line.split(':', 2)[2]) for line in logs.output]
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_logged_with_plan_and_stack(self):
+        with self.assertLogs('restaurant.slow_queries', 'WARNING') as logs:
+            self.client.get(
+                reverse('restaurant_detail', args=[self.restaurant.id])
+            )
+        entries = self.entries(logs)
+        entry = next(
+            e for e in entries if 'restaurant_restaurant' in e['sql']
+        )
+        self.assertEqual(entry['view'], 'restaurant_detail')
+        self.assertEqual(entry['database'], 'sqlite')
+        self.assertEqual(entry['params'], [self.restaurant.id])
+        self.assertTrue(entry['explain'])
+        self.assertTrue(
+            any('restaurant/views.py' in frame for frame in entry['stack'])
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60 * 1000)
+    def test_fast_queries_not_logged(self):
+        with self.assertNoLogs('restaurant.slow_queries', 'WARNING'):
+            self.client.get(reverse('restaurant_list'))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        with self.assertNoLogs('restaurant.slow_queries', 'WARNING'):
+            self.client.get(reverse('restaurant_list'))
@@ -0,0 +1,129 @@
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from datetime import date, time, timedelta
+from restaurant.availability import booked_covers
+from restaurant.models import (
+    Restaurant, Booking, Closure, StandingReservation
+)
+from restaurant.standing import expand_standing_reservations
+
+
+class StandingReservationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='regular',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        # 2030-01-02 is a Wednesday.
+        self.today = date(2030, 1, 2)
+        self.reservation = StandingReservation.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            weekday=4,  # Friday
+            time=time(19, 0),
+            number_of_guests=4,
+            start_date=self.today
+        )
+
+    def test_occurrences(self):
+        self.reservation.interval_weeks = 2
+        self.reservation.end_date = date(2030, 2, 28)
+        self.assertEqual(self.reservation.first_date(), date(2030, 1, 4))
+        self.assertEqual(
+            list(self.reservation.occurrences(
+                date(2030, 1, 10), date(2030, 12, 31)
+            )),
+            [date(2030, 1, 18), date(2030, 2, 1), date(2030, 2, 15)]
+        )
+        self.assertTrue(self.reservation.occurs_on(date(2030, 2, 1)))
+        self.assertFalse(self.reservation.occurs_on(date(2030, 1, 11)))
+        self.assertFalse(self.reservation.occurs_on(date(2030, 3, 1)))
+
+    def test_expands_only_within_horizon(self):
+        created = expand_standing_reservations(21, today=self.today)
+        self.assertEqual(created, 3)
+        self.assertEqual(
+            list(Booking.objects.order_by('date').values_list(
+                'date', 'status', 'number_of_guests'
+            )),
+            [
+                (date(2030, 1, 4), 'confirmed', 4),
+                (date(2030, 1, 11), 'confirmed', 4),
+                (date(2030, 1, 18), 'confirmed', 4),
+            ]
+        )
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.expanded_until, date(2030, 1, 23))
+        self.assertEqual(
+            expand_standing_reservations(21, today=self.today), 0
+        )
+
+    def test_rolling_horizon_and_closures(self):
+        expand_standing_reservations(7, today=self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            Closure.objects.create(
+                restaurant=self.restaurant,
+                start_date=date(2030, 1, 11),
+                end_date=date(2030, 1, 11)
+            )
+        # A week later the horizon reaches 2030-01-23; the 11th is closed.
+        expand_standing_reservations(14, today=self.today + timedelta(days=7))
+        self.assertEqual(
+            list(Booking.objects.order_by('date').values_list(
+                'date', flat=True
+            )),
+            [date(2030, 1, 4), date(2030, 1, 18)]
+        )
+
+    def test_expanded_bookings_keep_the_bookkeeping(self):
+        expand_standing_reservations(3, today=self.today)
+        booking = Booking.objects.get()
+        self.assertEqual(
+            list(booking.events.values_list('event_type', flat=True)),
+            ['created']
+        )
+
+    def test_availability_counts_unexpanded_occurrences(self):
+        far_friday = date(2031, 6, 6)
+        self.assertEqual(
+            booked_covers(self.restaurant.id, far_friday), ((19 * 60, 4),)
+        )
+        self.assertEqual(
+            booked_covers(self.restaurant.id, far_friday - timedelta(days=1)),
+            ()
+        )
+        self.assertFalse(Booking.objects.exists())
+
+    def test_no_double_counting_after_expansion(self):
+        friday = date(2030, 1, 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            expand_standing_reservations(7, today=self.today)
+        self.assertEqual(
+            booked_covers(self.restaurant.id, friday), ((19 * 60, 4),)
+        )
+
+    def test_changing_reservation_invalidates_availability(self):
+        friday = date(2031, 6, 6)
+        booked_covers(self.restaurant.id, friday)
+        self.reservation.number_of_guests = 6
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.save()
+        self.assertEqual(
+            booked_covers(self.restaurant.id, friday), ((19 * 60, 6),)
+        )
+
+    def test_command(self):
+        out = StringIO()
+        call_command('expand_standing_reservations', '--days', '0',
+                     stdout=out)
+        self.assertIn('Created 0 booking(s)', out.getvalue())
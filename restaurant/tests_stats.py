@@ -0,0 +1,130 @@
+from io import StringIO
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from datetime import date, datetime
+from restaurant.models import Restaurant, Booking, DailyBookingStats
+
+
+class DailyBookingStatsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.day = date(2030, 6, 1)
+
+    def book(self, hour='19:00', guests=2, status='pending', day=None):
+        return Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=day or self.day,
+            time=datetime.strptime(hour, '%H:%M').time(),
+            number_of_guests=guests,
+            status=status
+        )
+
+    def stats(self, day=None):
+        return DailyBookingStats.objects.get(
+            restaurant=self.restaurant, date=day or self.day
+        )
+
+    def assertStats(self, pending, confirmed, cancelled, covers, hourly):
+        stats = self.stats()
+        self.assertEqual(
+            (stats.pending_count, stats.confirmed_count,
+             stats.cancelled_count, stats.total_covers, stats.hourly_covers),
+            (pending, confirmed, cancelled, covers, hourly)
+        )
+        self.assertEqual(
+            stats.peak_hour_covers, max(hourly.values(), default=0)
+        )
+
+    def test_create(self):
+        self.book()
+        self.book(hour='19:30', guests=4, status='confirmed')
+        self.book(hour='12:00', guests=3)
+        self.assertStats(2, 1, 0, 9, {'19': 6, '12': 3})
+
+    def test_create_with_string_values(self):
+        booking = Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=self.day.isoformat(),
+            time='19:00',
+            number_of_guests='4'
+        )
+        self.assertStats(1, 0, 0, 4, {'19': 4})
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertStats(0, 1, 0, 4, {'19': 4})
+
+    def test_status_change_and_cancel(self):
+        booking = self.book(guests=4)
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertStats(0, 1, 0, 4, {'19': 4})
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertStats(0, 0, 1, 0, {})
+
+    def test_cancel_view(self):
+        booking = self.book(guests=4)
+        self.client.force_login(self.user)
+        self.client.post(reverse('delete_booking', args=[booking.id]))
+        self.assertStats(0, 0, 1, 0, {})
+
+    def test_edit_moves_booking_between_days(self):
+        booking = self.book(guests=4)
+        other_day = date(2030, 6, 2)
+        booking.date = other_day
+        booking.time = datetime.strptime('20:00', '%H:%M').time()
+        booking.save()
+        self.assertStats(0, 0, 0, 0, {})
+        self.assertEqual(self.stats(other_day).hourly_covers, {'20': 4})
+
+    def test_delete(self):
+        booking = self.book(guests=4)
+        self.book(guests=2)
+        booking.delete()
+        self.assertStats(1, 0, 0, 2, {'19': 2})
+
+    def test_bulk_status_change(self):
+        self.book(guests=4)
+        self.book(guests=2, status='confirmed')
+        Booking.objects.all().set_status('cancelled')
+        self.assertStats(0, 0, 2, 0, {})
+
+    def test_unrelated_edit_does_not_touch_stats(self):
+        booking = self.book()
+        booking.special_requests = 'Window seat'
+        with self.assertNumQueries(5):
+            # Savepoint, UPDATE, change-feed and booking event INSERTs,
+            # release savepoint.
+            booking.save()
+
+    def test_rebuild_stats(self):
+        self.book(guests=4)
+        self.book(hour='12:00', guests=2, status='confirmed')
+        self.book(guests=5, status='cancelled')
+        expected = self.stats()
+        DailyBookingStats.objects.update(
+            pending_count=99, total_covers=0, hourly_covers={}
+        )
+        out = StringIO()
+        call_command('rebuild_stats', stdout=out)
+        self.assertIn('Rebuilt 1 daily stats rows', out.getvalue())
+        rebuilt = self.stats()
+        for field in ('pending_count', 'confirmed_count', 'cancelled_count',
+                      'total_covers', 'hourly_covers', 'peak_hour_covers'):
+            self.assertEqual(
+                getattr(rebuilt, field), getattr(expected, field)
+            )
@@ -0,0 +1,196 @@
+import json
+import random
+import time as clock
+from itertools import combinations
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from datetime import date, time
+from restaurant.forms import BookingForm
+from restaurant.models import Restaurant, Table, Booking
+from restaurant.tables import busy_tables, find_combination
+
+
+def grid(side, seed):
+    """A side x side floor where neighbouring tables can be joined."""
+    rng = random.Random(seed)
+    count = side * side
+    capacities = {pk: rng.choice([2, 2, 4, 4, 6]) for pk in range(count)}
+    neighbours = {pk: set() for pk in range(count)}
+    for pk in range(count):
+        row, col = divmod(pk, side)
+        for other in (pk + 1 if col + 1 < side else None,
+                      pk + side if row + 1 < side else None):
+            if other is not None:
+                neighbours[pk].add(other)
+                neighbours[other].add(pk)
+    return capacities, neighbours
+
+
+def connected(group, neighbours):
+    group = set(group)
+    seen, stack = set(), [next(iter(group))]
+    while stack:
+        pk = stack.pop()
+        if pk not in seen:
+            seen.add(pk)
+            stack.extend(neighbours[pk] & group)
+    return seen == group
+
+
+class FindCombinationTests(TestCase):
+    def test_single_table_when_one_fits(self):
+        capacities = {1: 12, 2: 10, 3: 4}
+        neighbours = {1: {3}, 2: set(), 3: {1}}
+        self.assertEqual(find_combination(capacities, neighbours, 9), [2])
+
+    def test_only_joinable_tables_are_combined(self):
+        capacities = {1: 6, 2: 6, 3: 4, 4: 4, 5: 4}
+        neighbours = {1: set(), 2: set(), 3: {4}, 4: {3, 5}, 5: {4}}
+        self.assertEqual(
+            find_combination(capacities, neighbours, 10), [3, 4, 5]
+        )
+        self.assertIsNone(find_combination(capacities, neighbours, 13))
+
+    def test_matches_brute_force(self):
+        for seed in range(5):
+            capacities, neighbours = grid(4, seed)
+            for guests in range(9, 25):
+                best = None
+                for size in range(2, 7):
+                    fits = [
+                        (sum(capacities[pk] for pk in group) - guests,
+                         list(group))
+                        for group in combinations(sorted(capacities), size)
+                        if sum(capacities[pk] for pk in group) >= guests
+                        and connected(group, neighbours)
+                    ]
+                    if fits:
+                        best = (size, min(fits)[0])
+                        break
+                found = find_combination(capacities, neighbours, guests, 6)
+                if best is None:
+                    self.assertIsNone(found)
+                    continue
+                self.assertTrue(connected(found, neighbours))
+                self.assertEqual((
+                    len(found),
+                    sum(capacities[pk] for pk in found) - guests
+                ), best)
+
+    def test_large_floor_stays_fast(self):
+        capacities, neighbours = grid(8, seed=0)
+        started = clock.perf_counter()
+        for guests in range(9, 31):
+            find_combination(capacities, neighbours, guests, 6)
+        elapsed = clock.perf_counter() - started
+        # 22 searches over 64 tables; well under 10ms each in practice.
+        self.assertLess(elapsed, 22 * 0.05)
+
+
+class LargePartyBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.tables = [
+            Table.objects.create(
+                restaurant=self.restaurant, table_number=number,
+                capacity=capacity
+            )
+            for number, capacity in enumerate([4, 6, 6, 2], start=1)
+        ]
+        first, second, third, fourth = self.tables
+        first.joinable_with.add(second)
+        second.joinable_with.add(third)
+        self.day = date(2030, 6, 1)
+
+    def data(self, guests, at='19:00'):
+        return {
+            'date': self.day.isoformat(),
+            'time': at,
+            'number_of_guests': guests,
+            'special_requests': '',
+        }
+
+    def test_large_party_needs_a_restaurant(self):
+        form = BookingForm(self.data(12))
+        self.assertFalse(form.is_valid())
+        self.assertIn('number_of_guests', form.errors)
+
+    def test_booking_view_seats_party_on_joined_tables(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(
+            reverse('book_restaurant', args=[self.restaurant.id]),
+            self.data(12)
+        )
+        booking = Booking.objects.get()
+        seated = [booking.table] + list(booking.joined_tables.all())
+        self.assertEqual(
+            sorted(table.table_number for table in seated), [2, 3]
+        )
+
+    def test_overlapping_bookings_hold_their_tables(self):
+        form = BookingForm(self.data(12), restaurant=self.restaurant)
+        self.assertTrue(form.is_valid())
+        booking = form.save(commit=False)
+        booking.user = self.user
+        booking.restaurant = self.restaurant
+        booking.save()
+        form.save_m2m()
+        self.assertEqual(
+            busy_tables(self.restaurant.id, self.day, time(20, 0)),
+            {self.tables[1].id, self.tables[2].id}
+        )
+        self.assertEqual(
+            busy_tables(self.restaurant.id, self.day, time(21, 0)), set()
+        )
+        form = BookingForm(self.data(10, '20:00'), restaurant=self.restaurant)
+        self.assertFalse(form.is_valid())
+        self.assertIn(
+            'We cannot seat a party of 10', form.errors['__all__'][0]
+        )
+        self.assertTrue(BookingForm(
+            self.data(10, '21:00'), restaurant=self.restaurant
+        ).is_valid())
+
+    def test_batch_does_not_seat_two_parties_on_the_same_tables(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('api_booking_list')
+        first, overlapping = (
+            dict(self.data(guests, at), restaurant=self.restaurant.id)
+            for guests, at in ((12, '19:00'), (10, '20:00'))
+        )
+        response = self.client.post(
+            url, json.dumps([first, overlapping]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['index'], 1)
+        self.assertFalse(Booking.objects.exists())
+
+        later = dict(overlapping, time='21:00')
+        response = self.client.post(
+            url, json.dumps([first, later]), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        seated = [
+            {booking.table_id} | set(
+                booking.joined_tables.values_list('id', flat=True)
+            )
+            for booking in Booking.objects.order_by('time')
+        ]
+        self.assertEqual(seated, [
+            {self.tables[1].id, self.tables[2].id},
+            {self.tables[0].id, self.tables[1].id},
+        ])
@@ -0,0 +1,114 @@
+from io import StringIO
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.core.management.base import CommandError
+from datetime import time
+from restaurant.models import Restaurant, TimeSlot, OpeningHours
+from restaurant.timeslots import expand, generate_time_slots, parse_weekdays
+
+
+class TimeSlotGenerationTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com',
+            opening_time=time(12, 0),
+            closing_time=time(14, 0)
+        )
+
+    def slots(self, weekday):
+        return list(TimeSlot.objects.filter(
+            restaurant=self.restaurant, weekday=weekday
+        ).order_by('start_time').values_list('start_time', 'end_time'))
+
+    def test_parse_weekdays(self):
+        self.assertEqual(parse_weekdays('weekdays'), (0, 1, 2, 3, 4))
+        self.assertEqual(parse_weekdays('Mon, wed,6'), (0, 2, 6))
+        with self.assertRaises(ValueError):
+            parse_weekdays('someday')
+
+    def test_expand_fits_slots_inside_periods(self):
+        self.assertEqual(
+            expand([(720, 840)], every=30, length=60),
+            [(720, 780), (750, 810), (780, 840)]
+        )
+
+    def test_generates_from_opening_times(self):
+        created = generate_time_slots(weekdays=parse_weekdays('weekdays'))
+        self.assertEqual(created, 5 * 4)
+        self.assertEqual(self.slots(0), [
+            (time(12, 0), time(12, 30)),
+            (time(12, 30), time(13, 0)),
+            (time(13, 0), time(13, 30)),
+            (time(13, 30), time(14, 0)),
+        ])
+        self.assertEqual(self.slots(5), [])
+
+    def test_uses_weekly_opening_hours(self):
+        OpeningHours.objects.create(
+            restaurant=self.restaurant, weekday=4,
+            opens=time(18, 0), closes=time(19, 0)
+        )
+        generate_time_slots(every=60)
+        self.assertEqual(self.slots(4), [(time(18, 0), time(19, 0))])
+        self.assertEqual(self.slots(0), [])
+
+    def test_is_idempotent(self):
+        generate_time_slots()
+        TimeSlot.objects.filter(weekday=0).first().delete()
+        self.assertEqual(generate_time_slots(), 1)
+        self.assertEqual(generate_time_slots(), 0)
+
+    def test_many_restaurants_in_constant_queries(self):
+        Restaurant.objects.bulk_create([
+            Restaurant(
+                name=f'Restaurant {i}', address='1 St',
+                contact_number='1', email='r@test.com'
+            )
+            for i in range(200)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            created = generate_time_slots()
+        # Restaurants, opening hours and a count before and after; the
+        # rest are batched INSERTs, however many rows the backend allows.
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if 'INSERT' not in query['sql']
+        ]), 4)
+        self.assertEqual(created, 7 * 4 + 200 * 7 * 26)
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'generate_time_slots', '--restaurant', str(self.restaurant.id),
+            '--weekdays', 'sat,sun', '--start', '18:00', '--end', '20:00',
+            '--every', '60', stdout=out
+        )
+        self.assertIn('Created 4 time slot(s)', out.getvalue())
+        self.assertEqual(self.slots(6), [
+            (time(18, 0), time(19, 0)), (time(19, 0), time(20, 0)),
+        ])
+        with self.assertRaises(CommandError):
+            call_command('generate_time_slots', '--start', '18:00')
+
+    def test_admin_action(self):
+        User.objects.create_user(
+            username='staff', password='staffpass123',
+            is_staff=True, is_superuser=True
+        )
+        self.client.login(username='staff', password='staffpass123')
+        response = self.client.post(
+            reverse('admin:restaurant_restaurant_changelist'),
+            {
+                'action': 'generate_slots',
+                '_selected_action': [self.restaurant.id],
+            },
+            follow=True
+        )
+        self.assertContains(response, 'Created 28 time slot(s)')
@@ -0,0 +1,245 @@
+import json
+from unittest import mock
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models import F
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from datetime import date, time
+from decimal import Decimal
+from restaurant.models import (
+    Booking, Contact, EditConflict, MenuItem, Restaurant
+)
+
+
+class VersionedSaveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.staff = User.objects.create_user(
+            username='staffuser',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            address='123 Test St',
+            contact_number='1234567890',
+            email='restaurant@test.com'
+        )
+        self.booking = Booking.objects.create(
+            user=self.user,
+            restaurant=self.restaurant,
+            date=date(2030, 6, 1),
+            time=time(19, 0),
+            number_of_guests=2,
+            special_requests='Window seat',
+            status='pending'
+        )
+        self.item = MenuItem.objects.create(
+            restaurant=self.restaurant,
+            name='Soup',
+            description='Hot',
+            price=Decimal('5.00')
+        )
+        self.contact = Contact.objects.create(
+            name='Test User',
+            email='test@example.com',
+            subject='Test Subject',
+            message='Test Message'
+        )
+
+    def test_save_writes_changed_fields_where_version_matches(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.number_of_guests = 3
+        with CaptureQueriesContext(connection) as queries:
+            booking.save()
+        update = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "restaurant_booking"')
+        )
+        self.assertIn('"number_of_guests" = 3', update)
+        self.assertIn('"version" = 2', update)
+        self.assertNotIn('"special_requests"', update)
+        self.assertIn('"restaurant_booking"."version" = 1', update)
+        self.assertEqual(booking.version, 2)
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual(Booking.objects.get(pk=booking.pk).version, 3)
+
+    def test_stale_save_is_refused(self):
+        mine = Booking.objects.get(pk=self.booking.pk)
+        theirs = Booking.objects.get(pk=self.booking.pk)
+        theirs.status = 'confirmed'
+        theirs.save()
+        mine.special_requests = 'Quiet table'
+        with self.assertRaises(EditConflict):
+            mine.save()
+        self.assertEqual(mine.version, 1)
+        stored = Booking.objects.get(pk=self.booking.pk)
+        self.assertEqual(stored.status, 'confirmed')
+        self.assertEqual(stored.special_requests, 'Window seat')
+        # Nothing derived from the booking saw the refused change.
+        self.assertFalse(stored.events.filter(
+            details__has_key='special_requests'
+        ).exists())
+        mine.refresh_from_db()
+        mine.special_requests = 'Quiet table'
+        mine.save()
+        self.assertEqual(
+            Booking.objects.get(pk=self.booking.pk).special_requests,
+            'Quiet table'
+        )
+
+    def test_bulk_status_change_moves_version(self):
+        stale = Booking.objects.get(pk=self.booking.pk)
+        Booking.objects.filter(pk=self.booking.pk).set_status('confirmed')
+        stale.number_of_guests = 4
+        with self.assertRaises(EditConflict):
+            stale.save()
+
+    def test_edit_booking_reports_conflict(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('edit_booking', args=[self.booking.id])
+        response = self.client.get(url)
+        self.assertContains(response, 'name="version" value="1"')
+        Booking.objects.filter(pk=self.booking.pk).set_status('confirmed')
+        data = {
+            'date': '2030-06-01',
+            'time': '19:00',
+            'number_of_guests': 4,
+            'special_requests': 'Window seat',
+            'version': 1,
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'changed by someone else',
+            response.context['form'].errors['__all__'][0]
+        )
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.number_of_guests, 2)
+        self.assertEqual(self.booking.status, 'confirmed')
+
+        response = self.client.post(url, dict(data, version=2))
+        self.assertRedirects(response, reverse('my_bookings'))
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.number_of_guests, 4)
+        self.assertEqual(self.booking.status, 'confirmed')
+
+    def test_edit_menu_item_reports_conflict(self):
+        self.client.login(username='staffuser', password='testpass123')
+        url = reverse('edit_menu_item', args=[self.item.id])
+        data = {
+            'name': 'Soup',
+            'description': 'Hot',
+            'price': '6.00',
+            'category': 'Starters',
+            'version': 1,
+        }
+        MenuItem.objects.get(pk=self.item.pk).save()
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal('5.00'))
+        # The new category was rolled back with the item.
+        self.assertFalse(self.restaurant.menu_categories.exists())
+        response = self.client.post(url, dict(data, version=2))
+        self.assertEqual(response.status_code, 302)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal('6.00'))
+
+    def test_update_contact_status_reports_conflict(self):
+        self.client.login(username='staffuser', password='testpass123')
+        url = reverse('update_contact_status', args=[self.contact.id])
+        Contact.objects.filter(pk=self.contact.pk).set_status('replied')
+        response = self.client.post(url, {'status': 'read', 'version': 1})
+        self.assertIn(
+            'changed by someone else',
+            str(list(get_messages(response.wsgi_request))[0])
+        )
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.status, 'replied')
+        self.client.post(url, {'status': 'read', 'version': 2})
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.status, 'read')
+        self.assertEqual(self.contact.version, 3)
+
+    def race(self):
+        """Patch Booking.save so another save lands just before each one."""
+        original = Booking.save
+
+        def save(booking, *args, **kwargs):
+            Booking.objects.filter(pk=booking.pk).update(
+                version=F('version') + 1
+            )
+            return original(booking, *args, **kwargs)
+        return mock.patch.object(Booking, 'save', autospec=True,
+                                 side_effect=save)
+
+    def test_api_reports_conflict(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('api_booking_detail', args=[self.booking.id])
+        with self.race():
+            response = self.client.patch(
+                url, json.dumps({'number_of_guests': 4}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('changed by someone else', response.json()['error'])
+        self.assertEqual(response.json()['booking']['number_of_guests'], 2)
+        with self.race():
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['booking']['status'], 'pending')
+
+    def test_cancel_booking_reports_conflict(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('delete_booking', args=[self.booking.id])
+        with self.race():
+            response = self.client.post(url)
+        self.assertRedirects(response, reverse('my_bookings'))
+        self.assertIn(
+            'changed by someone else',
+            str(list(get_messages(response.wsgi_request))[0])
+        )
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'pending')
+
+    def test_bulk_menu_edit_reports_conflict(self):
+        self.client.login(username='staffuser', password='testpass123')
+        url = reverse('bulk_edit_menu', args=[self.restaurant.id])
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': self.item.id,
+            'form-0-version': 1,
+            'form-0-name': 'Soup',
+            'form-0-description': 'Hot',
+            'form-0-price': '7.00',
+        }
+        self.assertContains(
+            self.client.get(url), 'name="form-0-version" value="1"'
+        )
+        MenuItem.objects.get(pk=self.item.pk).save()
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'Soup changed while you were editing',
+            str(response.context['formset'].non_form_errors())
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal('5.00'))
+        response = self.client.post(url, dict(data, **{'form-0-version': 2}))
+        self.assertEqual(response.status_code, 302)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal('7.00'))
+        self.assertEqual(self.item.version, 3)
@@ -0,0 +1,114 @@
+"""Generate recurring ``TimeSlot`` rows for many restaurants at once.
+
+A rule is "a slot every ``every`` minutes, each ``length`` minutes long, on
+these weekdays", laid over each restaurant's opening periods (its weekly
+``OpeningHours``, or ``opening_time``-``closing_time`` when it has none)
+unless explicit ``start``/``end`` times are given. Slots are inserted with
+``bulk_create(ignore_conflicts=True)`` against the unique
+(restaurant, weekday, start_time) constraint, so generating again only adds
+what is missing.
+"""
+from collections import defaultdict
+
+from .models import OpeningHours, Restaurant, TimeSlot
+from .schedule import to_minutes, to_time
+
+WEEKDAY_SETS = {
+    'all': tuple(range(7)),
+    'weekdays': tuple(range(5)),
+    'weekends': (5, 6),
+}
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def parse_weekdays(value):
+    """'weekdays', 'all', 'weekends' or a list like 'mon,wed,5'."""
+    value = value.strip().lower()
+    if value in WEEKDAY_SETS:
+        return WEEKDAY_SETS[value]
+    weekdays = set()
+    for part in value.split(','):
+        part = part.strip()[:3]
+        if part.isdigit() and int(part) < 7:
+            weekdays.add(int(part))
+        elif part in WEEKDAY_NAMES:
+            weekdays.add(WEEKDAY_NAMES.index(part))
+        else:
+            raise ValueError(f'Unknown weekday: {part!r}')
+    return tuple(sorted(weekdays))
+
+
+def expand(periods, every, length):
+    """(start, end) minute pairs that fit inside each opening period."""
+    slots = []
+    for opens, closes in periods:
+        for start in range(opens, closes - length + 1, every):
+            slots.append((start, start + length))
+    return slots
+
+
+def _opening_periods(restaurants, weekdays):
+    """Opening periods per (restaurant id, weekday), in one query."""
+    hours = defaultdict(list)
+    for restaurant_id, weekday, opens, closes in OpeningHours.objects.filter(
+        restaurant__in=[restaurant['id'] for restaurant in restaurants]
+    ).values_list('restaurant_id', 'weekday', 'opens', 'closes'):
+        hours[restaurant_id, weekday].append(
+            (to_minutes(opens), to_minutes(closes))
+        )
+    has_hours = {restaurant_id for restaurant_id, _ in hours}
+    periods = {}
+    for restaurant in restaurants:
+        for weekday in weekdays:
+            if restaurant['id'] in has_hours:
+                periods[restaurant['id'], weekday] = sorted(
+                    hours.get((restaurant['id'], weekday), [])
+                )
+            else:
+                periods[restaurant['id'], weekday] = [(
+                    to_minutes(restaurant['opening_time']),
+                    to_minutes(restaurant['closing_time']),
+                )]
+    return periods
+
+
+def generate_time_slots(restaurants=None, every=30, length=None,
+                        weekdays=WEEKDAY_SETS['all'], start=None, end=None,
+                        batch_size=1000):
+    """Create the slots ``restaurants`` are missing; return how many.
+
+    ``restaurants`` is a ``Restaurant`` queryset (all of them by default).
+    """
+    if every < 1:
+        raise ValueError('every must be at least one minute.')
+    length = length or every
+    restaurants = list((
+        restaurants if restaurants is not None else Restaurant.objects.all()
+    ).values('id', 'opening_time', 'closing_time'))
+    if start is not None and end is not None:
+        window = [(to_minutes(start), to_minutes(end))]
+        periods = {
+            (restaurant['id'], weekday): window
+            for restaurant in restaurants for weekday in weekdays
+        }
+    else:
+        periods = _opening_periods(restaurants, weekdays)
+
+    slots = [
+        TimeSlot(
+            restaurant_id=restaurant_id,
+            weekday=weekday,
+            start_time=to_time(slot_start),
+            end_time=to_time(slot_end),
+        )
+        for (restaurant_id, weekday), day_periods in periods.items()
+        for slot_start, slot_end in expand(day_periods, every, length)
+    ]
+    existing = TimeSlot.objects.filter(
+        restaurant__in=[restaurant['id'] for restaurant in restaurants]
+    )
+    before = existing.count()
+    TimeSlot.objects.bulk_create(
+        slots, batch_size=batch_size, ignore_conflicts=True
+    )
+    return existing.count() - before
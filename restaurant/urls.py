@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.restaurant_list, name='restaurant_list'),
@@ -8,6 +8,16 @@ urlpatterns = [
         views.restaurant_detail,
         name='restaurant_detail'
     ),
+    path(
+        'restaurant/<int:restaurant_id>/availability/',
+        views.restaurant_availability,
+        name='restaurant_availability'
+    ),
+    path(
+        'restaurant/<int:restaurant_id>/availability/stream/',
+        views.restaurant_availability_stream,
+        name='restaurant_availability_stream'
+    ),
     path(
         'restaurant/<int:restaurant_id>/book/',
         views.book_restaurant,
@@ -33,6 +43,11 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('contact/success/', views.contact_success, name='contact_success'),
     path('contact/messages/', views.contact_messages, name='contact_messages'),
+    path(
+        'contact/messages/bulk/',
+        views.bulk_update_contacts,
+        name='bulk_update_contacts'
+    ),
     path(
         'contact/messages/<int:contact_id>/',
         views.view_contact,
@@ -48,11 +63,27 @@ urlpatterns = [
         views.delete_contact,
         name='delete_contact'
     ),
+    path('menu/search/', views.menu_search, name='menu_search'),
     path(
         'restaurant/<int:restaurant_id>/menu/',
         views.manage_menu,
         name='manage_menu'
     ),
+    path(
+        'restaurant/<int:restaurant_id>/menu/import/',
+        views.import_menu,
+        name='import_menu'
+    ),
+    path(
+        'restaurant/<int:restaurant_id>/menu/edit/',
+        views.bulk_edit_menu,
+        name='bulk_edit_menu'
+    ),
+    path(
+        'restaurant/<int:restaurant_id>/occupancy/',
+        views.occupancy_dashboard,
+        name='occupancy_dashboard'
+    ),
     path(
         'menu-item/<int:menu_item_id>/edit/',
         views.edit_menu_item,
@@ -69,4 +100,27 @@ urlpatterns = [
         name='add_menu_item'
     ),
     path('logout/', views.logout_view, name='logout'),
+    path('metrics', views.metrics, name='metrics'),
+    path(
+        'booking-events/export/',
+        views.export_booking_events,
+        name='export_booking_events'
+    ),
+    path(
+        'calendar/user/<str:token>.ics',
+        views.user_calendar,
+        name='user_calendar'
+    ),
+    path(
+        'calendar/restaurant/<str:token>.ics',
+        views.restaurant_calendar,
+        name='restaurant_calendar'
+    ),
+    path('api/v1/bookings/', api.booking_list, name='api_booking_list'),
+    path(
+        'api/v1/bookings/<int:booking_id>/',
+        api.booking_detail,
+        name='api_booking_detail'
+    ),
+    path('api/v1/changes/', api.change_feed, name='api_change_feed'),
 ]
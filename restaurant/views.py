@@ -1,10 +1,43 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import csv
+import json
+from asgiref.sync import sync_to_async
+from django.shortcuts import (
+    render, redirect, get_object_or_404, aget_object_or_404
+)
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from .models import Restaurant, MenuItem, Booking, Contact
-from .forms import UserRegistrationForm, BookingForm, MenuItemForm, ContactForm
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, timedelta
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from . import (
+    availability, availability_stream, ics, idempotency, menu, reports
+)
+from . import metrics as app_metrics
+from .models import (
+    Restaurant, MenuItem, Booking, BookingEvent, ArchivedBooking, Contact,
+    EditConflict
+)
+from .ratelimit import rate_limit
+from .forms import (
+    UserRegistrationForm, BookingForm, MenuItemForm, MenuItemFormSet,
+    MenuImportForm, MenuSearchForm, ContactForm
+)
+from .tables import lock_restaurants
+
+BOOKING_TABS = ('upcoming', 'past', 'cancelled')
 
 
 def restaurant_list(request):
@@ -32,6 +65,7 @@ def staff_required(view_func):
     return _wrapped_view
 
 
+@rate_limit('contact')
 def contact(request):
     """View for submitting contact form."""
     if request.method == 'POST':
@@ -39,6 +73,7 @@ def contact(request):
         if form.is_valid():
             try:
                 form.save()
+                app_metrics.CONTACT_SUBMISSIONS.inc()
                 messages.success(
                     request,
                     'Thank you for your message! We will get back to you soon.'
@@ -70,14 +105,53 @@ def contact(request):
 
 @login_required
 def my_bookings(request):
-    """View for displaying user's bookings."""
+    """View for displaying user's bookings, one tab at a time.
+
+    ``?tab=`` picks ``upcoming`` (the default), ``past`` or ``cancelled``;
+    the tab counts come from the stored ``booking_counts``. Archived
+    bookings are only read on the past tab, when asked for with
+    ``?archived=1``.
+    """
+    show_archived = request.GET.get('archived') == '1'
+    tab = request.GET.get('tab')
+    if tab not in BOOKING_TABS:
+        tab = 'past' if show_archived else 'upcoming'
+    today = timezone.localdate()
     bookings = Booking.objects.filter(
         user=request.user
-    ).order_by('-date', '-time')
+    ).select_related('restaurant')
+    if tab == 'cancelled':
+        bookings = bookings.filter(status='cancelled').order_by(
+            '-date', '-time'
+        )
+    elif tab == 'past':
+        bookings = bookings.filter(date__lt=today).exclude(
+            status='cancelled'
+        ).order_by('-date', '-time')
+    else:
+        bookings = bookings.filter(date__gte=today).exclude(
+            status='cancelled'
+        ).order_by('date', 'time')
+    calendar_url = request.build_absolute_uri(reverse(
+        'user_calendar',
+        args=[ics.feed_token('user', request.user.pk)]
+    ))
+    show_archived = show_archived and tab == 'past'
+    archived_bookings = None
+    if show_archived:
+        archived_bookings = ArchivedBooking.objects.filter(
+            user=request.user
+        ).select_related('restaurant').order_by('-date', '-time')
     return render(
         request,
         'restaurant/my_bookings.html',
-        {'bookings': bookings}
+        {
+            'bookings': bookings,
+            'tab': tab,
+            'calendar_url': calendar_url,
+            'show_archived': show_archived,
+            'archived_bookings': archived_bookings,
+        }
     )
 
 
@@ -91,8 +165,13 @@ def delete_booking(request, booking_id):
         )
     if request.method == 'POST':
         booking.status = 'cancelled'
-        booking.save()
-        messages.success(request, 'Your booking has been cancelled')
+        booking._actor = request.user
+        try:
+            booking.save()
+        except EditConflict as conflict:
+            messages.error(request, str(conflict))
+        else:
+            messages.success(request, 'Your booking has been cancelled')
         return redirect('my_bookings')
     return render(
         request,
@@ -110,17 +189,84 @@ def logout_view(request):
 def restaurant_detail(request, restaurant_id):
     """View for displaying restaurant details."""
     restaurant = get_object_or_404(Restaurant, id=restaurant_id)
-    menu_items = MenuItem.objects.filter(restaurant=restaurant)
     return render(
         request,
         'restaurant/restaurant_detail.html',
         {
             'restaurant': restaurant,
-            'menu_items': menu_items
+            'menu': menu.get_menu(restaurant.id)
         }
     )
 
 
+def menu_search(request):
+    """View for finding dishes across restaurants by text and price."""
+    form = MenuSearchForm(request.GET or None)
+    sections, next_query = [], None
+    if form.is_valid():
+        items, next_cursor = menu.search_menus(
+            form.cleaned_data['q'],
+            form.cleaned_data['min_price'],
+            form.cleaned_data['max_price'],
+            form.cleaned_data['after'],
+        )
+        sections = menu.group_by_restaurant(items)
+        if next_cursor:
+            params = request.GET.copy()
+            params['after'] = next_cursor
+            next_query = params.urlencode()
+    return render(
+        request,
+        'restaurant/menu_search.html',
+        {'form': form, 'sections': sections, 'next_query': next_query}
+    )
+
+
+def restaurant_availability(request, restaurant_id):
+    """JSON list of start times with room on ``?date=`` for ``?guests=``."""
+    restaurant = get_object_or_404(Restaurant, id=restaurant_id)
+    try:
+        day = date.fromisoformat(request.GET.get('date', ''))
+        guests = int(request.GET.get('guests', 2))
+    except ValueError:
+        return JsonResponse(
+            {'error': 'Expected ?date=YYYY-MM-DD and a whole guests count.'},
+            status=400
+        )
+    if day < timezone.localdate() or guests < 1:
+        return JsonResponse({'date': day.isoformat(), 'times': []})
+    times = availability.available_times(restaurant, day, guests)
+    return JsonResponse({
+        'date': day.isoformat(),
+        'times': [value.strftime('%H:%M') for value in times],
+    })
+
+
+async def restaurant_availability_stream(request, restaurant_id):
+    """Server-Sent Events of free seats per start time on ``?date=``.
+
+    Needs an ASGI server; under WSGI the stream would hold a worker thread
+    for as long as the page is open, so the browser is told to stop.
+    """
+    restaurant = await aget_object_or_404(Restaurant, id=restaurant_id)
+    try:
+        day = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        return JsonResponse(
+            {'error': 'Expected ?date=YYYY-MM-DD.'}, status=400
+        )
+    if not isinstance(request, ASGIRequest) or day < timezone.localdate():
+        # EventSource does not reconnect after a 204.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        availability_stream.events(restaurant, day),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def register(request):
     """View for user registration."""
     form = UserRegistrationForm()
@@ -143,28 +289,67 @@ def register(request):
     )
 
 
+@rate_limit('booking')
 @login_required
 def book_restaurant(request, restaurant_id):
-    """View for making a restaurant booking."""
+    """View for making a restaurant booking.
+
+    The form carries an idempotency key, so a double-click or a retried
+    POST gets the first POST's response instead of booking twice.
+    """
     restaurant = get_object_or_404(Restaurant, id=restaurant_id)
-    if request.method == 'POST':
-        form = BookingForm(request.POST)
+    if request.method != 'POST':
+        return _booking_form(
+            request, BookingForm(restaurant=restaurant), restaurant,
+            idempotency.new_key()
+        )
+    form = BookingForm(request.POST, restaurant=restaurant)
+    key = idempotency.request_key(request)
+    if key is None:
+        return _create_booking(
+            request, form, restaurant, idempotency.new_key()
+        )
+    try:
+        return idempotency.run_once(
+            request, key,
+            lambda: _create_booking(request, form, restaurant, key)
+        )
+    except (idempotency.KeyReused, idempotency.KeyTooLong):
+        form.add_error(
+            None,
+            'This form was already used for another booking. Check your '
+            'bookings before booking again.'
+        )
+        return _booking_form(
+            request, form, restaurant, idempotency.new_key()
+        )
+
+
+def _create_booking(request, form, restaurant, key):
+    with transaction.atomic():
+        # Tables for large parties are picked and saved in one go.
+        lock_restaurants([restaurant.id])
         if form.is_valid():
             booking = form.save(commit=False)
             booking.user = request.user
             booking.restaurant = restaurant
+            booking._actor = request.user
             booking.save()
-            messages.success(
-                request,
-                'Your booking has been created successfully!'
-            )
-            return redirect('my_bookings')
-    else:
-        form = BookingForm()
+            form.save_m2m()
+    if not form.is_valid():
+        return _booking_form(request, form, restaurant, key)
+    messages.success(
+        request,
+        'Your booking has been created successfully!'
+    )
+    return redirect('my_bookings')
+
+
+def _booking_form(request, form, restaurant, key):
     return render(
         request,
         'restaurant/booking_form.html',
-        {'form': form, 'restaurant': restaurant}
+        {'form': form, 'restaurant': restaurant, 'idempotency_key': key}
     )
 
 
@@ -175,12 +360,17 @@ def edit_booking(request, booking_id):
     if request.method == 'POST':
         form = BookingForm(request.POST, instance=booking)
         if form.is_valid():
-            form.save()
-            messages.success(
-                request,
-                'Your booking has been updated successfully!'
-            )
-            return redirect('my_bookings')
+            booking._actor = request.user
+            try:
+                form.save()
+            except EditConflict as conflict:
+                form.add_error(None, str(conflict))
+            else:
+                messages.success(
+                    request,
+                    'Your booking has been updated successfully!'
+                )
+                return redirect('my_bookings')
     else:
         form = BookingForm(instance=booking)
     return render(
@@ -193,14 +383,30 @@ def edit_booking(request, booking_id):
 @login_required
 def manage_menu(request, restaurant_id):
     """View for managing restaurant menu items."""
-    restaurant = get_object_or_404(Restaurant, id=restaurant_id)
+    restaurant = get_object_or_404(
+        Restaurant.objects.prefetch_related(Prefetch(
+            'menuitem_set',
+            queryset=menu.menu_queryset(),
+            to_attr='menu_items'
+        )),
+        id=restaurant_id
+    )
     if not request.user.is_staff:
         return HttpResponseForbidden()
-    menu_items = MenuItem.objects.filter(restaurant=restaurant)
+    menu_items = restaurant.menu_items
+    calendar_url = request.build_absolute_uri(reverse(
+        'restaurant_calendar',
+        args=[ics.feed_token('restaurant', restaurant.id)]
+    ))
     return render(
         request,
         'restaurant/manage_menu.html',
-        {'restaurant': restaurant, 'menu_items': menu_items}
+        {
+            'restaurant': restaurant,
+            'menu_items': menu_items,
+            'menu': menu.group_menu(menu_items),
+            'calendar_url': calendar_url,
+        }
     )
 
 
@@ -211,15 +417,13 @@ def add_menu_item(request, restaurant_id):
     if not request.user.is_staff:
         return HttpResponseForbidden()
     if request.method == 'POST':
-        form = MenuItemForm(request.POST)
+        form = MenuItemForm(request.POST, restaurant=restaurant)
         if form.is_valid():
-            menu_item = form.save(commit=False)
-            menu_item.restaurant = restaurant
-            menu_item.save()
+            form.save()
             messages.success(request, 'Menu item added successfully!')
             return redirect('manage_menu', restaurant_id=restaurant_id)
     else:
-        form = MenuItemForm()
+        form = MenuItemForm(restaurant=restaurant)
     return render(
         request,
         'restaurant/menu_item_form.html',
@@ -227,6 +431,74 @@ def add_menu_item(request, restaurant_id):
     )
 
 
+@login_required
+def import_menu(request, restaurant_id):
+    """View for adding and updating menu items from a CSV or JSON file."""
+    restaurant = get_object_or_404(Restaurant, id=restaurant_id)
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    if request.method == 'POST':
+        form = MenuImportForm(
+            request.POST, request.FILES, restaurant=restaurant
+        )
+        if form.is_valid():
+            try:
+                menu.save_menu_items(
+                    restaurant.id, form.new_items, form.changed_items,
+                    form.new_categories
+                )
+            except EditConflict as conflict:
+                form.add_error(None, str(conflict))
+            else:
+                messages.success(
+                    request,
+                    f'Menu imported: {len(form.new_items)} added, '
+                    f'{len(form.changed_items)} updated.'
+                )
+                return redirect('manage_menu', restaurant_id=restaurant_id)
+    else:
+        form = MenuImportForm(restaurant=restaurant)
+    return render(
+        request,
+        'restaurant/menu_import.html',
+        {'form': form, 'restaurant': restaurant}
+    )
+
+
+@login_required
+def bulk_edit_menu(request, restaurant_id):
+    """View for editing every menu item of a restaurant on one page."""
+    restaurant = get_object_or_404(Restaurant, id=restaurant_id)
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    # The same order as the menu page.
+    items = menu.menu_queryset().filter(restaurant=restaurant)
+    if request.method == 'POST':
+        formset = MenuItemFormSet(request.POST, queryset=items)
+        if formset.is_valid():
+            # The version posted back with every row is not an edit.
+            changed = [
+                form.instance for form in formset.forms
+                if set(form.changed_data) - {'version'}
+            ]
+            try:
+                menu.save_menu_items(restaurant.id, changed=changed)
+            except EditConflict as conflict:
+                formset.non_form_errors().append(str(conflict))
+            else:
+                messages.success(
+                    request, f'{len(changed)} menu item(s) updated.'
+                )
+                return redirect('manage_menu', restaurant_id=restaurant_id)
+    else:
+        formset = MenuItemFormSet(queryset=items)
+    return render(
+        request,
+        'restaurant/menu_bulk_edit.html',
+        {'formset': formset, 'restaurant': restaurant}
+    )
+
+
 @login_required
 def edit_menu_item(request, menu_item_id):
     """View for editing a menu item."""
@@ -236,12 +508,16 @@ def edit_menu_item(request, menu_item_id):
     if request.method == 'POST':
         form = MenuItemForm(request.POST, instance=menu_item)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Menu item updated successfully!')
-            return redirect(
-                'manage_menu',
-                restaurant_id=menu_item.restaurant.id
-            )
+            try:
+                form.save()
+            except EditConflict as conflict:
+                form.add_error(None, str(conflict))
+            else:
+                messages.success(request, 'Menu item updated successfully!')
+                return redirect(
+                    'manage_menu',
+                    restaurant_id=menu_item.restaurant.id
+                )
     else:
         form = MenuItemForm(instance=menu_item)
     return render(
@@ -273,19 +549,64 @@ def delete_menu_item(request, menu_item_id):
     )
 
 
+CONTACTS_PER_PAGE = 50
+
+
 @login_required
 def contact_messages(request):
-    """View for displaying contact messages."""
+    """View for displaying contact messages, optionally by status."""
     if not request.user.is_staff:
         return HttpResponseForbidden()
-    contacts = Contact.objects.all().order_by('-created_at')
+    status = request.GET.get('status', '')
+    contacts = Contact.objects.order_by('-created_at')
+    if status in dict(Contact.STATUS_CHOICES):
+        contacts = contacts.filter(status=status)
+    else:
+        status = ''
+    page = Paginator(contacts, CONTACTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
     return render(
         request,
         'restaurant/contact_messages.html',
-        {'contacts': contacts}
+        {
+            'contacts': page,
+            'page_obj': page,
+            'status': status,
+            'status_choices': Contact.STATUS_CHOICES,
+            'unread_count': Contact.unread_count(),
+        }
     )
 
 
+@login_required
+def bulk_update_contacts(request):
+    """View for changing the status of, or deleting, many messages."""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        contacts = Contact.objects.filter(id__in=[
+            pk for pk in request.POST.getlist('contact_ids') if pk.isdigit()
+        ])
+        if action == 'delete':
+            count = contacts.bulk_delete()
+            messages.success(request, f'{count} message(s) deleted.')
+        elif action in dict(Contact.STATUS_CHOICES):
+            count = contacts.set_status(action)
+            messages.success(
+                request,
+                f'{count} message(s) marked as {action}.'
+            )
+        else:
+            messages.error(request, 'Invalid action selected.')
+    url = reverse('contact_messages')
+    status = request.POST.get('status')
+    if status in dict(Contact.STATUS_CHOICES):
+        url += f'?status={status}'
+    return redirect(url)
+
+
 @login_required
 def view_contact(request, contact_id):
     """View for displaying contact message details."""
@@ -301,16 +622,29 @@ def view_contact(request, contact_id):
 
 @login_required
 def update_contact_status(request, contact_id):
-    """View for updating contact message status."""
+    """View for updating contact message status.
+
+    The form posts the ``version`` of the message it showed; the update is
+    refused if the message changed since.
+    """
     if not request.user.is_staff:
         return HttpResponseForbidden()
     contact = get_object_or_404(Contact, id=contact_id)
     if request.method == 'POST':
         new_status = request.POST.get('status')
+        version = request.POST.get('version', '')
         if new_status in dict(Contact.STATUS_CHOICES):
+            if version.isdigit():
+                contact.version = int(version)
             contact.status = new_status
-            contact.save()
-            messages.success(request, 'Contact status updated successfully.')
+            try:
+                contact.save()
+            except EditConflict as conflict:
+                messages.error(request, str(conflict))
+            else:
+                messages.success(
+                    request, 'Contact status updated successfully.'
+                )
         else:
             messages.error(request, 'Invalid status selected.')
     return redirect('view_contact', contact_id=contact_id)
@@ -333,6 +667,125 @@ def delete_contact(request, contact_id):
     )
 
 
+@login_required
+def occupancy_dashboard(request, restaurant_id):
+    """View showing covers per weekday and hour for a restaurant."""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    restaurant = get_object_or_404(Restaurant, id=restaurant_id)
+    today = timezone.now().date()
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        start, end = today - timedelta(days=364), today
+    if start > end:
+        start, end = end, start
+    return render(
+        request,
+        'restaurant/occupancy.html',
+        {
+            'restaurant': restaurant,
+            'start': start,
+            'end': end,
+            'heatmap': reports.occupancy_heatmap(restaurant, start, end),
+        }
+    )
+
+
 def contact_success(request):
     """View for displaying contact form submission success."""
     return render(request, 'restaurant/contact_success.html')
+
+
+def metrics(request):
+    """View exposing Prometheus metrics for every worker."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    body, content_type = app_metrics.render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+def _calendar_response(kind, token):
+    pk = ics.read_token(kind, token)
+    if pk is None:
+        raise Http404
+    return HttpResponse(
+        ics.get_feed(kind, pk),
+        content_type='text/calendar; charset=utf-8'
+    )
+
+
+def user_calendar(request, token):
+    """iCalendar feed of a user's bookings, addressed by signed token."""
+    return _calendar_response('user', token)
+
+
+def restaurant_calendar(request, token):
+    """iCalendar feed of a restaurant's bookings for its staff."""
+    return _calendar_response('restaurant', token)
+
+
+class _Echo:
+    """File-like object whose write() hands the value back to csv."""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+def export_booking_events(request):
+    """Stream the booking event log as CSV, optionally after an event id.
+
+    Under ASGI the rows come from an async generator; Django would read a
+    plain iterator into memory there before sending any of it.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    events = BookingEvent.objects.order_by('id').values_list(
+        'id', 'booking_id', 'event_type', 'from_status', 'to_status',
+        'actor_id', 'details', 'created_at'
+    )
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        events = events.filter(id__gt=int(after))
+    writer = csv.writer(_Echo())
+    header = [
+        'id', 'booking_id', 'event_type', 'from_status', 'to_status',
+        'actor_id', 'details', 'created_at'
+    ]
+
+    def row(event):
+        *fields, details, created_at = event
+        return writer.writerow(
+            fields + [json.dumps(details), created_at.isoformat()]
+        )
+
+    def rows():
+        yield writer.writerow(header)
+        for event in events.iterator(chunk_size=2000):
+            yield row(event)
+
+    async def async_rows():
+        yield writer.writerow(header)
+        last = 0
+        while True:
+            # Read by id from the last row sent, one chunk per query.
+            chunk = await sync_to_async(list)(
+                events.filter(id__gt=last)[:2000]
+            )
+            for event in chunk:
+                yield row(event)
+            if len(chunk) < 2000:
+                break
+            last = chunk[-1][0]
+
+    response = StreamingHttpResponse(
+        async_rows() if isinstance(request, ASGIRequest) else rows(),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = (
+        'attachment; filename="booking_events.csv"'
+    )
+    return response
@@ -2,10 +2,23 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from allauth.account import views as account_views
 from restaurant import views as restaurant_views
+from restaurant.ratelimit import rate_limit
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Rate-limited wrappers; these match before the Allauth URLs below
+    path(
+        'accounts/login/',
+        rate_limit('login')(account_views.login),
+        name='account_login'
+    ),
+    path(
+        'accounts/signup/',
+        rate_limit('signup')(account_views.signup),
+        name='account_signup'
+    ),
     path('accounts/', include('allauth.urls')),  # For Allauth URLs
     path('', include('restaurant.urls')),  # Include restaurant URLs
     path('my-bookings/', restaurant_views.my_bookings, name='booking_list'),